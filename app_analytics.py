@@ -1,8 +1,36 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from datetime import UTC, datetime, timezone
 
 from pydantic import BaseModel, Field
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+METRIC_PREFIX = "secondbrain"
+MINUTE_SLOTS = 60
+HOUR_SLOTS = 168
+
+Labels = tuple[tuple[str, str], ...]
 
 
 class AnalyticsSummary(BaseModel):
@@ -18,50 +46,279 @@ class AnalyticsSummary(BaseModel):
     last_updated: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
-class AnalyticsStore:
+COUNTER_NAMES = tuple(name for name in AnalyticsSummary.model_fields if name != "last_updated")
+
+_WINDOW_PATTERN = re.compile(r"^(\d+)([mhd])$")
+_WINDOW_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+class TimeseriesQueryError(ValueError):
+    pass
+
+
+class TimeseriesBucket(BaseModel):
+    start: datetime
+    count: int
+
+
+class AnalyticsTimeseries(BaseModel):
+    metric: str
+    window: str
+    resolution_seconds: int
+    buckets: list[TimeseriesBucket]
+    total: int
+    rate_per_minute: float
+
+
+class _Ring:
+    __slots__ = ("width", "stamps", "values")
+
+    def __init__(self, width: int, slots: int) -> None:
+        self.width = width
+        self.stamps = [-1] * slots
+        self.values = [0] * slots
+
+    def add(self, now: float, amount: int) -> None:
+        period = int(now // self.width)
+        index = period % len(self.values)
+        if self.stamps[index] != period:
+            self.stamps[index] = period
+            self.values[index] = 0
+        self.values[index] += amount
+
+    def get(self, period: int) -> int:
+        index = period % len(self.values)
+        return self.values[index] if self.stamps[index] == period else 0
+
+
+class _Shard:
+    __slots__ = ("counters", "histograms", "windows", "last_updated")
+
     def __init__(self) -> None:
-        self._summary = AnalyticsSummary()
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[tuple[str, Labels], list[float]] = {}
+        self.windows: dict[str, tuple[_Ring, _Ring]] = {}
+        self.last_updated = 0.0
+
+
+class LatencyTimer:
+    __slots__ = ("_store", "_metric", "_labels", "_started")
+
+    def __init__(self, store: AnalyticsStore, metric: str, labels: Labels) -> None:
+        self._store = store
+        self._metric = metric
+        self._labels = labels
+        self._started = 0.0
+
+    def __enter__(self) -> LatencyTimer:
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._store.observe(self._metric, time.perf_counter() - self._started, self._labels)
+
+
+class AnalyticsStore:
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
+        self._local = threading.local()
+        self._shards: list[_Shard] = []
+        self._shards_lock = threading.Lock()
+        self._created_at = clock()
 
     def summary(self) -> AnalyticsSummary:
-        return self._summary
+        counters: dict[str, int] = {}
+        last_updated = self._created_at
+        for shard in self._snapshot():
+            for name, value in list(shard.counters.items()):
+                counters[name] = counters.get(name, 0) + value
+            last_updated = max(last_updated, shard.last_updated)
+        return AnalyticsSummary(
+            **counters,
+            last_updated=datetime.fromtimestamp(last_updated, UTC),
+        )
 
-    def record_item_created(self) -> None:
-        self._summary.items_created += 1
-        self._touch()
+    def record_item_created(self, count: int = 1) -> None:
+        self._increment("items_created", count)
 
     def record_item_deleted(self) -> None:
-        self._summary.items_deleted += 1
-        self._touch()
+        self._increment("items_deleted")
 
     def record_contradiction_run(self, detected_count: int) -> None:
-        self._summary.contradiction_runs += 1
-        self._summary.contradictions_detected += detected_count
-        self._touch()
+        self._increment("contradiction_runs")
+        self._increment("contradictions_detected", detected_count)
 
     def record_interrogation_created(self) -> None:
-        self._summary.interrogations_created += 1
-        self._touch()
+        self._increment("interrogations_created")
 
     def record_interrogation_response(self) -> None:
-        self._summary.interrogation_responses += 1
-        self._touch()
+        self._increment("interrogation_responses")
 
     def record_flow_run(self, detected_count: int) -> None:
-        self._summary.flows_run += 1
-        self._summary.contradictions_detected += detected_count
-        self._summary.interrogations_created += 1
-        self._touch()
+        self._increment("flows_run")
+        self._increment("contradictions_detected", detected_count)
+        self._increment("interrogations_created")
 
-    def record_embedding_created(self) -> None:
-        self._summary.embeddings_created += 1
-        self._touch()
+    def record_embedding_created(self, count: int = 1) -> None:
+        self._increment("embeddings_created", count)
 
     def record_embedding_failure(self) -> None:
-        self._summary.embedding_failures += 1
-        self._touch()
+        self._increment("embedding_failures")
+
+    def observe(self, metric: str, seconds: float, labels: Labels = ()) -> None:
+        histograms = self._shard().histograms
+        key = (metric, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [0.0] * (len(LATENCY_BUCKETS) + 2)
+        histogram[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+
+    def timer(self, metric: str, labels: Labels = ()) -> LatencyTimer:
+        return LatencyTimer(self, metric, labels)
+
+    def timeseries(self, metric: str, window: str) -> AnalyticsTimeseries:
+        if metric not in COUNTER_NAMES:
+            raise TimeseriesQueryError(f"Unknown metric: {metric}")
+        resolution, periods = parse_window(window)
+        ring_index = 0 if resolution == 60 else 1
+        rings = [
+            shard_windows[ring_index]
+            for shard in self._snapshot()
+            if (shard_windows := shard.windows.get(metric)) is not None
+        ]
+        current = int(self._clock() // resolution)
+        buckets: list[TimeseriesBucket] = []
+        for period in range(current - periods + 1, current + 1):
+            buckets.append(
+                TimeseriesBucket(
+                    start=datetime.fromtimestamp(period * resolution, UTC),
+                    count=sum(ring.get(period) for ring in rings),
+                )
+            )
+        total = sum(bucket.count for bucket in buckets)
+        return AnalyticsTimeseries(
+            metric=metric,
+            window=window,
+            resolution_seconds=resolution,
+            buckets=buckets,
+            total=total,
+            rate_per_minute=total / (periods * resolution / 60),
+        )
+
+    def render_prometheus(self) -> str:
+        shards = self._snapshot()
+        counters = self.summary().model_dump()
+        lines: list[str] = []
+        for name in COUNTER_NAMES:
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {counters[name]}")
+
+        histograms: dict[str, dict[Labels, list[float]]] = {}
+        for shard in shards:
+            for (name, labels), values in list(shard.histograms.items()):
+                merged = histograms.setdefault(name, {}).get(labels)
+                if merged is None:
+                    histograms[name][labels] = list(values)
+                else:
+                    for index, value in enumerate(values):
+                        merged[index] += value
+        for name in sorted(histograms):
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, values in sorted(histograms[name].items()):
+                label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+                prefix = f"{label_text}," if label_text else ""
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, values, strict=False):
+                    cumulative += int(count)
+                    lines.append(f'{metric}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+                cumulative += int(values[len(LATENCY_BUCKETS)])
+                lines.append(f'{metric}_bucket{{{prefix}le="+Inf"}} {cumulative}')
+                suffix = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{metric}_sum{suffix} {values[-1]}")
+                lines.append(f"{metric}_count{suffix} {cumulative}")
+        return "\n".join(lines) + "\n"
 
     def clear(self) -> None:
-        self._summary = AnalyticsSummary()
+        for shard in self._snapshot():
+            shard.counters.clear()
+            shard.histograms.clear()
+            shard.windows.clear()
+            shard.last_updated = 0.0
+        self._created_at = self._clock()
+
+    def _increment(self, name: str, amount: int = 1) -> None:
+        shard = self._shard()
+        now = self._clock()
+        shard.counters[name] = shard.counters.get(name, 0) + amount
+        rings = shard.windows.get(name)
+        if rings is None:
+            rings = shard.windows[name] = (_Ring(60, MINUTE_SLOTS), _Ring(3600, HOUR_SLOTS))
+        rings[0].add(now, amount)
+        rings[1].add(now, amount)
+        shard.last_updated = now
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshot(self) -> list[_Shard]:
+        with self._shards_lock:
+            return list(self._shards)
+
+
+class RequestTimingMiddleware:
+    def __init__(self, app: ASGIApp, analytics: AnalyticsStore) -> None:
+        self.app = app
+        self.analytics = analytics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            endpoint = f"{scope['method']} {getattr(route, 'path', 'unmatched')}"
+            self.analytics.observe(
+                "http_request_duration_seconds",
+                time.perf_counter() - started,
+                (("endpoint", endpoint), ("status", str(status))),
+            )
+
+
+def parse_window(window: str) -> tuple[int, int]:
+    match = _WINDOW_PATTERN.match(window)
+    if match is None:
+        raise TimeseriesQueryError(f"Invalid window: {window}")
+    seconds = int(match.group(1)) * _WINDOW_UNITS[match.group(2)]
+    if seconds <= 0:
+        raise TimeseriesQueryError(f"Invalid window: {window}")
+    if seconds <= MINUTE_SLOTS * 60 and seconds % 60 == 0:
+        return 60, seconds // 60
+    if seconds <= HOUR_SLOTS * 3600 and seconds % 3600 == 0:
+        return 3600, seconds // 3600
+    raise TimeseriesQueryError(
+        f"Window must be whole minutes up to {MINUTE_SLOTS}m or whole hours up to {HOUR_SLOTS}h."
+    )
+
 
-    def _touch(self) -> None:
-        self._summary.last_updated = datetime.now(timezone.utc)
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
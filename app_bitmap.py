@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterator, Sequence
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+ARRAY_LIMIT = 4096
+
+Container = array | bytearray
+
+
+class Bitmap:
+    __slots__ = ("_chunks",)
+
+    def __init__(self, chunks: dict[int, Container] | None = None) -> None:
+        self._chunks: dict[int, Container] = chunks or {}
+
+    @classmethod
+    def from_ordinals(cls, ordinals: Sequence[int] | np.ndarray) -> Bitmap:
+        import numpy as np
+
+        values = np.unique(np.asarray(ordinals, dtype=np.int64))
+        chunks: dict[int, Container] = {}
+        if not values.size:
+            return cls(chunks)
+        highs = values >> CHUNK_BITS
+        bounds = np.flatnonzero(np.diff(highs)) + 1
+        for part in np.split(values, bounds):
+            chunks[int(part[0]) >> CHUNK_BITS] = _from_lows(
+                (part & (CHUNK_SIZE - 1)).astype(np.uint16)
+            )
+        return cls(chunks)
+
+    def add(self, ordinal: int) -> None:
+        high, low = ordinal >> CHUNK_BITS, ordinal & (CHUNK_SIZE - 1)
+        container = self._chunks.get(high)
+        if container is None:
+            self._chunks[high] = array("H", (low,))
+        elif isinstance(container, bytearray):
+            container[low >> 3] |= 1 << (low & 7)
+        elif not container or container[-1] < low:
+            container.append(low)
+            if len(container) > ARRAY_LIMIT:
+                self._chunks[high] = _densify(container)
+        else:
+            index = bisect_left(container, low)
+            if container[index] != low:
+                container.insert(index, low)
+                if len(container) > ARRAY_LIMIT:
+                    self._chunks[high] = _densify(container)
+
+    def remove(self, ordinal: int) -> None:
+        high, low = ordinal >> CHUNK_BITS, ordinal & (CHUNK_SIZE - 1)
+        container = self._chunks.get(high)
+        if container is None:
+            return
+        if isinstance(container, bytearray):
+            container[low >> 3] &= ~(1 << (low & 7)) & 0xFF
+            cardinality = _dense_cardinality(container)
+            if cardinality <= ARRAY_LIMIT // 2:
+                self._chunks[high] = _sparsify(container)
+            if not cardinality:
+                del self._chunks[high]
+            return
+        index = bisect_left(container, low)
+        if index < len(container) and container[index] == low:
+            del container[index]
+            if not container:
+                del self._chunks[high]
+
+    def __contains__(self, ordinal: int) -> bool:
+        high, low = ordinal >> CHUNK_BITS, ordinal & (CHUNK_SIZE - 1)
+        container = self._chunks.get(high)
+        if container is None:
+            return False
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] >> (low & 7) & 1)
+        index = bisect_left(container, low)
+        return index < len(container) and container[index] == low
+
+    def __len__(self) -> int:
+        return sum(
+            _dense_cardinality(container) if isinstance(container, bytearray) else len(container)
+            for container in self._chunks.values()
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self._chunks)
+
+    def __iter__(self) -> Iterator[int]:
+        for high in sorted(self._chunks):
+            base = high << CHUNK_BITS
+            for low in _lows(self._chunks[high]).tolist():
+                yield base + low
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Bitmap):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def copy(self) -> Bitmap:
+        return Bitmap({high: container[:] for high, container in self._chunks.items()})
+
+    def __and__(self, other: Bitmap) -> Bitmap:
+        chunks: dict[int, Container] = {}
+        for high in self._chunks.keys() & other._chunks.keys():
+            container = _and(self._chunks[high], other._chunks[high])
+            if container:
+                chunks[high] = container
+        return Bitmap(chunks)
+
+    def __or__(self, other: Bitmap) -> Bitmap:
+        chunks: dict[int, Container] = {}
+        for high in self._chunks.keys() | other._chunks.keys():
+            left, right = self._chunks.get(high), other._chunks.get(high)
+            if left is None or right is None:
+                chunks[high] = (left if right is None else right)[:]
+            else:
+                chunks[high] = _or(left, right)
+        return Bitmap(chunks)
+
+    def __sub__(self, other: Bitmap) -> Bitmap:
+        chunks: dict[int, Container] = {}
+        for high, left in self._chunks.items():
+            right = other._chunks.get(high)
+            container = left[:] if right is None else _and_not(left, right)
+            if container:
+                chunks[high] = container
+        return Bitmap(chunks)
+
+    def contains(self, ordinals: np.ndarray) -> np.ndarray:
+        import numpy as np
+
+        found = np.zeros(len(ordinals), dtype=bool)
+        if not self._chunks or not len(ordinals):
+            return found
+        order = np.argsort(ordinals, kind="stable")
+        ordered = ordinals[order]
+        highs = ordered >> CHUNK_BITS
+        chunks, starts = np.unique(highs, return_index=True)
+        stops = np.append(starts[1:], len(ordered))
+        for high, start, stop in zip(chunks.tolist(), starts.tolist(), stops.tolist(), strict=True):
+            container = self._chunks.get(high)
+            if container is None:
+                continue
+            lows = (ordered[start:stop] & (CHUNK_SIZE - 1)).astype(np.uint16)
+            if isinstance(container, bytearray):
+                found[order[start:stop]] = _test(container, lows)
+                continue
+            values = np.frombuffer(container, dtype=np.uint16)
+            index = np.minimum(np.searchsorted(values, lows), len(values) - 1)
+            found[order[start:stop]] = values[index] == lows
+        return found
+
+
+def _lows(container: Container) -> np.ndarray:
+    import numpy as np
+
+    if isinstance(container, bytearray):
+        bits = np.unpackbits(np.frombuffer(container, dtype=np.uint8), bitorder="little")
+        return np.flatnonzero(bits).astype(np.uint16)
+    return np.frombuffer(container, dtype=np.uint16)
+
+
+def _words(container: Container) -> np.ndarray:
+    import numpy as np
+
+    if isinstance(container, bytearray):
+        return np.frombuffer(container, dtype="<u8")
+    bits = np.zeros(CHUNK_SIZE, dtype=bool)
+    bits[np.frombuffer(container, dtype=np.uint16)] = True
+    return np.packbits(bits, bitorder="little").view("<u8")
+
+
+def _from_lows(lows: np.ndarray) -> Container:
+    import numpy as np
+
+    if lows.size > ARRAY_LIMIT:
+        bits = np.zeros(CHUNK_SIZE, dtype=bool)
+        bits[lows] = True
+        return bytearray(np.packbits(bits, bitorder="little").tobytes())
+    container = array("H")
+    container.frombytes(lows.astype(np.uint16).tobytes())
+    return container
+
+
+def _from_words(words: np.ndarray) -> Container:
+    container = bytearray(words.astype("<u8").tobytes())
+    if _dense_cardinality(container) <= ARRAY_LIMIT:
+        return _sparsify(container)
+    return container
+
+
+def _densify(container: array) -> bytearray:
+    return bytearray(_words(container).tobytes())
+
+
+def _sparsify(container: bytearray) -> array:
+    sparse = array("H")
+    sparse.frombytes(_lows(container).tobytes())
+    return sparse
+
+
+def _dense_cardinality(container: bytearray) -> int:
+    return int.from_bytes(container, "little").bit_count()
+
+
+def _and(left: Container, right: Container) -> Container:
+    import numpy as np
+
+    if isinstance(left, bytearray) and isinstance(right, bytearray):
+        return _from_words(_words(left) & _words(right))
+    if isinstance(left, bytearray):
+        left, right = right, left
+    lows = np.frombuffer(left, dtype=np.uint16)
+    if isinstance(right, bytearray):
+        return _from_lows(lows[_test(right, lows)])
+    return _from_lows(np.intersect1d(lows, np.frombuffer(right, dtype=np.uint16), True))
+
+
+def _or(left: Container, right: Container) -> Container:
+    import numpy as np
+
+    if isinstance(left, array) and isinstance(right, array):
+        lows = np.union1d(
+            np.frombuffer(left, dtype=np.uint16),
+            np.frombuffer(right, dtype=np.uint16),
+        )
+        return _from_lows(lows)
+    return _from_words(_words(left) | _words(right))
+
+
+def _and_not(left: Container, right: Container) -> Container:
+    import numpy as np
+
+    if isinstance(left, bytearray):
+        return _from_words(_words(left) & ~_words(right))
+    lows = np.frombuffer(left, dtype=np.uint16)
+    if isinstance(right, bytearray):
+        return _from_lows(lows[~_test(right, lows)])
+    return _from_lows(np.setdiff1d(lows, np.frombuffer(right, dtype=np.uint16), True))
+
+
+def _test(container: bytearray, lows: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    data = np.frombuffer(container, dtype=np.uint8)
+    return (data[lows >> 3] >> (lows & 7).astype(np.uint8) & 1).astype(bool)
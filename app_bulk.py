@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from app.models import MemoryItemCreate
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+_batch_adapter = TypeAdapter(list[MemoryItemCreate])
+
+
+class BulkPayloadError(ValueError):
+    pass
+
+
+class BulkItemError(BaseModel):
+    index: int
+    errors: list[str]
+
+
+class BulkItemResponse(BaseModel):
+    created: int
+    merged: int = 0
+    item_ids: list[UUID]
+    errors: list[BulkItemError]
+    embedding_queued: bool
+
+
+def is_ndjson(content_type: str | None) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in NDJSON_MEDIA_TYPES
+
+
+def parse_bulk_payload(
+    body: bytes,
+    content_type: str | None,
+) -> tuple[list[tuple[int, Any]], list[BulkItemError]]:
+    if is_ndjson(content_type):
+        return _parse_ndjson(body)
+    try:
+        payload = json.loads(body)
+    except ValueError as exc:
+        raise BulkPayloadError("Request body is not valid JSON.") from exc
+    if not isinstance(payload, list):
+        raise BulkPayloadError("Request body must be a JSON array of items.")
+    return list(enumerate(payload)), []
+
+
+def _parse_ndjson(body: bytes) -> tuple[list[tuple[int, Any]], list[BulkItemError]]:
+    rows: list[tuple[int, Any]] = []
+    errors: list[BulkItemError] = []
+    index = 0
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append((index, json.loads(line)))
+        except ValueError:
+            errors.append(BulkItemError(index=index, errors=["Line is not valid JSON."]))
+        index += 1
+    return rows, errors
+
+
+def validate_rows(
+    rows: list[tuple[int, Any]],
+    batch_size: int = 1000,
+) -> tuple[list[tuple[int, MemoryItemCreate]], list[BulkItemError]]:
+    valid: list[tuple[int, MemoryItemCreate]] = []
+    errors: list[BulkItemError] = []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start : start + batch_size]
+        batch_valid, batch_errors = _validate_batch(batch)
+        valid.extend(batch_valid)
+        errors.extend(batch_errors)
+    return valid, errors
+
+
+def _validate_batch(
+    batch: list[tuple[int, Any]],
+) -> tuple[list[tuple[int, MemoryItemCreate]], list[BulkItemError]]:
+    indexes = [index for index, _ in batch]
+    try:
+        items = _batch_adapter.validate_python([row for _, row in batch])
+    except ValidationError as exc:
+        messages: dict[int, list[str]] = {}
+        for error in exc.errors():
+            position = error["loc"][0]
+            field = ".".join(str(part) for part in error["loc"][1:]) or "item"
+            messages.setdefault(position, []).append(f"{field}: {error['msg']}")
+        errors = [
+            BulkItemError(index=indexes[position], errors=position_errors)
+            for position, position_errors in sorted(messages.items())
+        ]
+        remaining = [row for position, row in enumerate(batch) if position not in messages]
+        if not remaining:
+            return [], errors
+        valid, _ = _validate_batch(remaining)
+        return valid, errors
+    return list(zip(indexes, items, strict=True)), []
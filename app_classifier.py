@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Protocol
+from uuid import UUID
+
+from app.contradictions import ContradictionRecord
+from app.text_index import tokenize
+from app.tracing import traced
+
+AMBIGUOUS_BELOW = 0.5
+NEGATIONS = frozenset({"not", "no", "never", "won't", "can't", "don't", "isn't", "stop"})
+
+VerdictKey = tuple[bytes, bytes, str]
+
+
+class ContradictionModelError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class ContradictionVerdict:
+    contradicts: bool
+    confidence: float
+
+
+class ContradictionModel(Protocol):
+    version: str
+
+    def classify(self, pairs: Sequence[tuple[str, str]]) -> list[ContradictionVerdict]:
+        raise NotImplementedError
+
+
+class LocalContradictionModel:
+    version = "local-1"
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls = 0
+
+    def classify(self, pairs: Sequence[tuple[str, str]]) -> list[ContradictionVerdict]:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return [self._verdict(first, second) for first, second in pairs]
+
+    def _verdict(self, first: str, second: str) -> ContradictionVerdict:
+        first_terms, second_terms = set(tokenize(first)), set(tokenize(second))
+        negated = bool(first_terms & NEGATIONS) != bool(second_terms & NEGATIONS)
+        first_terms -= NEGATIONS
+        second_terms -= NEGATIONS
+        union = first_terms | second_terms
+        overlap = len(first_terms & second_terms) / len(union) if union else 0.0
+        if negated and overlap >= 0.5:
+            return ContradictionVerdict(True, round(min(0.95, 0.4 + 0.55 * overlap), 3))
+        return ContradictionVerdict(False, round(1 - overlap, 3))
+
+
+def content_digest(content: str) -> bytes:
+    return hashlib.blake2b(content.encode(), digest_size=16).digest()
+
+
+class ContradictionClassifier:
+    def __init__(
+        self,
+        model: ContradictionModel,
+        batch_size: int = 64,
+        max_wait: float = 0.005,
+        budget: float = 0.2,
+        cache_size: int = 10_000,
+    ) -> None:
+        self.model = model
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.budget = budget
+        self.cache_size = cache_size
+        self._cache: OrderedDict[VerdictKey, ContradictionVerdict] = OrderedDict()
+        self._inflight: dict[VerdictKey, Future[ContradictionVerdict]] = {}
+        self._queue: list[tuple[VerdictKey, str, str]] = []
+        self._ready = threading.Condition()
+        self._worker: threading.Thread | None = None
+        self._closed = False
+
+    def key(self, first: str, second: str) -> VerdictKey:
+        low, high = sorted((content_digest(first), content_digest(second)))
+        return (low, high, self.model.version)
+
+    def cached(self, first: str, second: str) -> ContradictionVerdict | None:
+        with self._ready:
+            return self._cache.get(self.key(first, second))
+
+    @traced("classifier.verdicts")
+    def verdicts(
+        self,
+        pairs: Sequence[tuple[str, str]],
+        budget: float | None = None,
+    ) -> list[ContradictionVerdict | None]:
+        deadline = time.monotonic() + (self.budget if budget is None else budget)
+        results: list[ContradictionVerdict | None] = [None] * len(pairs)
+        waiting: list[tuple[int, Future[ContradictionVerdict]]] = []
+        with self._ready:
+            for index, (first, second) in enumerate(pairs):
+                if first > second:
+                    first, second = second, first
+                key = self.key(first, second)
+                verdict = self._cache.get(key)
+                if verdict is not None:
+                    self._cache.move_to_end(key)
+                    results[index] = verdict
+                    continue
+                future = self._inflight.get(key)
+                if future is None:
+                    future = self._inflight[key] = Future()
+                    self._queue.append((key, first, second))
+                waiting.append((index, future))
+            if self._queue:
+                self._ensure_worker()
+                self._ready.notify()
+        for index, future in waiting:
+            try:
+                results[index] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except (TimeoutError, ContradictionModelError):
+                continue
+        return results
+
+    @traced("classifier.refine")
+    def refine(
+        self,
+        records: Sequence[ContradictionRecord],
+        contents: Mapping[UUID, str],
+        budget: float | None = None,
+    ) -> list[ContradictionRecord]:
+        ambiguous = [
+            index
+            for index, record in enumerate(records)
+            if len(record.item_ids) == 2
+            and record.confidence < AMBIGUOUS_BELOW
+            and all(item_id in contents for item_id in record.item_ids)
+        ]
+        verdicts = self.verdicts(
+            [
+                (contents[records[index].item_ids[0]], contents[records[index].item_ids[1]])
+                for index in ambiguous
+            ],
+            budget,
+        )
+        decided = dict(zip(ambiguous, verdicts, strict=True))
+        refined: list[ContradictionRecord] = []
+        for index, record in enumerate(records):
+            verdict = decided.get(index)
+            if verdict is None:
+                refined.append(record)
+            elif verdict.contradicts:
+                refined.append(record.model_copy(update={"confidence": verdict.confidence}))
+        return refined
+
+    def close(self) -> None:
+        with self._ready:
+            self._closed = True
+            self._ready.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout=1)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._closed = False
+            self._worker = threading.Thread(
+                target=self._run,
+                name="contradiction-classifier",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._ready:
+                self._ready.wait_for(lambda: self._queue or self._closed)
+                if self._closed:
+                    return
+                self._ready.wait_for(
+                    lambda: len(self._queue) >= self.batch_size or self._closed,
+                    timeout=self.max_wait,
+                )
+                batch = self._queue[: self.batch_size]
+                del self._queue[: self.batch_size]
+            self._classify(batch)
+
+    def _classify(self, batch: list[tuple[VerdictKey, str, str]]) -> None:
+        try:
+            verdicts = self.model.classify([(first, second) for _, first, second in batch])
+            if len(verdicts) != len(batch):
+                raise ContradictionModelError("Model returned the wrong number of verdicts.")
+        except Exception as exc:
+            failure = (
+                exc
+                if isinstance(exc, ContradictionModelError)
+                else ContradictionModelError(f"Contradiction model failed: {exc}")
+            )
+            with self._ready:
+                futures = [self._inflight.pop(key) for key, _, _ in batch]
+            for future in futures:
+                future.set_exception(failure)
+            return
+        with self._ready:
+            futures = []
+            for (key, _, _), verdict in zip(batch, verdicts, strict=True):
+                self._cache[key] = verdict
+                futures.append(self._inflight.pop(key))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        for future, verdict in zip(futures, verdicts, strict=True):
+            future.set_result(verdict)
+
+
+def get_contradiction_classifier() -> ContradictionClassifier | None:
+    model = os.getenv("CONTRADICTION_MODEL", "").lower()
+    if not model:
+        return None
+    if model != "local":
+        raise ContradictionModelError(f"Unknown contradiction model: {model}")
+    return ContradictionClassifier(
+        LocalContradictionModel(),
+        batch_size=int(os.getenv("CONTRADICTION_MODEL_BATCH_SIZE", "64")),
+        budget=float(os.getenv("CONTRADICTION_MODEL_BUDGET_MS", "200")) / 1000,
+    )
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("version", "task", "result", "superseded")
+
+    def __init__(
+        self,
+        version: int,
+        task: asyncio.Future[Any],
+        result: asyncio.Future[Any],
+    ) -> None:
+        self.version = version
+        self.task = task
+        self.result = result
+        self.superseded = False
+
+
+class SingleFlight(Generic[T]):
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, _Flight] = {}
+
+    async def run(
+        self,
+        key: Hashable,
+        version: int,
+        factory: Callable[[], Awaitable[T]],
+    ) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._start(key, version, factory)
+        elif flight.version < version:
+            stale = flight
+            flight = self._start(key, version, factory)
+            self._supersede(stale, flight)
+        return await asyncio.shield(flight.result)
+
+    def _start(
+        self,
+        key: Hashable,
+        version: int,
+        factory: Callable[[], Awaitable[T]],
+    ) -> _Flight:
+        loop = asyncio.get_running_loop()
+        flight = _Flight(version, asyncio.ensure_future(factory()), loop.create_future())
+        self._flights[key] = flight
+        flight.task.add_done_callback(lambda task: self._finish(key, flight, task))
+        return flight
+
+    def _finish(self, key: Hashable, flight: _Flight, task: asyncio.Future[Any]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if flight.superseded or flight.result.done():
+            return
+        if task.cancelled():
+            flight.result.cancel()
+        elif task.exception() is not None:
+            flight.result.set_exception(task.exception())
+        else:
+            flight.result.set_result(task.result())
+
+    @staticmethod
+    def _supersede(stale: _Flight, newer: _Flight) -> None:
+        stale.superseded = True
+        stale.task.cancel()
+        newer.result.add_done_callback(lambda result: _copy_result(result, stale.result))
+
+
+def _copy_result(source: asyncio.Future[Any], target: asyncio.Future[Any]) -> None:
+    if target.done():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
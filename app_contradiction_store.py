@@ -1,21 +1,50 @@
 from __future__ import annotations
 
+import threading
 from collections.abc import Iterable
 
 from app.contradictions import ContradictionRecord
 
+ContradictionKey = tuple[str, frozenset[int]]
+
+
+def contradiction_key(record: ContradictionRecord) -> ContradictionKey:
+    return (record.type.value, frozenset(item_id.int for item_id in record.item_ids))
+
 
 class ContradictionStore:
     def __init__(self) -> None:
         self._records: list[ContradictionRecord] = []
+        self._keys: set[ContradictionKey] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
 
     def add_many(self, records: Iterable[ContradictionRecord]) -> list[ContradictionRecord]:
         records_list = list(records)
-        self._records.extend(records_list)
+        with self._lock:
+            self._records.extend(records_list)
+            self._keys.update(map(contradiction_key, records_list))
         return records_list
 
+    def add_new(self, records: Iterable[ContradictionRecord]) -> list[ContradictionRecord]:
+        added: list[ContradictionRecord] = []
+        with self._lock:
+            for record in records:
+                key = contradiction_key(record)
+                if key in self._keys:
+                    continue
+                self._keys.add(key)
+                self._records.append(record)
+                added.append(record)
+        return added
+
     def list(self) -> list[ContradictionRecord]:
-        return list(self._records)
+        with self._lock:
+            return list(self._records)
 
     def clear(self) -> None:
-        self._records.clear()
+        with self._lock:
+            self._records.clear()
+            self._keys.clear()
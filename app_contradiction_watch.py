@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import operator
+import os
+import threading
+from collections.abc import Callable, Iterator, Mapping
+from uuid import UUID
+
+from app.contradiction_store import ContradictionStore
+from app.contradictions import ContradictionRecord, detect_item_contradictions
+from app.storage import MemoryStore
+from app.tracing import traced
+
+DEFAULT_DEBOUNCE_SECONDS = 0.5
+NEIGHBOUR_LIMIT = 20
+FEED_QUEUE_SIZE = 256
+
+ContradictionRefiner = Callable[
+    [list[ContradictionRecord], Mapping[UUID, str]],
+    list[ContradictionRecord],
+]
+
+
+class ContradictionFeed:
+    def __init__(self, queue_size: int = FEED_QUEUE_SIZE) -> None:
+        self.queue_size = queue_size
+        self._subscribers: list[
+            tuple[asyncio.AbstractEventLoop, asyncio.Queue[ContradictionRecord]]
+        ] = []
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    @contextlib.contextmanager
+    def subscribe(self) -> Iterator[asyncio.Queue[ContradictionRecord]]:
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        with self._lock:
+            self._subscribers.append(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, records: list[ContradictionRecord]) -> None:
+        if not records:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            with contextlib.suppress(RuntimeError):
+                loop.call_soon_threadsafe(_offer, queue, records)
+
+
+def _offer(queue: asyncio.Queue[ContradictionRecord], records: list[ContradictionRecord]) -> None:
+    for record in records:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(record)
+
+
+class ContradictionWatcher:
+    def __init__(
+        self,
+        store: MemoryStore,
+        contradictions: ContradictionStore,
+        feed: ContradictionFeed | None = None,
+        delay: float | None = None,
+        neighbours: int = NEIGHBOUR_LIMIT,
+        refine: ContradictionRefiner | None = None,
+    ) -> None:
+        self.store = store
+        self.contradictions = contradictions
+        self.feed = feed or ContradictionFeed()
+        self.delay = (
+            float(os.getenv("CONTRADICTION_DEBOUNCE_SECONDS", DEFAULT_DEBOUNCE_SECONDS))
+            if delay is None
+            else delay
+        )
+        self.neighbours = neighbours
+        self.refine = refine
+        self._pending: set[UUID] = set()
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+        self._checking = threading.Lock()
+
+    def schedule(self, item_id: UUID) -> None:
+        with self._lock:
+            self._pending.add(item_id)
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> list[ContradictionRecord]:
+        with self._checking:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                pending, self._pending = self._pending, set()
+            found = self.check(pending) if pending else []
+        self.feed.publish(found)
+        return found
+
+    @traced("contradictions.watch")
+    def check(self, item_ids: set[UUID]) -> list[ContradictionRecord]:
+        found: list[ContradictionRecord] = []
+        contents: dict[UUID, str] = {}
+        for item_id in item_ids:
+            record = self.store.get(item_id)
+            if record is None:
+                continue
+            neighbours = heapq.nlargest(
+                self.neighbours,
+                self.store.keyword_scores(
+                    record.content,
+                    lambda other, record=record: (
+                        other.type == record.type and other.id_int != record.id_int
+                    ),
+                ),
+                key=operator.itemgetter(1),
+            )
+            contents[record.id] = record.content
+            contents.update((neighbour.id, neighbour.content) for neighbour, _ in neighbours)
+            found.extend(
+                detect_item_contradictions(
+                    record.to_public(),
+                    (neighbour.to_public() for neighbour, _ in neighbours),
+                )
+            )
+        if self.refine is not None and found:
+            found = self.refine(found, contents)
+        return self.contradictions.add_new(found)
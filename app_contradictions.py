@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Mapping
 from datetime import datetime, timezone
+from typing import Any
 from uuid import UUID, uuid4
 
 from enum import Enum
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from app.models import ItemType, MemoryItem
+from app.tracing import traced
 
 
 class ContradictionType(str, Enum):
@@ -23,6 +26,22 @@ class ContradictionRecord(BaseModel):
     item_ids: list[UUID]
     confidence: float = Field(ge=0.0, le=1.0)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    _json: bytes | None = PrivateAttr(default=None)
+
+    def to_json(self) -> bytes:
+        if self._json is None:
+            self._json = self.model_dump_json().encode()
+        return self._json
+
+    def model_copy(
+        self,
+        *,
+        update: Mapping[str, Any] | None = None,
+        deep: bool = False,
+    ) -> ContradictionRecord:
+        copy = super().model_copy(update=update, deep=deep)
+        copy._json = None
+        return copy
 
 
 class ContradictionResponse(BaseModel):
@@ -34,54 +53,86 @@ class ContradictionResponse(BaseModel):
     created_at: datetime
 
 
-def to_response(record: ContradictionRecord) -> ContradictionResponse:
-    return ContradictionResponse(
-        id=record.id,
-        type=record.type,
-        description=record.description,
-        item_ids=list(record.item_ids),
-        confidence=record.confidence,
-        created_at=record.created_at,
+def _goal_vs_action(item: MemoryItem, content: str) -> ContradictionRecord | None:
+    if item.type != ItemType.goal or ("won't" not in content and "will not" not in content):
+        return None
+    return ContradictionRecord(
+        type=ContradictionType.goal_vs_action,
+        description="Goal conflicts with stated refusal or constraint.",
+        item_ids=[item.id],
+        confidence=0.55,
+    )
+
+
+def _repeated_abandonment(item: MemoryItem, content: str) -> ContradictionRecord | None:
+    if "quit" not in content and "abandon" not in content:
+        return None
+    return ContradictionRecord(
+        type=ContradictionType.repeated_abandonment,
+        description="Item references abandoning goals or plans.",
+        item_ids=[item.id],
+        confidence=0.45,
     )
 
 
+def _content_conflict(
+    item: MemoryItem,
+    content: str,
+    other: MemoryItem,
+    other_content: str,
+) -> ContradictionRecord | None:
+    if "not " not in content or item.type != other.type:
+        return None
+    if content.replace("not ", "") not in other_content:
+        return None
+    return ContradictionRecord(
+        type=ContradictionType.content_conflict,
+        description="Two items of the same type appear to conflict.",
+        item_ids=[item.id, other.id],
+        confidence=0.35,
+    )
+
+
+@traced("detect_contradictions")
 def detect_contradictions(items: list[MemoryItem]) -> list[ContradictionRecord]:
-    contradictions: list[ContradictionRecord] = []
     lowered = [(item, item.content.lower()) for item in items]
+    contradictions = [
+        record
+        for record in (_goal_vs_action(item, content) for item, content in lowered)
+        if record is not None
+    ]
+    contradictions.extend(
+        record
+        for record in (_repeated_abandonment(item, content) for item, content in lowered)
+        if record is not None
+    )
+    contradictions.extend(
+        record
+        for record in (
+            _content_conflict(*lowered[index], *lowered[index + 1])
+            for index in range(len(lowered) - 1)
+        )
+        if record is not None
+    )
+    return contradictions
 
-    for item, content in lowered:
-        if item.type == ItemType.goal and ("won't" in content or "will not" in content):
-            contradictions.append(
-                ContradictionRecord(
-                    type=ContradictionType.goal_vs_action,
-                    description="Goal conflicts with stated refusal or constraint.",
-                    item_ids=[item.id],
-                    confidence=0.55,
-                )
-            )
-
-    for item, content in lowered:
-        if "quit" in content or "abandon" in content:
-            contradictions.append(
-                ContradictionRecord(
-                    type=ContradictionType.repeated_abandonment,
-                    description="Item references abandoning goals or plans.",
-                    item_ids=[item.id],
-                    confidence=0.45,
-                )
-            )
-
-    for index, (item, content) in enumerate(lowered):
-        if "not " in content and index + 1 < len(lowered):
-            next_item, next_content = lowered[index + 1]
-            if item.type == next_item.type and content.replace("not ", "") in next_content:
-                contradictions.append(
-                    ContradictionRecord(
-                        type=ContradictionType.content_conflict,
-                        description="Two items of the same type appear to conflict.",
-                        item_ids=[item.id, next_item.id],
-                        confidence=0.35,
-                    )
-                )
 
+@traced("detect_item_contradictions")
+def detect_item_contradictions(
+    item: MemoryItem,
+    neighbours: Iterable[MemoryItem],
+) -> list[ContradictionRecord]:
+    content = item.content.lower()
+    contradictions = [
+        record
+        for record in (_goal_vs_action(item, content), _repeated_abandonment(item, content))
+        if record is not None
+    ]
+    for other in neighbours:
+        other_content = other.content.lower()
+        conflict = _content_conflict(item, content, other, other_content) or _content_conflict(
+            other, other_content, item, content
+        )
+        if conflict is not None:
+            contradictions.append(conflict)
     return contradictions
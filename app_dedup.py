@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import re
+import zlib
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from app.models import MemoryItem
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+class DuplicateGroup(BaseModel):
+    similarity: float
+    items: list[MemoryItem]
+
+
+def shingles(text: str, size: int = 5) -> set[bytes]:
+    normalized = _NON_WORD.sub(" ", text.lower()).strip().encode()
+    if len(normalized) <= size:
+        return {normalized}
+    return {normalized[start : start + size] for start in range(len(normalized) - size + 1)}
+
+
+class DuplicateIndex:
+    def __init__(
+        self,
+        num_perm: int = 128,
+        bands: int = 32,
+        threshold: float = 0.75,
+        seed: int = 1,
+        chunk_size: int = 64,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self._permutations: tuple[np.ndarray, np.ndarray] | None = None
+        self._signatures: dict[int, np.ndarray] = {}
+        self._members: dict[bytes, set[int]] = {}
+        self._vectors: dict[bytes, np.ndarray] = {}
+        self._buckets: dict[tuple[int, bytes], set[bytes]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, text: str) -> np.ndarray:
+        return self.signatures([text])[0]
+
+    def signatures(self, texts: Sequence[str]) -> list[np.ndarray]:
+        import numpy as np
+
+        multipliers, offsets = self._hash_parameters()
+        unique = list(dict.fromkeys(texts))
+        computed: dict[str, np.ndarray] = {}
+        for start in range(0, len(unique), self.chunk_size):
+            chunk = unique[start : start + self.chunk_size]
+            hashed = [[zlib.crc32(shingle) for shingle in shingles(text)] for text in chunk]
+            bounds = np.cumsum([0, *(len(hashes) for hashes in hashed[:-1])])
+            hashes = np.fromiter(
+                (value for hashes in hashed for value in hashes),
+                dtype=np.uint64,
+            )
+            values = np.multiply.outer(multipliers, hashes)
+            values += offsets[:, None]
+            values >>= np.uint64(32)
+            minimums = np.minimum.reduceat(values, bounds, axis=1).T.astype(np.uint32)
+            computed.update(zip(chunk, minimums, strict=True))
+        return [computed[text] for text in texts]
+
+    def get(self, doc_id: int) -> np.ndarray | None:
+        return self._signatures.get(doc_id)
+
+    def add(self, doc_id: int, signature: np.ndarray) -> None:
+        self.remove(doc_id)
+        self._signatures[doc_id] = signature
+        key = signature.tobytes()
+        members = self._members.get(key)
+        if members is None:
+            members = self._members[key] = set()
+            self._vectors[key] = signature
+            for band_key in self._band_keys(signature):
+                self._buckets.setdefault(band_key, set()).add(key)
+        members.add(doc_id)
+
+    def remove(self, doc_id: int) -> None:
+        signature = self._signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        key = signature.tobytes()
+        members = self._members[key]
+        members.discard(doc_id)
+        if members:
+            return
+        del self._members[key]
+        del self._vectors[key]
+        for band_key in self._band_keys(signature):
+            bucket = self._buckets[band_key]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[band_key]
+
+    def clear(self) -> None:
+        self._signatures.clear()
+        self._members.clear()
+        self._vectors.clear()
+        self._buckets.clear()
+
+    def query(
+        self,
+        signature: np.ndarray,
+        threshold: float | None = None,
+        exclude: int | None = None,
+    ) -> list[tuple[int, float]]:
+        threshold = self.threshold if threshold is None else threshold
+        candidates: set[bytes] = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+        matches = []
+        for key in candidates:
+            similarity = self.similarity(signature, self._vectors[key])
+            if similarity < threshold:
+                continue
+            matches.extend(
+                (doc_id, similarity) for doc_id in self._members[key] if doc_id != exclude
+            )
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def pairs(self, threshold: float | None = None) -> list[tuple[int, int, float]]:
+        threshold = self.threshold if threshold is None else threshold
+        representatives = {key: min(members) for key, members in self._members.items()}
+        pairs: list[tuple[int, int, float]] = [
+            (representatives[key], doc_id, 1.0)
+            for key, members in self._members.items()
+            for doc_id in members
+            if doc_id != representatives[key]
+        ]
+        seen: set[tuple[bytes, bytes]] = set()
+        for bucket in self._buckets.values():
+            if len(bucket) < 2:
+                continue
+            keys = sorted(bucket)
+            for index, first in enumerate(keys):
+                for second in keys[index + 1 :]:
+                    if (first, second) in seen:
+                        continue
+                    seen.add((first, second))
+                    similarity = self.similarity(self._vectors[first], self._vectors[second])
+                    if similarity >= threshold:
+                        pairs.append(
+                            (representatives[first], representatives[second], similarity)
+                        )
+        return pairs
+
+    def similarity(self, first: np.ndarray, second: np.ndarray) -> float:
+        return float((first == second).sum()) / self.num_perm
+
+    def _band_keys(self, signature: np.ndarray) -> list[tuple[int, bytes]]:
+        rows = self.rows
+        return [
+            (band, signature[band * rows : (band + 1) * rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _hash_parameters(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._permutations is None:
+            import numpy as np
+
+            rng = np.random.default_rng(self.seed)
+            self._permutations = (
+                rng.integers(1, 2**64, size=self.num_perm, dtype=np.uint64) | np.uint64(1),
+                rng.integers(0, 2**64, size=self.num_perm, dtype=np.uint64),
+            )
+        return self._permutations
+
+
+def cluster_pairs(pairs: list[tuple[int, int, float]]) -> list[tuple[float, list[int]]]:
+    parent: dict[int, int] = {}
+
+    def find(node: int) -> int:
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for first, second, _ in pairs:
+        parent[find(first)] = find(second)
+    members: dict[int, list[int]] = {}
+    for node in parent:
+        members.setdefault(find(node), []).append(node)
+    best: dict[int, float] = {}
+    for first, _, similarity in pairs:
+        root = find(first)
+        best[root] = max(best.get(root, 0.0), similarity)
+    return [(best[root], nodes) for root, nodes in members.items()]
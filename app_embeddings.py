@@ -1,11 +1,22 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import contextlib
+import contextvars
+import functools
 import os
-from typing import Protocol
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Protocol, TypeVar
 
-import httpx
-from sklearn.feature_extraction.text import TfidfVectorizer
+from app.tracing import span, traced
+
+if TYPE_CHECKING:
+    import httpx
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+T = TypeVar("T")
 
 
 class EmbeddingProviderError(RuntimeError):
@@ -15,20 +26,71 @@ class EmbeddingProviderError(RuntimeError):
 class EmbeddingProvider(Protocol):
     name: str
 
+    def space(self, corpus_version: int) -> str:
+        raise NotImplementedError
+
     def embed_text(self, text: str, corpus: list[str]) -> list[float]:
         raise NotImplementedError
 
+    def embed_texts(self, texts: list[str], corpus: list[str]) -> list[list[float]]:
+        raise NotImplementedError
+
+    def warm_up(self) -> None:
+        raise NotImplementedError
+
+
+class AsyncEmbeddingProvider(Protocol):
+    name: str
+
+    def space(self, corpus_version: int) -> str:
+        raise NotImplementedError
+
+    async def embed_text(self, text: str, corpus: list[str]) -> list[float]:
+        raise NotImplementedError
+
+    async def embed_texts(self, texts: list[str], corpus: list[str]) -> list[list[float]]:
+        raise NotImplementedError
+
+    async def warm_up(self) -> None:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        raise NotImplementedError
+
+
+def _tfidf_vectorizer() -> TfidfVectorizer:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    return TfidfVectorizer(stop_words="english")
+
 
 class TfidfEmbeddingProvider:
     name = "tfidf"
 
+    def space(self, corpus_version: int) -> str:
+        return f"{self.name}@{corpus_version}"
+
+    @traced("embedding.tfidf.embed_text")
     def embed_text(self, text: str, corpus: list[str]) -> list[float]:
         base_corpus = corpus or [text]
-        vectorizer = TfidfVectorizer(stop_words="english")
+        vectorizer = _tfidf_vectorizer()
         vectorizer.fit(base_corpus)
         vector = vectorizer.transform([text])
         return vector.toarray()[0].tolist()
 
+    @traced("embedding.tfidf.embed_texts")
+    def embed_texts(self, texts: list[str], corpus: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        base_corpus = corpus or texts
+        vectorizer = _tfidf_vectorizer()
+        vectorizer.fit(base_corpus)
+        matrix = vectorizer.transform(texts)
+        return [matrix.getrow(index).toarray()[0].tolist() for index in range(len(texts))]
+
+    def warm_up(self) -> None:
+        self.embed_text("warm up the vectorizer", ["warm up the vectorizer"])
+
 
 @dataclass
 class OpenAIEmbeddingProvider:
@@ -36,31 +98,184 @@ class OpenAIEmbeddingProvider:
     model: str = "text-embedding-3-small"
     base_url: str = "https://api.openai.com/v1"
     name: str = "openai"
+    batch_size: int = 2048
+
+    def space(self, corpus_version: int) -> str:
+        return f"{self.name}:{self.model}"
 
     def embed_text(self, text: str, corpus: list[str]) -> list[float]:
+        return self._request(text)[0]
+
+    def embed_texts(self, texts: list[str], corpus: list[str]) -> list[list[float]]:
+        embeddings: list[list[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            embeddings.extend(self._request(texts[start : start + self.batch_size]))
+        return embeddings
+
+    def warm_up(self) -> None:
+        import httpx  # noqa: F401
+
+    @traced("embedding.openai.request")
+    def _request(self, payload_input: str | list[str]) -> list[list[float]]:
+        import httpx
+
         try:
             response = httpx.post(
                 f"{self.base_url}/embeddings",
                 headers={"Authorization": f"Bearer {self.api_key}"},
-                json={"model": self.model, "input": text},
+                json={"model": self.model, "input": payload_input},
                 timeout=30.0,
             )
             response.raise_for_status()
         except httpx.HTTPError as exc:
             raise EmbeddingProviderError("OpenAI embedding request failed.") from exc
         payload = response.json()
-        return payload["data"][0]["embedding"]
+        data = sorted(payload["data"], key=lambda entry: entry.get("index", 0))
+        return [entry["embedding"] for entry in data]
+
+
+class AsyncTfidfEmbeddingProvider:
+    name = "tfidf"
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        self._provider = TfidfEmbeddingProvider()
+        self._max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+
+    def space(self, corpus_version: int) -> str:
+        return self._provider.space(corpus_version)
+
+    async def embed_text(self, text: str, corpus: list[str]) -> list[float]:
+        return await self._run(self._provider.embed_text, text, corpus)
+
+    async def embed_texts(self, texts: list[str], corpus: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        return await self._run(self._provider.embed_texts, texts, corpus)
+
+    async def warm_up(self) -> None:
+        await self._run(self._provider.warm_up)
+
+    async def aclose(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    async def _run(self, func: Callable[..., T], *args: object) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix="tfidf",
+            )
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(context.run, func, *args)
+        )
+
+
+@dataclass
+class AsyncOpenAIEmbeddingProvider:
+    api_key: str
+    model: str = "text-embedding-3-small"
+    base_url: str = "https://api.openai.com/v1"
+    name: str = "openai"
+    batch_size: int = 2048
+    max_connections: int = 100
+    _client: httpx.AsyncClient | None = field(default=None, init=False, repr=False)
+    _loop: asyncio.AbstractEventLoop | None = field(default=None, init=False, repr=False)
+
+    def space(self, corpus_version: int) -> str:
+        return f"{self.name}:{self.model}"
+
+    async def embed_text(self, text: str, corpus: list[str]) -> list[float]:
+        return (await self._request(text))[0]
+
+    async def embed_texts(self, texts: list[str], corpus: list[str]) -> list[list[float]]:
+        batches = await asyncio.gather(
+            *(
+                self._request(texts[start : start + self.batch_size])
+                for start in range(0, len(texts), self.batch_size)
+            )
+        )
+        return [embedding for batch in batches for embedding in batch]
+
+    async def warm_up(self) -> None:
+        await self._shared_client()
+
+    async def aclose(self) -> None:
+        client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            await client.aclose()
+
+    async def _shared_client(self) -> httpx.AsyncClient:
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            stale = self._client
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=30.0,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._loop = loop
+            if stale is not None:
+                with contextlib.suppress(RuntimeError):
+                    await stale.aclose()
+        return self._client
+
+    async def _request(self, payload_input: str | list[str]) -> list[list[float]]:
+        import httpx
+
+        client = await self._shared_client()
+        with span("embedding.openai.request"):
+            try:
+                response = await client.post(
+                    "/embeddings",
+                    json={"model": self.model, "input": payload_input},
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as exc:
+                raise EmbeddingProviderError("OpenAI embedding request failed.") from exc
+        payload = response.json()
+        data = sorted(payload["data"], key=lambda entry: entry.get("index", 0))
+        return [entry["embedding"] for entry in data]
+
+
+def _provider_name() -> str:
+    return os.getenv("EMBEDDING_PROVIDER", "tfidf").lower()
+
+
+def _openai_settings() -> dict[str, str]:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise EmbeddingProviderError("OPENAI_API_KEY is required when EMBEDDING_PROVIDER=openai")
+    return {
+        "api_key": api_key,
+        "model": os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small"),
+        "base_url": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+    }
 
 
 def get_embedding_provider() -> EmbeddingProvider:
-    provider = os.getenv("EMBEDDING_PROVIDER", "tfidf").lower()
+    provider = _provider_name()
     if provider == "openai":
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise EmbeddingProviderError(
-                "OPENAI_API_KEY is required when EMBEDDING_PROVIDER=openai"
-            )
-        return OpenAIEmbeddingProvider(api_key=api_key)
+        return OpenAIEmbeddingProvider(**_openai_settings())
     if provider == "tfidf":
         return TfidfEmbeddingProvider()
     raise EmbeddingProviderError(f"Unknown embedding provider: {provider}")
+
+
+def get_async_embedding_provider() -> AsyncEmbeddingProvider:
+    provider = _provider_name()
+    if provider == "openai":
+        return AsyncOpenAIEmbeddingProvider(**_openai_settings())
+    if provider == "tfidf":
+        workers = os.getenv("EMBEDDING_EXECUTOR_WORKERS")
+        return AsyncTfidfEmbeddingProvider(max_workers=int(workers) if workers else None)
+    raise EmbeddingProviderError(f"Unknown embedding provider: {provider}")
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import struct
+from collections.abc import Iterable, Iterator
+
+from app.models import MemoryItemRecord
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SIDECAR_MEDIA_TYPE = "application/octet-stream"
+SIDECAR_MAGIC = b"SBE1"
+
+_SIDECAR_RECORD = struct.Struct("<16sI")
+
+
+def iter_ndjson(
+    records: Iterable[MemoryItemRecord],
+    chunk_size: int = 256,
+) -> Iterator[bytes]:
+    chunk: list[bytes] = []
+    for record in records:
+        chunk.append(record.to_json())
+        if len(chunk) >= chunk_size:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+
+def iter_embedding_sidecar(
+    records: Iterable[MemoryItemRecord],
+    chunk_size: int = 256,
+) -> Iterator[bytes]:
+    chunk: list[bytes] = [SIDECAR_MAGIC]
+    for record in records:
+        if record.embedding is None:
+            continue
+        vector = record.embedding
+        chunk.append(_SIDECAR_RECORD.pack(record.id.bytes, len(vector)) + vector.tobytes())
+        if len(chunk) >= chunk_size:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
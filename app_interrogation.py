@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
 from datetime import datetime, timedelta, timezone
 from enum import Enum
+from typing import Any
 from uuid import UUID, uuid4
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from app.models import ItemType, MemoryItem
+from app.tracing import traced
+
+CARRY_OVER_LIMIT = 5
 
 
 class InterrogationFrequency(str, Enum):
@@ -31,6 +36,22 @@ class InterrogationPrompt(BaseModel):
     context_items: list[InterrogationContextItem]
     scheduled_for: datetime
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    _json: bytes | None = PrivateAttr(default=None)
+
+    def to_json(self) -> bytes:
+        if self._json is None:
+            self._json = self.model_dump_json().encode()
+        return self._json
+
+    def model_copy(
+        self,
+        *,
+        update: Mapping[str, Any] | None = None,
+        deep: bool = False,
+    ) -> InterrogationPrompt:
+        copy = super().model_copy(update=update, deep=deep)
+        copy._json = None
+        return copy
 
 
 class InterrogationResponse(BaseModel):
@@ -108,15 +129,20 @@ def _forced_choice(top_items: list[MemoryItem]) -> str:
     return "Which matters more right now: shipping something imperfect or waiting for clarity?"
 
 
+def interrogation_window(frequency: InterrogationFrequency) -> timedelta:
+    if frequency == InterrogationFrequency.weekly:
+        return timedelta(days=7)
+    return timedelta(days=1)
+
+
 def _next_scheduled_at(
     frequency: InterrogationFrequency,
     now: datetime,
 ) -> datetime:
-    if frequency == InterrogationFrequency.weekly:
-        return now + timedelta(days=7)
-    return now + timedelta(days=1)
+    return now + interrogation_window(frequency)
 
 
+@traced("generate_interrogation")
 def generate_interrogation(
     items: list[MemoryItem],
     frequency: InterrogationFrequency,
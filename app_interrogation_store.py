@@ -53,6 +53,17 @@ class InterrogationStore:
             if submission.interrogation_id == interrogation_id
         ]
 
+    def list_all_submissions(self) -> list[InterrogationSubmission]:
+        return list(self._submissions)
+
+    def restore(
+        self,
+        sessions: Iterable[InterrogationPrompt],
+        submissions: Iterable[InterrogationSubmission],
+    ) -> None:
+        self._sessions.extend(sessions)
+        self._submissions.extend(submissions)
+
     def clear(self) -> None:
         self._sessions.clear()
         self._submissions.clear()
@@ -1,26 +1,93 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import asyncio
+import math
+import os
+from collections.abc import AsyncIterator, Iterator, Mapping
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timezone
+from functools import cache
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import FastAPI, HTTPException
+from fastapi import (
+    BackgroundTasks,
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-from app.analytics import AnalyticsSummary, AnalyticsStore
-from app.contradiction_store import ContradictionStore
-from app.contradictions import ContradictionResponse, detect_contradictions, to_response
-from app.embeddings import EmbeddingProviderError, get_embedding_provider
+from app.analytics import (
+    AnalyticsStore,
+    AnalyticsSummary,
+    AnalyticsTimeseries,
+    LatencyTimer,
+    RequestTimingMiddleware,
+    TimeseriesQueryError,
+)
+from app.bulk import (
+    BulkItemError,
+    BulkItemResponse,
+    BulkPayloadError,
+    parse_bulk_payload,
+    validate_rows,
+)
+from app.classifier import ContradictionClassifier, get_contradiction_classifier
+from app.contradiction_watch import ContradictionFeed
+from app.contradictions import ContradictionRecord, ContradictionResponse, detect_contradictions
+from app.dedup import DuplicateGroup, cluster_pairs
+from app.embeddings import (
+    AsyncEmbeddingProvider,
+    EmbeddingProviderError,
+    get_async_embedding_provider,
+)
+from app.export import (
+    NDJSON_MEDIA_TYPE,
+    SIDECAR_MEDIA_TYPE,
+    iter_embedding_sidecar,
+    iter_ndjson,
+)
 from app.flow import FlowResponse
 from app.interrogation import (
+    CARRY_OVER_LIMIT,
     InterrogationFrequency,
     InterrogationResponse,
     InterrogationSubmission,
     InterrogationSubmissionCreate,
     generate_interrogation,
+    interrogation_window,
 )
-from app.interrogation_store import InterrogationStore
-from app.models import EmbeddingStatus, ItemType, MemoryItem, MemoryItemCreate
-from app.storage import MemoryStore
+from app.models import (
+    EmbeddingStatus,
+    ItemType,
+    MemoryItem,
+    MemoryItemCreate,
+    MemoryItemRecord,
+)
+from app.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.retrieval import SearchFilters, SearchHit, SearchResult
+from app.serialization import JSONBytesResponse, json_array, json_datetime, json_object
+from app.storage import MemoryStore, item_key
+from app.tags import TagFacet, TagQuery, TagQueryError, parse_tag_query
+from app.tenancy import (
+    DEFAULT_TENANT,
+    TENANT_HEADER,
+    EmbeddingRateLimitError,
+    InvalidTenantError,
+    QuotaExceededError,
+    TenantQuota,
+    TenantRegistry,
+    TenantState,
+    TenantUsage,
+)
+from app.tracing import TraceRecord, TraceStore, TracingMiddleware
 
 
 class HealthResponse(BaseModel):
@@ -34,16 +101,111 @@ class RootResponse(BaseModel):
     mvp_features: list[str]
 
 
+@cache
+def get_provider() -> AsyncEmbeddingProvider:
+    return get_async_embedding_provider()
+
+
+@cache
+def get_classifier() -> ContradictionClassifier | None:
+    return get_contradiction_classifier()
+
+
+def _refine_contradictions(
+    contradictions: list[ContradictionRecord],
+    contents: Mapping[UUID, str],
+) -> list[ContradictionRecord]:
+    classifier = get_classifier()
+    if classifier is None or not contradictions:
+        return contradictions
+    return classifier.refine(contradictions, contents)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    get_classifier()
+    if os.getenv("EMBEDDING_WARMUP", "").lower() in {"1", "true", "yes"}:
+        await get_provider().warm_up()
+    yield
+    await run_in_threadpool(tenants.flush)
+    if get_provider.cache_info().currsize:
+        await get_provider().aclose()
+    if get_classifier.cache_info().currsize:
+        classifier = get_classifier()
+        if classifier is not None:
+            classifier.close()
+
+
 app = FastAPI(
     title="Second Brain That Fights You",
     version="0.1.0",
     description="An AI productivity system that challenges, contradicts, and interrogates you.",
+    lifespan=lifespan,
 )
-store = MemoryStore()
-contradiction_store = ContradictionStore()
-interrogation_store = InterrogationStore()
+default_tenant = TenantState(DEFAULT_TENANT, TenantQuota.from_env(), _refine_contradictions)
+tenants = TenantRegistry.from_env(default_tenant)
+store = default_tenant.store
+contradiction_store = default_tenant.contradictions
+contradiction_watcher = default_tenant.watcher
+interrogation_store = default_tenant.interrogations
 analytics_store = AnalyticsStore()
-embedding_provider = get_embedding_provider()
+trace_store = TraceStore()
+app.add_middleware(RequestTimingMiddleware, analytics=analytics_store)
+app.add_middleware(TracingMiddleware, traces=trace_store)
+
+EMBEDDING_METRIC = "embedding_duration_seconds"
+CONTRADICTION_METRIC = "contradiction_run_duration_seconds"
+FLOW_STAGE_METRIC = "flow_stage_duration_seconds"
+DUPLICATE_HEADER = "X-Duplicate-Of"
+VECTOR_TRUNCATED_HEADER = "X-Vector-Candidates-Truncated"
+FEED_KEEPALIVE_SECONDS = 15.0
+REFRESH_SNAPSHOT_ATTEMPTS = 3
+
+
+def _embedding_timer(provider: AsyncEmbeddingProvider) -> LatencyTimer:
+    return analytics_store.timer(EMBEDDING_METRIC, (("provider", provider.name),))
+
+
+def _flow_stage_timer(stage: str) -> LatencyTimer:
+    return analytics_store.timer(FLOW_STAGE_METRIC, (("stage", stage),))
+
+
+def _classify(
+    contradictions: list[ContradictionRecord],
+    items: list[MemoryItem],
+) -> list[ContradictionRecord]:
+    return _refine_contradictions(contradictions, {item.id: item.content for item in items})
+
+
+def get_tenant(
+    tenant_id: str | None = Header(default=None, alias=TENANT_HEADER),
+) -> Iterator[TenantState]:
+    try:
+        resolved = tenants.resolve(tenant_id)
+    except InvalidTenantError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    with tenants.use(resolved) as tenant:
+        yield tenant
+
+
+Tenant = Annotated[TenantState, Depends(get_tenant)]
+
+
+def _rate_limited(exc: EmbeddingRateLimitError) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(exc),
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+def _tag_query(tags: str | None) -> TagQuery | None:
+    if tags is None:
+        return None
+    try:
+        return parse_tag_query(tags)
+    except TagQueryError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -66,40 +228,263 @@ def root() -> RootResponse:
 
 
 @app.post("/items", response_model=MemoryItem, status_code=201)
-def create_item(item: MemoryItemCreate) -> MemoryItem:
-    record = store.add(item)
+def create_item(
+    item: MemoryItemCreate,
+    response: Response,
+    tenant: Tenant,
+    merge_duplicates: bool = False,
+) -> MemoryItem:
+    store = tenant.store
+    try:
+        with tenant.admit_items():
+            if merge_duplicates:
+                [(record, merged)] = store.add_or_merge_many([item])
+            else:
+                record, merged = store.add(item), False
+    except QuotaExceededError as exc:
+        raise HTTPException(status_code=403, detail=str(exc)) from exc
+    tenant.watcher.schedule(record.id)
+    if merged:
+        response.status_code = 200
+        response.headers[DUPLICATE_HEADER] = str(record.id)
+        return record.to_public()
+    if not merge_duplicates:
+        duplicates = store.duplicates_of(record.id)
+        if duplicates:
+            response.headers[DUPLICATE_HEADER] = str(duplicates[0][0].id)
     analytics_store.record_item_created()
     return record.to_public()
 
 
+@app.post("/items/bulk", response_model=BulkItemResponse)
+async def create_items_bulk(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    tenant: Tenant,
+    embed: bool = False,
+    merge_duplicates: bool = False,
+) -> BulkItemResponse:
+    body = await request.body()
+    try:
+        rows, parse_errors = parse_bulk_payload(body, request.headers.get("content-type"))
+        item_ids, merged, errors = await run_in_threadpool(
+            _ingest_rows, tenant, rows, merge_duplicates
+        )
+    except BulkPayloadError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except QuotaExceededError as exc:
+        raise HTTPException(status_code=403, detail=str(exc)) from exc
+    errors = sorted(parse_errors + errors, key=lambda error: error.index)
+    embedding_queued = embed and bool(item_ids)
+    if embedding_queued:
+        try:
+            tenant.acquire_embeddings(len(item_ids))
+        except (EmbeddingRateLimitError, QuotaExceededError):
+            embedding_queued = False
+    if embedding_queued:
+        tenants.retain(tenant)
+        background_tasks.add_task(_embed_items, tenant, item_ids)
+    return BulkItemResponse(
+        created=len(item_ids),
+        merged=merged,
+        item_ids=item_ids,
+        errors=errors,
+        embedding_queued=embedding_queued,
+    )
+
+
+def _ingest_rows(
+    tenant: TenantState,
+    rows: list[tuple[int, object]],
+    merge_duplicates: bool = False,
+) -> tuple[list[UUID], int, list[BulkItemError]]:
+    valid, errors = validate_rows(rows)
+    items = (item for _, item in valid)
+    with tenant.admit_items(len(valid)):
+        if merge_duplicates:
+            results = tenant.store.add_or_merge_many(items)
+            records = [record for record, merged in results if not merged]
+        else:
+            records = tenant.store.add_many(items)
+    merged = len(valid) - len(records)
+    if records:
+        analytics_store.record_item_created(len(records))
+    return [record.id for record in records], merged, errors
+
+
+async def _embed_items(tenant: TenantState, item_ids: list[UUID]) -> None:
+    try:
+        await _embed_tenant_items(tenant, item_ids)
+    finally:
+        tenants.release(tenant)
+
+
+async def _embed_tenant_items(tenant: TenantState, item_ids: list[UUID]) -> None:
+    store = tenant.store
+    records = [record for record in map(store.get, item_ids) if record is not None]
+    if not records:
+        return
+    versions = {record.id: record.version for record in records}
+    corpus_version, corpus = await run_in_threadpool(store.corpus)
+    try:
+        provider = get_provider()
+        with _embedding_timer(provider):
+            embeddings = await provider.embed_texts(
+                [record.content for record in records],
+                corpus,
+            )
+    except EmbeddingProviderError:
+        analytics_store.record_embedding_failure()
+        for record in records:
+            store.update_embedding_status(record.id, EmbeddingStatus.failed)
+        return
+    updated = await run_in_threadpool(
+        store.update_embeddings,
+        zip(versions, embeddings, strict=True),
+        versions=versions,
+        space=provider.space(corpus_version),
+    )
+    analytics_store.record_embedding_created(len(updated))
+
+
 @app.get("/items", response_model=list[MemoryItem])
 def list_items(
+    tenant: Tenant,
     item_type: ItemType | None = None,
     query: str | None = None,
-) -> list[MemoryItem]:
-    items = store.list(item_type=item_type, query=query)
-    return [item.to_public() for item in items]
+    limit: int | None = Query(default=None, ge=1, le=1000),
+    cursor: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    tags: str | None = Query(default=None, max_length=1000),
+) -> Response:
+    store = tenant.store
+    tag_query = _tag_query(tags)
+    if limit is None and cursor is None:
+        items = store.list(
+            item_type=item_type,
+            query=query,
+            since=since,
+            until=until,
+            tags=tag_query,
+        )
+        return JSONBytesResponse(json_array(item.to_json() for item in items))
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    page_size = limit or 100
+    page = store.page(
+        item_type=item_type,
+        query=query,
+        after=after,
+        limit=page_size + 1,
+        since=since,
+        until=until,
+        tags=tag_query,
+    )
+    response = JSONBytesResponse(json_array(item.to_json() for item in page[:page_size]))
+    if len(page) > page_size:
+        response.headers["X-Next-Cursor"] = encode_cursor(item_key(page[page_size - 1]))
+    return response
+
+
+@app.get("/items/export")
+def export_items(
+    tenant: Tenant,
+    item_type: ItemType | None = None,
+    query: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    tags: str | None = Query(default=None, max_length=1000),
+) -> StreamingResponse:
+    records = tenant.store.iter(
+        item_type=item_type,
+        query=query,
+        since=since,
+        until=until,
+        tags=_tag_query(tags),
+    )
+    return StreamingResponse(iter_ndjson(records), media_type=NDJSON_MEDIA_TYPE)
+
+
+@app.get("/items/export/embeddings")
+def export_item_embeddings(
+    tenant: Tenant,
+    item_type: ItemType | None = None,
+    query: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    tags: str | None = Query(default=None, max_length=1000),
+) -> StreamingResponse:
+    records = tenant.store.iter(
+        item_type=item_type,
+        query=query,
+        since=since,
+        until=until,
+        tags=_tag_query(tags),
+    )
+    return StreamingResponse(iter_embedding_sidecar(records), media_type=SIDECAR_MEDIA_TYPE)
+
+
+@app.get("/items/duplicates", response_model=list[DuplicateGroup])
+def list_duplicates(
+    tenant: Tenant,
+    threshold: float = Query(default=0.75, ge=0.5, le=1.0),
+) -> list[DuplicateGroup]:
+    store = tenant.store
+    groups = [
+        DuplicateGroup(
+            similarity=similarity,
+            items=[record.to_public() for record in sorted(store.get_many(ids), key=item_key)],
+        )
+        for similarity, ids in cluster_pairs(store.duplicate_pairs(threshold))
+    ]
+    return sorted(groups, key=lambda group: (len(group.items), group.similarity), reverse=True)
+
+
+@app.get("/tags", response_model=list[TagFacet])
+def list_tags(
+    tenant: Tenant,
+    item_type: ItemType | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    tags: str | None = Query(default=None, max_length=1000),
+    limit: int = Query(default=100, ge=1, le=1000),
+) -> list[TagFacet]:
+    counts = tenant.store.tag_counts(
+        item_type=item_type,
+        since=since,
+        until=until,
+        tags=_tag_query(tags),
+    )
+    return [TagFacet(tag=tag, count=count) for tag, count in counts[:limit]]
 
 
 @app.get("/items/{item_id}", response_model=MemoryItem)
-def get_item(item_id: UUID) -> MemoryItem:
-    record = store.get(item_id)
+def get_item(item_id: UUID, tenant: Tenant) -> MemoryItem:
+    record = tenant.store.get(item_id)
     if record is None:
         raise HTTPException(status_code=404, detail="Item not found")
     return record.to_public()
 
 
 @app.put("/items/{item_id}", response_model=MemoryItem)
-def update_item(item_id: UUID, item: MemoryItemCreate) -> MemoryItem:
-    record = store.update(item_id, item)
+def update_item(
+    item_id: UUID,
+    item: MemoryItemCreate,
+    tenant: Tenant,
+) -> MemoryItem:
+    record = tenant.store.update(item_id, item)
     if record is None:
         raise HTTPException(status_code=404, detail="Item not found")
+    tenant.watcher.schedule(item_id)
     return record.to_public()
 
 
 @app.delete("/items/{item_id}", status_code=204)
-def delete_item(item_id: UUID) -> None:
-    deleted = store.delete(item_id)
+def delete_item(item_id: UUID, tenant: Tenant) -> None:
+    deleted = tenant.store.delete(item_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Item not found")
     analytics_store.record_item_deleted()
@@ -108,93 +493,276 @@ def delete_item(item_id: UUID) -> None:
 @app.post("/items/{item_id}/embedding", response_model=MemoryItem)
 def update_embedding_status(
     item_id: UUID,
+    tenant: Tenant,
     status: EmbeddingStatus = EmbeddingStatus.completed,
 ) -> MemoryItem:
-    record = store.update_embedding_status(item_id, status)
+    record = tenant.store.update_embedding_status(item_id, status)
     if record is None:
         raise HTTPException(status_code=404, detail="Item not found")
     return record.to_public()
 
 
 @app.post("/items/{item_id}/embed", response_model=MemoryItem)
-def embed_item(item_id: UUID) -> MemoryItem:
-    record = store.get(item_id)
+async def embed_item(item_id: UUID, tenant: Tenant) -> MemoryItem:
+    record = tenant.store.get(item_id)
     if record is None:
         raise HTTPException(status_code=404, detail="Item not found")
+    content, version = record.content, record.version
     try:
-        embedding = embedding_provider.embed_text(
-            record.content,
-            [item.content for item in store.list()],
+        embedded = await tenant.embed_flights.run(
+            item_id,
+            version,
+            lambda: _embed_record(tenant, item_id, content, version),
         )
+    except EmbeddingRateLimitError as exc:
+        raise _rate_limited(exc) from exc
     except EmbeddingProviderError as exc:
-        analytics_store.record_embedding_failure()
         raise HTTPException(status_code=503, detail=str(exc)) from exc
-    record = store.update_embedding(item_id, embedding)
-    if record is None:
-        raise HTTPException(status_code=404, detail="Item not found")
-    analytics_store.record_embedding_created()
-    return record.to_public()
+    if embedded is None:
+        if tenant.store.get(item_id) is None:
+            raise HTTPException(status_code=404, detail="Item not found")
+        raise HTTPException(status_code=409, detail="Item changed while it was being embedded")
+    return embedded.to_public()
+
+
+async def _embed_record(
+    tenant: TenantState,
+    item_id: UUID,
+    content: str,
+    version: int,
+) -> MemoryItemRecord | None:
+    store = tenant.store
+    tenant.acquire_embeddings()
+    corpus_version, corpus = await run_in_threadpool(store.corpus)
+    try:
+        provider = get_provider()
+        with _embedding_timer(provider):
+            embedding = await provider.embed_text(content, corpus)
+    except EmbeddingProviderError:
+        analytics_store.record_embedding_failure()
+        raise
+    record = await run_in_threadpool(
+        store.update_embedding,
+        item_id,
+        embedding,
+        version=version,
+        space=provider.space(corpus_version),
+    )
+    if record is not None:
+        analytics_store.record_embedding_created()
+    return record
 
 
 @app.post("/items/embeddings/refresh", response_model=list[MemoryItem])
-def refresh_embeddings() -> list[MemoryItem]:
-    items = list(store.list())
-    if not items:
+async def refresh_embeddings(tenant: Tenant) -> list[MemoryItem]:
+    try:
+        records = await tenant.refresh_flights.run(
+            "corpus",
+            tenant.store.corpus_version,
+            lambda: _refresh_corpus(tenant),
+        )
+    except EmbeddingRateLimitError as exc:
+        raise _rate_limited(exc) from exc
+    except QuotaExceededError as exc:
+        raise HTTPException(status_code=403, detail=str(exc)) from exc
+    except EmbeddingProviderError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return [record.to_public() for record in records]
+
+
+async def _refresh_corpus(tenant: TenantState) -> list[MemoryItemRecord]:
+    store = tenant.store
+    for _ in range(REFRESH_SNAPSHOT_ATTEMPTS):
+        corpus_version, versions, corpus = await run_in_threadpool(_refresh_snapshot, store)
+        if store.corpus_version == corpus_version:
+            break
+    if not corpus:
         return []
-    corpus = [item.content for item in items]
-    updated_items: list[MemoryItem] = []
-    for item in items:
-        try:
-            embedding = embedding_provider.embed_text(item.content, corpus)
-        except EmbeddingProviderError as exc:
-            analytics_store.record_embedding_failure()
-            raise HTTPException(status_code=503, detail=str(exc)) from exc
-        record = store.update_embedding(item.id, embedding)
-        if record is None:
-            raise HTTPException(status_code=404, detail="Item not found")
-        analytics_store.record_embedding_created()
-        updated_items.append(record.to_public())
-    return updated_items
+    tenant.acquire_embeddings(len(corpus))
+    try:
+        provider = get_provider()
+        with _embedding_timer(provider):
+            embeddings = await provider.embed_texts(corpus, corpus)
+    except EmbeddingProviderError:
+        analytics_store.record_embedding_failure()
+        raise
+    updated = await run_in_threadpool(
+        store.update_embeddings,
+        zip(versions, embeddings, strict=True),
+        versions=versions,
+        space=provider.space(corpus_version),
+    )
+    analytics_store.record_embedding_created(len(updated))
+    return updated
+
+
+def _refresh_snapshot(store: MemoryStore) -> tuple[int, dict[UUID, int], list[str]]:
+    corpus_version = store.corpus_version
+    items = store.list()
+    return (
+        corpus_version,
+        {item.id: item.version for item in items},
+        [item.content for item in items],
+    )
 
 
 @app.get("/contradictions", response_model=list[ContradictionResponse])
-def list_contradictions() -> list[ContradictionResponse]:
-    items = [item.to_public() for item in store.list()]
-    contradictions = detect_contradictions(items)
-    return [to_response(record) for record in contradictions]
+def list_contradictions(tenant: Tenant) -> Response:
+    items = [item.to_public() for item in tenant.store.list()]
+    with analytics_store.timer(CONTRADICTION_METRIC):
+        contradictions = _classify(detect_contradictions(items), items)
+    return JSONBytesResponse(json_array(record.to_json() for record in contradictions))
 
 
 @app.post("/contradictions/run", response_model=list[ContradictionResponse])
-def run_contradiction_detection() -> list[ContradictionResponse]:
-    items = [item.to_public() for item in store.list()]
-    contradictions = detect_contradictions(items)
-    saved = contradiction_store.add_many(contradictions)
+def run_contradiction_detection(tenant: Tenant) -> Response:
+    items = [item.to_public() for item in tenant.store.list()]
+    with analytics_store.timer(CONTRADICTION_METRIC):
+        contradictions = _classify(detect_contradictions(items), items)
+    saved = tenant.contradictions.add_many(contradictions)
     analytics_store.record_contradiction_run(len(saved))
-    return [to_response(record) for record in saved]
+    return JSONBytesResponse(json_array(record.to_json() for record in saved))
 
 
 @app.get("/contradictions/history", response_model=list[ContradictionResponse])
-def list_contradiction_history() -> list[ContradictionResponse]:
-    return [to_response(record) for record in contradiction_store.list()]
+def list_contradiction_history(tenant: Tenant) -> Response:
+    records = tenant.contradictions.list()
+    return JSONBytesResponse(json_array(record.to_json() for record in records))
+
+
+@app.get("/contradictions/feed", response_class=StreamingResponse)
+async def contradiction_feed(tenant: Tenant) -> StreamingResponse:
+    return StreamingResponse(
+        _contradiction_events(tenant.watcher.feed),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _contradiction_events(
+    feed: ContradictionFeed,
+    keepalive: float = FEED_KEEPALIVE_SECONDS,
+) -> AsyncIterator[bytes]:
+    with feed.subscribe() as queue:
+        yield b": connected\n\n"
+        while True:
+            try:
+                record = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            yield b"event: contradiction\ndata: " + record.to_json() + b"\n\n"
+
+
+@app.get("/search", response_model=list[SearchResult])
+async def search_items(
+    tenant: Tenant,
+    response: Response,
+    q: str = Query(min_length=1),
+    k: int = Query(default=10, ge=1, le=100),
+    item_type: ItemType | None = None,
+    tags: tuple[str, ...] = Query(default=()),
+    min_importance: int | None = Query(default=None, ge=1, le=5),
+    max_importance: int | None = Query(default=None, ge=1, le=5),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    vector: bool = True,
+) -> list[SearchResult]:
+    filters = SearchFilters(
+        item_type=item_type,
+        tags=tags,
+        min_importance=min_importance,
+        max_importance=max_importance,
+        since=since,
+        until=until,
+    )
+    hits, truncated = await _hybrid_search(tenant, q, filters, k, use_vectors=vector)
+    if truncated:
+        response.headers[VECTOR_TRUNCATED_HEADER] = "true"
+    return [hit.to_result() for hit in hits]
+
+
+async def _hybrid_search(
+    tenant: TenantState,
+    query: str,
+    filters: SearchFilters,
+    k: int,
+    use_vectors: bool = True,
+) -> tuple[list[SearchHit], bool]:
+    candidates: list[MemoryItemRecord] = []
+    truncated = False
+    if use_vectors:
+        try:
+            provider = get_provider()
+        except EmbeddingProviderError:
+            analytics_store.record_embedding_failure()
+            use_vectors = False
+    if use_vectors:
+        corpus_version, corpus = await run_in_threadpool(tenant.store.corpus)
+        candidates, truncated = await run_in_threadpool(
+            tenant.retriever.vector_candidates,
+            filters,
+            provider.space(corpus_version),
+        )
+    query_vector = None
+    if candidates:
+        try:
+            tenant.acquire_embeddings()
+            query_vector = await provider.embed_text(query, corpus)
+        except EmbeddingRateLimitError:
+            pass
+        except EmbeddingProviderError:
+            analytics_store.record_embedding_failure()
+    hits = await run_in_threadpool(
+        tenant.retriever.search,
+        query,
+        k,
+        filters,
+        query_vector,
+        candidates,
+    )
+    return hits, truncated
 
 
 @app.post("/interrogations", response_model=InterrogationResponse)
-def create_interrogation(
+async def create_interrogation(
+    tenant: Tenant,
     frequency: InterrogationFrequency = InterrogationFrequency.daily,
-) -> InterrogationResponse:
-    items = [item.to_public() for item in store.list()]
+    focus: str | None = Query(default=None, min_length=1),
+) -> Response:
+    if focus:
+        hits, _ = await _hybrid_search(tenant, focus, SearchFilters(), k=10)
+        items = [hit.record.to_public() for hit in hits]
+    else:
+        items = await run_in_threadpool(_interrogation_items, tenant.store, frequency)
+    body = await run_in_threadpool(_start_interrogation, tenant, items, frequency)
+    return JSONBytesResponse(body)
+
+
+def _start_interrogation(
+    tenant: TenantState,
+    items: list[MemoryItem],
+    frequency: InterrogationFrequency,
+) -> bytes:
     prompt = generate_interrogation(items, frequency=frequency)
-    interrogation_store.add_session(prompt)
+    tenant.interrogations.add_session(prompt)
     analytics_store.record_interrogation_created()
-    return InterrogationResponse(**prompt.model_dump())
+    return prompt.to_json()
+
+
+def _interrogation_items(
+    store: MemoryStore,
+    frequency: InterrogationFrequency,
+) -> list[MemoryItem]:
+    since = datetime.now(UTC) - interrogation_window(frequency)
+    records = [*store.between(since), *store.important_before(since, CARRY_OVER_LIMIT)]
+    return [record.to_public() for record in records]
 
 
 @app.get("/interrogations/history", response_model=list[InterrogationResponse])
-def list_interrogations() -> list[InterrogationResponse]:
-    return [
-        InterrogationResponse(**session.model_dump())
-        for session in interrogation_store.list_sessions()
-    ]
+def list_interrogations(tenant: Tenant) -> Response:
+    sessions = tenant.interrogations.list_sessions()
+    return JSONBytesResponse(json_array(session.to_json() for session in sessions))
 
 
 @app.post(
@@ -204,11 +772,12 @@ def list_interrogations() -> list[InterrogationResponse]:
 def create_interrogation_response(
     interrogation_id: UUID,
     payload: InterrogationSubmissionCreate,
+    tenant: Tenant,
 ) -> InterrogationSubmission:
-    session = interrogation_store.get_session(interrogation_id)
+    session = tenant.interrogations.get_session(interrogation_id)
     if session is None:
         raise HTTPException(status_code=404, detail="Interrogation not found")
-    submission = interrogation_store.add_submission(interrogation_id, payload)
+    submission = tenant.interrogations.add_submission(interrogation_id, payload)
     analytics_store.record_interrogation_response()
     return submission
 
@@ -219,30 +788,80 @@ def create_interrogation_response(
 )
 def list_interrogation_responses(
     interrogation_id: UUID,
+    tenant: Tenant,
 ) -> list[InterrogationSubmission]:
-    session = interrogation_store.get_session(interrogation_id)
+    session = tenant.interrogations.get_session(interrogation_id)
     if session is None:
         raise HTTPException(status_code=404, detail="Interrogation not found")
-    return interrogation_store.list_submissions(interrogation_id)
+    return tenant.interrogations.list_submissions(interrogation_id)
 
 
 @app.post("/flows/run", response_model=FlowResponse)
 def run_flow(
+    tenant: Tenant,
     frequency: InterrogationFrequency = InterrogationFrequency.daily,
-) -> FlowResponse:
-    items = [item.to_public() for item in store.list()]
-    contradictions = detect_contradictions(items)
-    saved_contradictions = contradiction_store.add_many(contradictions)
-    prompt = generate_interrogation(items, frequency=frequency)
-    interrogation_store.add_session(prompt)
+) -> Response:
+    with _flow_stage_timer("load"):
+        records = tenant.store.list()
+        items = [item.to_public() for item in records]
+    with _flow_stage_timer("contradictions"):
+        contradictions = _classify(detect_contradictions(items), items)
+        saved_contradictions = tenant.contradictions.add_many(contradictions)
+    with _flow_stage_timer("interrogation"):
+        prompt = generate_interrogation(
+            _interrogation_items(tenant.store, frequency),
+            frequency=frequency,
+        )
+        tenant.interrogations.add_session(prompt)
     analytics_store.record_flow_run(len(saved_contradictions))
-    return FlowResponse(
-        items=items,
-        contradictions=[to_response(record) for record in saved_contradictions],
-        interrogation=InterrogationResponse(**prompt.model_dump()),
-    )
+    with _flow_stage_timer("serialize"):
+        body = json_object(
+            {
+                "generated_at": json_datetime(datetime.now(UTC)),
+                "items": json_array(record.to_json() for record in records),
+                "contradictions": json_array(
+                    record.to_json() for record in saved_contradictions
+                ),
+                "interrogation": prompt.to_json(),
+            }
+        )
+    return JSONBytesResponse(body)
+
+
+@app.get("/tenant", response_model=TenantUsage)
+def tenant_usage(tenant: Tenant) -> TenantUsage:
+    return tenant.usage()
 
 
 @app.get("/analytics/summary", response_model=AnalyticsSummary)
 def analytics_summary() -> AnalyticsSummary:
     return analytics_store.summary()
+
+
+@app.get("/analytics/timeseries", response_model=AnalyticsTimeseries)
+def analytics_timeseries(metric: str, window: str = "1h") -> AnalyticsTimeseries:
+    try:
+        return analytics_store.timeseries(metric, window)
+    except TimeseriesQueryError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.get("/debug/traces", response_model=list[TraceRecord])
+def list_traces(limit: int = Query(default=50, ge=1, le=200)) -> list[TraceRecord]:
+    return trace_store.list(limit=limit)
+
+
+@app.get("/debug/traces/{trace_id}", response_model=TraceRecord)
+def get_trace(trace_id: UUID) -> TraceRecord:
+    trace = trace_store.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        analytics_store.render_prometheus(),
+        media_type="text/plain; version=0.0.4",
+    )
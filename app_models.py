@@ -1,11 +1,18 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import sys
+import time
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
 from enum import Enum
+from json.encoder import encode_basestring
+from typing import Any
 from uuid import UUID, uuid4
 
 from pydantic import BaseModel, Field
 
+from app.vectors import QuantizedVector
+
 
 class ItemType(str, Enum):
     goal = "goal"
@@ -36,23 +43,161 @@ class MemoryItem(BaseModel):
     embedding_status: EmbeddingStatus
 
 
-class MemoryItemRecord(BaseModel):
-    id: UUID = Field(default_factory=uuid4)
-    type: ItemType
-    content: str
-    importance: int
-    tags: list[str]
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    embedding_status: EmbeddingStatus = EmbeddingStatus.pending
-    embedding: list[float] | None = None
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def to_epoch_us(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch_us(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def format_datetime(value: datetime) -> str:
+    formatted = value.isoformat()
+    if formatted.endswith("+00:00"):
+        return formatted[:-6] + "Z"
+    return formatted
+
+
+def format_epoch_us(value: int) -> str:
+    seconds, micros = divmod(value, 1_000_000)
+    formatted = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+    if micros:
+        return f"{formatted}.{micros:06d}Z"
+    return f"{formatted}Z"
+
+
+def format_uuid(value: int) -> str:
+    digits = f"{value:032x}"
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+
+class MemoryItemRecord:
+    __slots__ = (
+        "id_int",
+        "type",
+        "content",
+        "importance",
+        "_tags",
+        "created_us",
+        "embedding_status",
+        "_embedding",
+        "embedding_space",
+        "version",
+        "_json",
+    )
+
+    def __init__(
+        self,
+        type: ItemType,
+        content: str,
+        importance: int,
+        tags: Iterable[str] = (),
+        id: UUID | None = None,
+        created_at: datetime | None = None,
+        embedding_status: EmbeddingStatus = EmbeddingStatus.pending,
+        embedding: QuantizedVector | Iterable[float] | None = None,
+        embedding_space: str | None = None,
+    ) -> None:
+        self.id_int = (id or uuid4()).int
+        self.type = type
+        self.content = content
+        self.importance = importance
+        self.tags = tags
+        self.created_us = time.time_ns() // 1000 if created_at is None else to_epoch_us(created_at)
+        self.embedding_status = embedding_status
+        self.embedding = embedding
+        self.embedding_space = embedding_space
+        self.version = 0
+        self._json: bytes | None = None
+
+    @property
+    def id(self) -> UUID:
+        return UUID(int=self.id_int)
+
+    @property
+    def created_at(self) -> datetime:
+        return from_epoch_us(self.created_us)
+
+    @property
+    def tags(self) -> tuple[str, ...]:
+        return self._tags
+
+    @tags.setter
+    def tags(self, value: Iterable[str]) -> None:
+        self._tags = tuple(sys.intern(tag) for tag in value)
+
+    @property
+    def embedding(self) -> QuantizedVector | None:
+        return self._embedding
+
+    @embedding.setter
+    def embedding(self, value: QuantizedVector | Iterable[float] | None) -> None:
+        if value is None or isinstance(value, QuantizedVector):
+            self._embedding = value
+        else:
+            self._embedding = QuantizedVector.quantize(value)
+
+    def to_snapshot(self) -> dict[str, Any]:
+        return {
+            "id": format_uuid(self.id_int),
+            "type": self.type.value,
+            "content": self.content,
+            "importance": self.importance,
+            "tags": list(self._tags),
+            "created_us": self.created_us,
+            "embedding_status": self.embedding_status.value,
+            "embedding": None if self._embedding is None else self._embedding.to_snapshot(),
+            "embedding_space": self.embedding_space,
+            "version": self.version,
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: dict[str, Any]) -> MemoryItemRecord:
+        embedding = data["embedding"]
+        record = cls(
+            type=ItemType(data["type"]),
+            content=data["content"],
+            importance=data["importance"],
+            tags=data["tags"],
+            id=UUID(data["id"]),
+            created_at=from_epoch_us(data["created_us"]),
+            embedding_status=EmbeddingStatus(data["embedding_status"]),
+            embedding=None if embedding is None else QuantizedVector.from_snapshot(embedding),
+            embedding_space=data.get("embedding_space"),
+        )
+        record.version = data["version"]
+        return record
 
     def to_public(self) -> MemoryItem:
-        return MemoryItem(
+        return MemoryItem.model_construct(
             id=self.id,
             type=self.type,
             content=self.content,
             importance=self.importance,
-            tags=list(self.tags),
+            tags=list(self._tags),
             created_at=self.created_at,
             embedding_status=self.embedding_status,
         )
+
+    def to_json(self) -> bytes:
+        if self._json is None:
+            tags = ",".join(map(encode_basestring, self._tags))
+            try:
+                self._json = (
+                    f'{{"id":"{format_uuid(self.id_int)}","type":"{self.type.value}",'
+                    f'"content":{encode_basestring(self.content)},'
+                    f'"importance":{self.importance},"tags":[{tags}],'
+                    f'"created_at":"{format_epoch_us(self.created_us)}",'
+                    f'"embedding_status":"{self.embedding_status.value}"}}'
+                ).encode()
+            except UnicodeEncodeError:
+                self._json = self.to_public().model_dump_json().encode()
+        return self._json
+
+    def invalidate(self) -> None:
+        self._json = None
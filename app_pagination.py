@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import base64
+import binascii
+
+from app.storage import ItemKey
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(key: ItemKey) -> str:
+    created_us, id_int = key
+    raw = f"{created_us}|{id_int:032x}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ItemKey:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded).decode()
+        created_us, id_hex = raw.split("|", 1)
+        return int(created_us), int(id_hex, 16)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursorError("Invalid pagination cursor.") from exc
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import heapq
+import operator
+import os
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+
+from pydantic import BaseModel
+
+from app.models import ItemType, MemoryItem, MemoryItemRecord, to_epoch_us
+from app.storage import MemoryStore
+from app.tracing import traced
+from app.vectors import cosine_top_k, rerank_depth_from_env
+
+RRF_K = 60
+DEFAULT_VECTOR_CANDIDATES = 10_000
+
+
+class SearchResult(BaseModel):
+    item: MemoryItem
+    score: float
+    keyword_rank: int | None
+    vector_rank: int | None
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    item_type: ItemType | None = None
+    tags: tuple[str, ...] = ()
+    min_importance: int | None = None
+    max_importance: int | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+
+    def matches(self, record: MemoryItemRecord) -> bool:
+        if self.item_type is not None and record.type != self.item_type:
+            return False
+        if self.min_importance is not None and record.importance < self.min_importance:
+            return False
+        if self.max_importance is not None and record.importance > self.max_importance:
+            return False
+        since_us, until_us = self._bounds
+        if since_us is not None and record.created_us < since_us:
+            return False
+        if until_us is not None and record.created_us >= until_us:
+            return False
+        return all(tag in record.tags for tag in self.tags)
+
+    @cached_property
+    def _bounds(self) -> tuple[int | None, int | None]:
+        return (
+            None if self.since is None else to_epoch_us(self.since),
+            None if self.until is None else to_epoch_us(self.until),
+        )
+
+
+@dataclass
+class SearchHit:
+    record: MemoryItemRecord
+    score: float = 0.0
+    keyword_rank: int | None = None
+    vector_rank: int | None = None
+
+    def to_result(self) -> SearchResult:
+        return SearchResult(
+            item=self.record.to_public(),
+            score=self.score,
+            keyword_rank=self.keyword_rank,
+            vector_rank=self.vector_rank,
+        )
+
+
+class HybridRetriever:
+    def __init__(
+        self,
+        store: MemoryStore,
+        rrf_k: int = RRF_K,
+        max_vector_candidates: int | None = None,
+        rerank_depth: int | None = None,
+    ) -> None:
+        self.store = store
+        self.rrf_k = rrf_k
+        self.max_vector_candidates = (
+            int(os.getenv("VECTOR_CANDIDATE_LIMIT", DEFAULT_VECTOR_CANDIDATES))
+            if max_vector_candidates is None
+            else max_vector_candidates
+        )
+        self.rerank_depth = rerank_depth_from_env() if rerank_depth is None else rerank_depth
+
+    def vector_candidates(
+        self,
+        filters: SearchFilters,
+        space: str | None = None,
+    ) -> tuple[list[MemoryItemRecord], bool]:
+        window = self.store.between(filters.since, filters.until)
+        candidates = [
+            record
+            for record in window
+            if record.embedding
+            and (space is None or record.embedding_space == space)
+            and filters.matches(record)
+        ]
+        truncated = len(candidates) > self.max_vector_candidates
+        return candidates[-self.max_vector_candidates :], truncated
+
+    @traced("retrieval.search")
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        filters: SearchFilters | None = None,
+        query_vector: Sequence[float] | None = None,
+        candidates: list[MemoryItemRecord] | None = None,
+        depth: int | None = None,
+        space: str | None = None,
+    ) -> list[SearchHit]:
+        filters = filters or SearchFilters()
+        depth = depth or max(k * 4, 50)
+        hits: dict[int, SearchHit] = {}
+
+        keyword = heapq.nlargest(
+            depth,
+            self.store.keyword_scores(query, filters.matches),
+            key=operator.itemgetter(1),
+        )
+        for rank, (record, _) in enumerate(keyword, start=1):
+            hit = hits.setdefault(record.id_int, SearchHit(record))
+            hit.keyword_rank = rank
+            hit.score += 1 / (self.rrf_k + rank)
+
+        if query_vector:
+            if candidates is None:
+                candidates, _ = self.vector_candidates(filters, space)
+            for rank, (record, _) in enumerate(
+                self._vector_scores(query_vector, candidates, depth), start=1
+            ):
+                hit = hits.setdefault(record.id_int, SearchHit(record))
+                hit.vector_rank = rank
+                hit.score += 1 / (self.rrf_k + rank)
+
+        return heapq.nlargest(
+            k,
+            hits.values(),
+            key=lambda hit: (hit.score, hit.record.importance, hit.record.created_us),
+        )
+
+    @traced("retrieval.vector_scores")
+    def _vector_scores(
+        self,
+        query_vector: Sequence[float],
+        candidates: list[MemoryItemRecord],
+        depth: int,
+    ) -> list[tuple[MemoryItemRecord, float]]:
+        candidates = [record for record in candidates if record.embedding is not None]
+        ranked = cosine_top_k(
+            query_vector,
+            [record.embedding for record in candidates],
+            depth,
+            rerank=self.rerank_depth,
+        )
+        return [(candidates[index], similarity) for index, similarity in ranked]
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime
+
+from fastapi import Response
+
+from app.models import format_datetime
+from app.tracing import traced
+
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+
+@traced("serialize.json_array")
+def json_array(encoded: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(encoded) + b"]"
+
+
+@traced("serialize.json_object")
+def json_object(fields: dict[str, bytes]) -> bytes:
+    members = (f'"{name}":'.encode() + value for name, value in fields.items())
+    return b"{" + b",".join(members) + b"}"
+
+
+def json_datetime(value: datetime) -> bytes:
+    return f'"{format_datetime(value)}"'.encode()
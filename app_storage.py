@@ -1,31 +1,158 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from datetime import datetime
+from typing import TYPE_CHECKING
 from uuid import UUID
 
-from app.models import EmbeddingStatus, ItemType, MemoryItemCreate, MemoryItemRecord
+from app.bitmap import Bitmap
+from app.dedup import DuplicateIndex
+from app.models import (
+    EmbeddingStatus,
+    ItemType,
+    MemoryItemCreate,
+    MemoryItemRecord,
+    to_epoch_us,
+)
+from app.tags import TagIndex, TagQuery
+from app.text_index import KeywordIndex
+from app.tracing import traced
+from app.vectors import EmbeddingPrecision, QuantizedVector
+
+if TYPE_CHECKING:
+    import numpy as np
+
+ItemKey = tuple[int, int]
+
+HIGH_IMPORTANCE = 4
+TAG_COUNT_CACHE_SIZE = 64
+
+
+def item_key(record: MemoryItemRecord) -> ItemKey:
+    return (record.created_us, record.id_int)
 
 
 class MemoryStore:
-    def __init__(self) -> None:
+    def __init__(self, precision: EmbeddingPrecision | None = None) -> None:
+        self.precision = precision or EmbeddingPrecision.from_env()
         self._items: list[MemoryItemRecord] = []
+        self._keys: list[ItemKey] = []
+        self._by_id: dict[int, MemoryItemRecord] = {}
+        self._lock = threading.RLock()
+        self._corpus_version = 0
+        self._revision = 0
+        self._keywords = KeywordIndex()
+        self._duplicates = DuplicateIndex()
+        self._important: list[ItemKey] = []
+        self._tags = TagIndex()
+        self._ordinals: dict[int, int] = {}
+        self._key_ordinals = array("q")
+        self._next_ordinal = 0
+        self._tag_counts: OrderedDict[tuple, list[tuple[str, int]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    @property
+    def corpus_version(self) -> int:
+        return self._corpus_version
+
+    @property
+    def revision(self) -> int:
+        return self._revision
 
     def add(self, item: MemoryItemCreate) -> MemoryItemRecord:
-        record = MemoryItemRecord(
-            type=item.type,
-            content=item.content,
-            importance=item.importance,
-            tags=list(item.tags),
-        )
-        self._items.append(record)
-        return record
+        return self.add_many([item])[0]
+
+    @traced("store.add_many")
+    def add_many(self, items: Iterable[MemoryItemCreate]) -> list[MemoryItemRecord]:
+        records = [
+            MemoryItemRecord(
+                type=item.type,
+                content=item.content,
+                importance=item.importance,
+                tags=item.tags,
+            )
+            for item in items
+        ]
+        signatures = self._duplicates.signatures([record.content for record in records])
+        with self._lock:
+            for record, signature in zip(records, signatures, strict=True):
+                self._insert(record, signature)
+            if records:
+                self._corpus_version += 1
+                self._revision += 1
+        return records
+
+    @traced("store.restore")
+    def restore(self, records: Iterable[MemoryItemRecord], corpus_version: int = 0) -> None:
+        records = list(records)
+        signatures = self._duplicates.signatures([record.content for record in records])
+        with self._lock:
+            for record, signature in zip(records, signatures, strict=True):
+                self._insert(record, signature)
+            self._corpus_version = max(self._corpus_version, corpus_version) + 1
+            self._revision += 1
+
+    @traced("store.add_or_merge_many")
+    def add_or_merge_many(
+        self,
+        items: Iterable[MemoryItemCreate],
+        threshold: float | None = None,
+    ) -> list[tuple[MemoryItemRecord, bool]]:
+        items = list(items)
+        signatures = self._duplicates.signatures([item.content for item in items])
+        results: list[tuple[MemoryItemRecord, bool]] = []
+        with self._lock:
+            for item, signature in zip(items, signatures, strict=True):
+                matches = [
+                    self._by_id[doc_id]
+                    for doc_id, _ in self._duplicates.query(signature, threshold)
+                    if self._by_id[doc_id].type == item.type
+                ]
+                if matches:
+                    record = matches[0]
+                    self._merge(record, item)
+                    results.append((record, True))
+                    continue
+                record = MemoryItemRecord(
+                    type=item.type,
+                    content=item.content,
+                    importance=item.importance,
+                    tags=item.tags,
+                )
+                self._insert(record, signature)
+                results.append((record, False))
+            if any(not merged for _, merged in results):
+                self._corpus_version += 1
+                self._revision += 1
+        return results
 
+    def corpus(self) -> tuple[int, list[str]]:
+        with self._lock:
+            return self._corpus_version, [item.content for item in self._items]
+
+    @traced("store.list")
     def list(
         self,
         item_type: ItemType | None = None,
         query: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        tags: TagQuery | None = None,
     ) -> Iterable[MemoryItemRecord]:
         items = self._items
+        if tags is not None:
+            with self._lock:
+                start, end = self._bounds(since, until)
+                positions = self._tag_positions(tags, item_type, start, end)
+                items = [self._items[index] for index in positions.tolist()]
+        elif since is not None or until is not None:
+            items = self.between(since, until)
         if item_type:
             items = [item for item in items if item.type == item_type]
         if query:
@@ -33,26 +160,170 @@ class MemoryStore:
             items = [item for item in items if normalized in item.content.lower()]
         return list(items)
 
+    @traced("store.page")
+    def page(
+        self,
+        item_type: ItemType | None = None,
+        query: str | None = None,
+        after: ItemKey | None = None,
+        limit: int = 100,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        tags: TagQuery | None = None,
+    ) -> list[MemoryItemRecord]:
+        normalized = query.lower() if query else None
+        page: list[MemoryItemRecord] = []
+        with self._lock:
+            start, end = self._bounds(since, until)
+            if after is not None:
+                start = max(start, bisect_right(self._keys, after))
+            indices: Iterable[int] = range(start, end)
+            if tags is not None:
+                indices = self._tag_positions(tags, item_type, start, end).tolist()
+            for index in indices:
+                item = self._items[index]
+                if item_type and item.type != item_type:
+                    continue
+                if normalized and normalized not in item.content.lower():
+                    continue
+                page.append(item)
+                if len(page) >= limit:
+                    break
+        return page
+
+    def iter(
+        self,
+        item_type: ItemType | None = None,
+        query: str | None = None,
+        chunk_size: int = 500,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        tags: TagQuery | None = None,
+    ) -> Iterator[MemoryItemRecord]:
+        after: ItemKey | None = None
+        while True:
+            page = self.page(
+                item_type=item_type,
+                query=query,
+                after=after,
+                limit=chunk_size,
+                since=since,
+                until=until,
+                tags=tags,
+            )
+            yield from page
+            if len(page) < chunk_size:
+                return
+            after = item_key(page[-1])
+
+    @traced("store.between")
+    def between(
+        self,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[MemoryItemRecord]:
+        with self._lock:
+            start, end = self._bounds(since, until)
+            return self._items[start:end]
+
+    @traced("store.tag_counts")
+    def tag_counts(
+        self,
+        item_type: ItemType | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        tags: TagQuery | None = None,
+    ) -> list[tuple[str, int]]:
+        with self._lock:
+            start, end = self._bounds(since, until)
+            key = (self._tags.generation, item_type, start, end, tags)
+            cached = self._tag_counts.get(key)
+            if cached is not None:
+                self._tag_counts.move_to_end(key)
+                return cached
+            within = None if tags is None else tags.evaluate(self._tags)
+            if item_type:
+                bitmap = self._tags.type(item_type)
+                within = bitmap if within is None else within & bitmap
+            if since is not None or until is not None:
+                window = Bitmap.from_ordinals(self._key_ordinals[start:end])
+                within = window if within is None else within & window
+            counts = sorted(
+                self._tags.counts(within).items(),
+                key=lambda entry: (-entry[1], entry[0]),
+            )
+            self._tag_counts[key] = counts
+            while len(self._tag_counts) > TAG_COUNT_CACHE_SIZE:
+                self._tag_counts.popitem(last=False)
+        return counts
+
+    @traced("store.important_before")
+    def important_before(self, until: datetime, limit: int) -> list[MemoryItemRecord]:
+        with self._lock:
+            end = bisect_left(self._important, (to_epoch_us(until), -1))
+            keys = self._important[max(0, end - limit) : end]
+            return [self._by_id[id_int] for _, id_int in reversed(keys)]
+
+    @traced("store.keyword_scores")
+    def keyword_scores(
+        self,
+        query: str,
+        accept: Callable[[MemoryItemRecord], bool] | None = None,
+    ) -> list[tuple[MemoryItemRecord, float]]:
+        with self._lock:
+            by_id = self._by_id
+            scores = self._keywords.score(
+                query,
+                None if accept is None else lambda doc_id: accept(by_id[doc_id]),
+            )
+            return [(by_id[doc_id], score) for doc_id, score in scores.items()]
+
     def get(self, item_id: UUID) -> MemoryItemRecord | None:
-        return next((item for item in self._items if item.id == item_id), None)
+        return self._by_id.get(item_id.int)
 
+    @traced("store.update")
     def update(self, item_id: UUID, item: MemoryItemCreate) -> MemoryItemRecord | None:
-        record = self.get(item_id)
-        if record is None:
-            return None
-        record.type = item.type
-        record.content = item.content
-        record.importance = item.importance
-        record.tags = list(item.tags)
+        signature = self._duplicates.signature(item.content)
+        with self._lock:
+            record = self.get(item_id)
+            if record is None:
+                return None
+            self._keywords.remove(record.id_int, record.content)
+            self._keywords.add(record.id_int, item.content)
+            self._duplicates.add(record.id_int, signature)
+            self._set_importance(record, item.importance)
+            ordinal = self._ordinals[record.id_int]
+            self._tags.remove(ordinal, record.type, record.tags)
+            record.type = item.type
+            record.content = item.content
+            record.tags = item.tags
+            self._tags.add(ordinal, record.type, record.tags)
+            record.version += 1
+            record.invalidate()
+            self._corpus_version += 1
+            self._revision += 1
         return record
 
+    @traced("store.delete")
     def delete(self, item_id: UUID) -> bool:
-        for index, item in enumerate(self._items):
-            if item.id == item_id:
-                self._items.pop(index)
-                return True
-        return False
+        with self._lock:
+            record = self._by_id.pop(item_id.int, None)
+            if record is None:
+                return False
+            index = bisect_left(self._keys, item_key(record))
+            self._keywords.remove(record.id_int, record.content)
+            self._duplicates.remove(record.id_int)
+            self._tags.remove(self._ordinals.pop(record.id_int), record.type, record.tags)
+            if record.importance >= HIGH_IMPORTANCE:
+                del self._important[bisect_left(self._important, item_key(record))]
+            del self._keys[index]
+            del self._items[index]
+            del self._key_ordinals[index]
+            self._corpus_version += 1
+            self._revision += 1
+            return True
 
+    @traced("store.update_embedding_status")
     def update_embedding_status(
         self,
         item_id: UUID,
@@ -62,20 +333,156 @@ class MemoryStore:
         if record is None:
             return None
         record.embedding_status = status
+        record.invalidate()
+        self._revision += 1
         return record
 
+    @traced("store.update_embedding")
     def update_embedding(
         self,
         item_id: UUID,
         embedding: list[float],
         status: EmbeddingStatus = EmbeddingStatus.completed,
+        version: int | None = None,
+        space: str | None = None,
     ) -> MemoryItemRecord | None:
-        record = self.get(item_id)
-        if record is None:
-            return None
-        record.embedding = list(embedding)
-        record.embedding_status = status
+        vector = QuantizedVector.quantize(embedding, self.precision)
+        with self._lock:
+            record = self.get(item_id)
+            if record is None or (version is not None and record.version != version):
+                return None
+            record.embedding = vector
+            record.embedding_space = space
+            record.embedding_status = status
+            record.invalidate()
+            self._revision += 1
         return record
 
+    @traced("store.update_embeddings")
+    def update_embeddings(
+        self,
+        embeddings: Iterable[tuple[UUID, list[float]]],
+        status: EmbeddingStatus = EmbeddingStatus.completed,
+        versions: Mapping[UUID, int] | None = None,
+        space: str | None = None,
+    ) -> list[MemoryItemRecord]:
+        vectors = [
+            (item_id, QuantizedVector.quantize(embedding, self.precision))
+            for item_id, embedding in embeddings
+        ]
+        updated: list[MemoryItemRecord] = []
+        with self._lock:
+            for item_id, vector in vectors:
+                record = self._by_id.get(item_id.int)
+                if record is None:
+                    continue
+                if versions is not None and record.version != versions.get(item_id):
+                    continue
+                record.embedding = vector
+                record.embedding_space = space
+                record.embedding_status = status
+                record.invalidate()
+                updated.append(record)
+            self._revision += len(updated)
+        return updated
+
     def clear(self) -> None:
-        self._items.clear()
+        with self._lock:
+            self._items.clear()
+            self._keys.clear()
+            self._by_id.clear()
+            self._keywords.clear()
+            self._duplicates.clear()
+            self._important.clear()
+            self._tags.clear()
+            self._ordinals.clear()
+            del self._key_ordinals[:]
+            self._next_ordinal = 0
+            self._tag_counts.clear()
+            self._corpus_version += 1
+            self._revision += 1
+
+    @traced("store.duplicates_of")
+    def duplicates_of(
+        self,
+        item_id: UUID,
+        threshold: float | None = None,
+    ) -> list[tuple[MemoryItemRecord, float]]:
+        with self._lock:
+            signature = self._duplicates.get(item_id.int)
+            if signature is None:
+                return []
+            matches = self._duplicates.query(signature, threshold, exclude=item_id.int)
+            return [(self._by_id[doc_id], similarity) for doc_id, similarity in matches]
+
+    @traced("store.duplicate_pairs")
+    def duplicate_pairs(self, threshold: float | None = None) -> list[tuple[int, int, float]]:
+        with self._lock:
+            return self._duplicates.pairs(threshold)
+
+    def get_many(self, id_ints: Iterable[int]) -> list[MemoryItemRecord]:
+        by_id = self._by_id
+        return [by_id[id_int] for id_int in id_ints if id_int in by_id]
+
+    def _merge(self, record: MemoryItemRecord, item: MemoryItemCreate) -> None:
+        self._set_importance(record, max(record.importance, item.importance))
+        ordinal = self._ordinals[record.id_int]
+        self._tags.remove(ordinal, record.type, record.tags)
+        record.tags = dict.fromkeys((*record.tags, *item.tags))
+        self._tags.add(ordinal, record.type, record.tags)
+        record.invalidate()
+        self._revision += 1
+
+    def _insert(self, record: MemoryItemRecord, signature: np.ndarray) -> None:
+        key = item_key(record)
+        ordinal = self._next_ordinal
+        self._next_ordinal += 1
+        if not self._keys or self._keys[-1] < key:
+            self._keys.append(key)
+            self._items.append(record)
+            self._key_ordinals.append(ordinal)
+        else:
+            index = bisect_right(self._keys, key)
+            self._keys.insert(index, key)
+            self._items.insert(index, record)
+            self._key_ordinals.insert(index, ordinal)
+        self._by_id[record.id_int] = record
+        self._ordinals[record.id_int] = ordinal
+        self._tags.add(ordinal, record.type, record.tags)
+        self._keywords.add(record.id_int, record.content)
+        self._duplicates.add(record.id_int, signature)
+        if record.importance >= HIGH_IMPORTANCE:
+            insort(self._important, key)
+
+    def _tag_positions(
+        self,
+        tags: TagQuery,
+        item_type: ItemType | None,
+        start: int,
+        end: int,
+    ) -> np.ndarray:
+        import numpy as np
+
+        matches = tags.evaluate(self._tags)
+        if item_type:
+            matches = matches & self._tags.type(item_type)
+        ordinals = np.frombuffer(self._key_ordinals[start:end], dtype=np.int64)
+        return np.flatnonzero(matches.contains(ordinals)) + start
+
+    def _bounds(self, since: datetime | None, until: datetime | None) -> tuple[int, int]:
+        start = 0 if since is None else bisect_left(self._keys, (to_epoch_us(since), -1))
+        end = (
+            len(self._keys)
+            if until is None
+            else bisect_left(self._keys, (to_epoch_us(until), -1))
+        )
+        return start, max(start, end)
+
+    def _set_importance(self, record: MemoryItemRecord, importance: int) -> None:
+        was_important = record.importance >= HIGH_IMPORTANCE
+        is_important = importance >= HIGH_IMPORTANCE
+        if was_important and not is_important:
+            del self._important[bisect_left(self._important, item_key(record))]
+        elif is_important and not was_important:
+            insort(self._important, item_key(record))
+        record.importance = importance
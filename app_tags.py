@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+
+from app.bitmap import Bitmap
+from app.models import ItemType
+
+MAX_QUERY_TERMS = 64
+MAX_QUERY_DEPTH = 16
+
+_TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+_OPERATORS = frozenset({"AND", "OR", "NOT"})
+
+
+class TagQueryError(ValueError):
+    pass
+
+
+class TagFacet(BaseModel):
+    tag: str
+    count: int
+
+
+@dataclass(frozen=True)
+class TagTerm:
+    tag: str
+
+    def evaluate(self, index: TagIndex) -> Bitmap:
+        return index.tag(self.tag)
+
+
+@dataclass(frozen=True)
+class TagNot:
+    operand: TagQuery
+
+    def evaluate(self, index: TagIndex) -> Bitmap:
+        return index.live - self.operand.evaluate(index)
+
+
+@dataclass(frozen=True)
+class TagAnd:
+    operands: tuple[TagQuery, ...]
+
+    def evaluate(self, index: TagIndex) -> Bitmap:
+        positive = [operand for operand in self.operands if not isinstance(operand, TagNot)]
+        negative = [operand.operand for operand in self.operands if isinstance(operand, TagNot)]
+        bitmaps = sorted((operand.evaluate(index) for operand in positive), key=len)
+        result = bitmaps[0] if bitmaps else index.live
+        for bitmap in bitmaps[1:]:
+            if not result:
+                return result
+            result = result & bitmap
+        for operand in negative:
+            if not result:
+                return result
+            result = result - operand.evaluate(index)
+        return result
+
+
+@dataclass(frozen=True)
+class TagOr:
+    operands: tuple[TagQuery, ...]
+
+    def evaluate(self, index: TagIndex) -> Bitmap:
+        result = Bitmap()
+        for operand in self.operands:
+            result = result | operand.evaluate(index)
+        return result
+
+
+TagQuery = TagTerm | TagNot | TagAnd | TagOr
+
+
+def parse_tag_query(text: str) -> TagQuery:
+    tokens: list[tuple[str, str]] = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        if match is None:
+            raise TagQueryError(f"Unterminated quote at position {position}.")
+        position = match.end()
+        opening, closing, quoted, word = match.groups()
+        if opening:
+            tokens.append(("(", opening))
+        elif closing:
+            tokens.append((")", closing))
+        elif quoted is not None:
+            tokens.append(("tag", quoted))
+        elif word in _OPERATORS:
+            tokens.append((word, word))
+        else:
+            tokens.append(("tag", word))
+    if not tokens:
+        raise TagQueryError("Tag query is empty.")
+    if sum(kind == "tag" for kind, _ in tokens) > MAX_QUERY_TERMS:
+        raise TagQueryError(f"Tag query has more than {MAX_QUERY_TERMS} tags.")
+    parser = _Parser(tokens)
+    query = parser.expression()
+    if parser.position < len(tokens):
+        raise TagQueryError(f"Unexpected {tokens[parser.position][1]!r} in tag query.")
+    return query
+
+
+class _Parser:
+    def __init__(self, tokens: list[tuple[str, str]]) -> None:
+        self.tokens = tokens
+        self.position = 0
+        self.depth = 0
+
+    def peek(self) -> str | None:
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def take(self) -> tuple[str, str]:
+        if self.position >= len(self.tokens):
+            raise TagQueryError("Tag query ends unexpectedly.")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def expression(self) -> TagQuery:
+        operands = [self.conjunction()]
+        while self.peek() == "OR":
+            self.take()
+            operands.append(self.conjunction())
+        return operands[0] if len(operands) == 1 else TagOr(tuple(operands))
+
+    def conjunction(self) -> TagQuery:
+        operands = [self.negation()]
+        while self.peek() in {"AND", "NOT", "tag", "("}:
+            if self.peek() == "AND":
+                self.take()
+            operands.append(self.negation())
+        return operands[0] if len(operands) == 1 else TagAnd(tuple(operands))
+
+    def negation(self) -> TagQuery:
+        if self.peek() == "NOT":
+            self.take()
+            with self.nested():
+                return TagNot(self.negation())
+        return self.atom()
+
+    def atom(self) -> TagQuery:
+        kind, value = self.take()
+        if kind == "tag":
+            return TagTerm(value)
+        if kind == "(":
+            with self.nested():
+                query = self.expression()
+            if self.take()[0] != ")":
+                raise TagQueryError("Missing closing parenthesis in tag query.")
+            return query
+        raise TagQueryError(f"Unexpected {value!r} in tag query.")
+
+    @contextmanager
+    def nested(self) -> Iterator[None]:
+        self.depth += 1
+        if self.depth > MAX_QUERY_DEPTH:
+            raise TagQueryError(f"Tag query nests deeper than {MAX_QUERY_DEPTH} levels.")
+        try:
+            yield
+        finally:
+            self.depth -= 1
+
+
+class TagIndex:
+    def __init__(self) -> None:
+        self.live = Bitmap()
+        self.generation = 0
+        self._tags: dict[str, Bitmap] = {}
+        self._types: dict[ItemType, Bitmap] = {}
+        self._counts: dict[str, int] = {}
+
+    def add(self, ordinal: int, item_type: ItemType, tags: Iterable[str]) -> None:
+        self.generation += 1
+        self.live.add(ordinal)
+        self._types.setdefault(item_type, Bitmap()).add(ordinal)
+        for tag in set(tags):
+            self._tags.setdefault(tag, Bitmap()).add(ordinal)
+            self._counts[tag] = self._counts.get(tag, 0) + 1
+
+    def remove(self, ordinal: int, item_type: ItemType, tags: Iterable[str]) -> None:
+        self.generation += 1
+        self.live.remove(ordinal)
+        self._discard(self._types, item_type, ordinal)
+        for tag in set(tags):
+            self._discard(self._tags, tag, ordinal)
+            count = self._counts.pop(tag, 0) - 1
+            if count > 0:
+                self._counts[tag] = count
+
+    def tag(self, tag: str) -> Bitmap:
+        return self._tags.get(tag) or Bitmap()
+
+    def type(self, item_type: ItemType) -> Bitmap:
+        return self._types.get(item_type) or Bitmap()
+
+    def counts(self, within: Bitmap | None = None) -> dict[str, int]:
+        if within is None:
+            return dict(self._counts)
+        counts: dict[str, int] = {}
+        for tag, bitmap in self._tags.items():
+            count = len(bitmap & within)
+            if count:
+                counts[tag] = count
+        return counts
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.live = Bitmap()
+        self._tags.clear()
+        self._types.clear()
+        self._counts.clear()
+
+    @staticmethod
+    def _discard(bitmaps: dict, key: object, ordinal: int) -> None:
+        bitmap = bitmaps.get(key)
+        if bitmap is None:
+            return
+        bitmap.remove(ordinal)
+        if not bitmap:
+            del bitmaps[key]
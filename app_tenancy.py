@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from uuid import uuid4
+
+from pydantic import BaseModel
+
+from app.coalescing import SingleFlight
+from app.contradiction_store import ContradictionStore
+from app.contradiction_watch import ContradictionRefiner, ContradictionWatcher
+from app.contradictions import ContradictionRecord
+from app.interrogation import InterrogationPrompt, InterrogationSubmission
+from app.interrogation_store import InterrogationStore
+from app.models import MemoryItemRecord
+from app.retrieval import HybridRetriever
+from app.storage import MemoryStore
+from app.tracing import traced
+
+DEFAULT_TENANT = "default"
+TENANT_HEADER = "X-Tenant-ID"
+
+_TENANT_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class InvalidTenantError(ValueError):
+    pass
+
+
+class QuotaExceededError(RuntimeError):
+    pass
+
+
+class EmbeddingRateLimitError(RuntimeError):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("Embedding rate limit exceeded.")
+        self.retry_after = retry_after
+
+
+class TenantUsage(BaseModel):
+    tenant_id: str
+    items: int
+    max_items: int | None
+    embeddings_per_minute: int | None
+
+
+@dataclass(frozen=True)
+class TenantQuota:
+    max_items: int | None = None
+    embeddings_per_minute: int | None = None
+
+    @classmethod
+    def from_env(cls) -> TenantQuota:
+        max_items = os.getenv("TENANT_MAX_ITEMS")
+        per_minute = os.getenv("TENANT_EMBEDDINGS_PER_MINUTE")
+        return cls(
+            max_items=int(max_items) if max_items else None,
+            embeddings_per_minute=int(per_minute) if per_minute else None,
+        )
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        per_minute: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.capacity = float(per_minute)
+        self.refill_per_second = per_minute / 60
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, count: int = 1) -> float:
+        with self._lock:
+            now = self._clock()
+            elapsed = now - self._updated
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+            self._updated = now
+            if count > self.capacity:
+                raise ValueError(f"Cannot take {count} tokens from a bucket of {self.capacity:g}.")
+            if self._tokens >= count:
+                self._tokens -= count
+                return 0.0
+            return (count - self._tokens) / self.refill_per_second
+
+
+class TenantState:
+    def __init__(
+        self,
+        tenant_id: str,
+        quota: TenantQuota | None = None,
+        refine: ContradictionRefiner | None = None,
+    ) -> None:
+        self.tenant_id = tenant_id
+        self.quota = quota or TenantQuota()
+        self.store = MemoryStore()
+        self.contradictions = ContradictionStore()
+        self.interrogations = InterrogationStore()
+        self.watcher = ContradictionWatcher(self.store, self.contradictions, refine=refine)
+        self.retriever = HybridRetriever(self.store)
+        self.embed_flights: SingleFlight[MemoryItemRecord | None] = SingleFlight()
+        self.refresh_flights: SingleFlight[list[MemoryItemRecord]] = SingleFlight()
+        self.leases = 0
+        self.pending_dumps = 0
+        self._admission = threading.Lock()
+        self._dump_lock = threading.Lock()
+        self._embedding_bucket = (
+            TokenBucket(self.quota.embeddings_per_minute)
+            if self.quota.embeddings_per_minute
+            else None
+        )
+        self._saved_revision = self.revision()
+
+    def revision(self) -> tuple[int, int, int, int]:
+        return (
+            self.store.revision,
+            len(self.contradictions),
+            len(self.interrogations.list_sessions()),
+            len(self.interrogations.list_all_submissions()),
+        )
+
+    @contextmanager
+    def admit_items(self, count: int = 1) -> Iterator[None]:
+        max_items = self.quota.max_items
+        if max_items is None:
+            yield
+            return
+        with self._admission:
+            if len(self.store) + count > max_items:
+                raise QuotaExceededError(f"Tenant item quota of {max_items} exceeded.")
+            yield
+
+    def acquire_embeddings(self, count: int = 1) -> None:
+        if self._embedding_bucket is None:
+            return
+        if count > self._embedding_bucket.capacity:
+            raise QuotaExceededError(
+                f"Request needs {count} embeddings but the tenant limit is "
+                f"{self.quota.embeddings_per_minute} per minute."
+            )
+        retry_after = self._embedding_bucket.acquire(count)
+        if retry_after:
+            raise EmbeddingRateLimitError(retry_after)
+
+    def usage(self) -> TenantUsage:
+        return TenantUsage(
+            tenant_id=self.tenant_id,
+            items=len(self.store),
+            max_items=self.quota.max_items,
+            embeddings_per_minute=self.quota.embeddings_per_minute,
+        )
+
+    @traced("tenant.dump")
+    def dump(self, path: Path) -> bool:
+        with self._dump_lock:
+            return self._dump(path)
+
+    def _dump(self, path: Path) -> bool:
+        self.watcher.flush()
+        revision = self.revision()
+        if revision == self._saved_revision:
+            return False
+        if not len(self.store) and not any(revision[1:]):
+            path.unlink(missing_ok=True)
+            self._saved_revision = revision
+            return True
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+        with temporary.open("w", encoding="utf-8") as handle:
+            for record in self.store.iter():
+                handle.write(json.dumps({"kind": "item", "data": record.to_snapshot()}) + "\n")
+            handle.write(json.dumps({"kind": "corpus", "data": self.store.corpus_version}) + "\n")
+            for contradiction in self.contradictions.list():
+                handle.write(_model_line("contradiction", contradiction))
+            for session in self.interrogations.list_sessions():
+                handle.write(_model_line("interrogation", session))
+            for submission in self.interrogations.list_all_submissions():
+                handle.write(_model_line("submission", submission))
+        os.replace(temporary, path)
+        self._saved_revision = revision
+        return True
+
+    @classmethod
+    @traced("tenant.load")
+    def load(
+        cls,
+        tenant_id: str,
+        path: Path,
+        quota: TenantQuota | None = None,
+        refine: ContradictionRefiner | None = None,
+    ) -> TenantState:
+        state = cls(tenant_id, quota, refine)
+        records: list[MemoryItemRecord] = []
+        contradictions: list[ContradictionRecord] = []
+        sessions: list[InterrogationPrompt] = []
+        submissions: list[InterrogationSubmission] = []
+        corpus_version = 0
+        with path.open(encoding="utf-8") as handle:
+            for line in handle:
+                entry = json.loads(line)
+                kind, data = entry["kind"], entry["data"]
+                if kind == "item":
+                    records.append(MemoryItemRecord.from_snapshot(data))
+                elif kind == "corpus":
+                    corpus_version = data
+                elif kind == "contradiction":
+                    contradictions.append(ContradictionRecord.model_validate(data))
+                elif kind == "interrogation":
+                    sessions.append(InterrogationPrompt.model_validate(data))
+                elif kind == "submission":
+                    submissions.append(InterrogationSubmission.model_validate(data))
+        state.store.restore(records, corpus_version)
+        state.contradictions.add_many(contradictions)
+        state.interrogations.restore(sessions, submissions)
+        state._saved_revision = state.revision()
+        return state
+
+
+def _model_line(kind: str, model: BaseModel) -> str:
+    return f'{{"kind":"{kind}","data":{model.model_dump_json()}}}\n'
+
+
+class TenantRegistry:
+    def __init__(
+        self,
+        default: TenantState,
+        data_dir: Path,
+        max_resident: int = 32,
+        quota: TenantQuota | None = None,
+    ) -> None:
+        self.default = default
+        self.data_dir = data_dir
+        self.max_resident = max_resident
+        self.quota = quota or TenantQuota()
+        self._resident: OrderedDict[str, TenantState] = OrderedDict()
+        self._evicting: dict[str, TenantState] = {}
+        self._loading: dict[str, tuple[threading.Lock, int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, default: TenantState) -> TenantRegistry:
+        return cls(
+            default,
+            data_dir=Path(os.getenv("TENANT_DATA_DIR", "data/tenants")),
+            max_resident=int(os.getenv("TENANT_MAX_RESIDENT", "32")),
+            quota=default.quota,
+        )
+
+    def resolve(self, tenant_id: str | None) -> str:
+        if not tenant_id:
+            return self.default.tenant_id
+        if not _TENANT_ID.match(tenant_id):
+            raise InvalidTenantError(
+                "Tenant IDs must be 1-64 letters, digits, hyphens or underscores."
+            )
+        return tenant_id
+
+    def resident(self) -> list[str]:
+        with self._lock:
+            return list(self._resident)
+
+    @contextmanager
+    def use(self, tenant_id: str) -> Iterator[TenantState]:
+        state = self.checkout(tenant_id)
+        try:
+            yield state
+        finally:
+            self.release(state)
+
+    def checkout(self, tenant_id: str) -> TenantState:
+        if tenant_id == self.default.tenant_id:
+            return self.default
+        state = self._claim(tenant_id)
+        if state is not None:
+            return state
+        with self._load_lock(tenant_id):
+            state = self._claim(tenant_id)
+            if state is not None:
+                return state
+            path = self._path(tenant_id)
+            refine = self.default.watcher.refine
+            if path.exists():
+                state = TenantState.load(tenant_id, path, self.quota, refine)
+            else:
+                state = TenantState(tenant_id, self.quota, refine)
+            with self._lock:
+                state.leases += 1
+                self._resident[tenant_id] = state
+                evicted = self._select_evictions()
+        self._persist(evicted)
+        return state
+
+    def retain(self, state: TenantState) -> None:
+        with self._lock:
+            state.leases += 1
+
+    def release(self, state: TenantState) -> None:
+        if state is self.default:
+            return
+        with self._lock:
+            state.leases -= 1
+            evicted = self._select_evictions()
+        self._persist(evicted)
+
+    def flush(self) -> None:
+        with self._lock:
+            states = list(self._resident.values())
+        for state in states:
+            state.dump(self._path(state.tenant_id))
+
+    def _claim(self, tenant_id: str) -> TenantState | None:
+        with self._lock:
+            state = self._resident.get(tenant_id) or self._evicting.pop(tenant_id, None)
+            if state is None:
+                return None
+            state.leases += 1
+            self._resident[tenant_id] = state
+            self._resident.move_to_end(tenant_id)
+            return state
+
+    def _select_evictions(self) -> list[TenantState]:
+        evicted: list[TenantState] = []
+        overflow = len(self._resident) - self.max_resident
+        for tenant_id, state in list(self._resident.items()):
+            if overflow <= 0:
+                break
+            if state.leases:
+                continue
+            del self._resident[tenant_id]
+            self._evicting[tenant_id] = state
+            state.pending_dumps += 1
+            evicted.append(state)
+            overflow -= 1
+        return evicted
+
+    def _persist(self, states: list[TenantState]) -> None:
+        for state in states:
+            state.dump(self._path(state.tenant_id))
+            with self._lock:
+                state.pending_dumps -= 1
+                if not state.pending_dumps and self._evicting.get(state.tenant_id) is state:
+                    del self._evicting[state.tenant_id]
+
+    @contextmanager
+    def _load_lock(self, tenant_id: str) -> Iterator[None]:
+        with self._lock:
+            lock, waiters = self._loading.get(tenant_id, (threading.Lock(), 0))
+            self._loading[tenant_id] = (lock, waiters + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                lock, waiters = self._loading[tenant_id]
+                if waiters == 1:
+                    del self._loading[tenant_id]
+                else:
+                    self._loading[tenant_id] = (lock, waiters - 1)
+
+    def _path(self, tenant_id: str) -> Path:
+        return self.data_dir / f"{tenant_id}.ndjson"
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from collections.abc import Callable
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class KeywordIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[int, int]] = {}
+        self._lengths: dict[int, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc_id: int, text: str) -> None:
+        tokens = tokenize(text)
+        for term, count in Counter(tokens).items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        self._lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id: int, text: str) -> None:
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in set(tokenize(text)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._lengths.clear()
+        self._total_length = 0
+
+    def score(
+        self,
+        query: str,
+        accept: Callable[[int], bool] | None = None,
+    ) -> dict[int, float]:
+        documents = len(self._lengths)
+        if not documents:
+            return {}
+        average_length = self._total_length / documents or 1.0
+        accepted: dict[int, bool] = {}
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            frequency = len(postings)
+            idf = math.log(1 + (documents - frequency + 0.5) / (frequency + 0.5))
+            for doc_id, count in postings.items():
+                if accept is not None:
+                    allowed = accepted.get(doc_id)
+                    if allowed is None:
+                        allowed = accepted[doc_id] = accept(doc_id)
+                    if not allowed:
+                        continue
+                norm = 1 - self.b + self.b * self._lengths[doc_id] / average_length
+                weight = idf * count * (self.k1 + 1) / (count + self.k1 * norm)
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        return scores
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Collection
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from typing import Any, TypeVar
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+TRACE_HEADER = b"x-trace"
+PROFILE_HEADER = b"x-profile"
+TRACE_ID_HEADER = b"x-trace-id"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class SpanRecord(BaseModel):
+    name: str
+    parent: int | None
+    start_ms: float
+    duration_ms: float
+
+
+class TraceRecord(BaseModel):
+    id: UUID
+    method: str
+    path: str
+    status: int
+    started_at: datetime
+    duration_ms: float
+    spans: list[SpanRecord]
+    profile: list[str] | None = None
+
+
+class _ActiveTrace:
+    __slots__ = ("started", "spans", "lock", "threads")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.spans: list[list[Any]] = []
+        self.lock = threading.Lock()
+        self.threads: Counter[int] = Counter()
+
+    def open(self, name: str, parent: int | None) -> int:
+        thread_id = threading.get_ident()
+        with self.lock:
+            self.spans.append([name, parent, time.perf_counter(), None, thread_id])
+            self.threads[thread_id] += 1
+            return len(self.spans) - 1
+
+    def close(self, index: int) -> None:
+        with self.lock:
+            entry = self.spans[index]
+            entry[3] = time.perf_counter()
+            self.threads[entry[4]] -= 1
+
+    def active_threads(self) -> set[int]:
+        with self.lock:
+            return {thread_id for thread_id, count in self.threads.items() if count > 0}
+
+    def to_spans(self) -> list[SpanRecord]:
+        now = time.perf_counter()
+        return [
+            SpanRecord(
+                name=name,
+                parent=parent,
+                start_ms=(start - self.started) * 1000,
+                duration_ms=((end or now) - start) * 1000,
+            )
+            for name, parent, start, end, _ in self.spans
+        ]
+
+
+_current_trace: ContextVar[_ActiveTrace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[int | None] = ContextVar("current_span", default=None)
+
+
+class _Span:
+    __slots__ = ("_trace", "_name", "_index", "_token")
+
+    def __init__(self, trace: _ActiveTrace, name: str) -> None:
+        self._trace = trace
+        self._name = name
+
+    def __enter__(self) -> _Span:
+        self._index = self._trace.open(self._name, _current_span.get())
+        self._token = _current_span.set(self._index)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._trace.close(self._index)
+        _current_span.reset(self._token)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> _NullSpan:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str) -> _Span | _NullSpan:
+    trace = _current_trace.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, name)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            trace = _current_trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with _Span(trace, name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+class SamplingProfiler:
+    def __init__(
+        self,
+        interval: float = 0.002,
+        module_prefix: str = "app.",
+        threads: Callable[[], Collection[int]] | None = None,
+    ) -> None:
+        self.interval = interval
+        self.module_prefix = module_prefix
+        self.threads = threads
+        self._samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, limit: int = 200) -> list[str]:
+        self._stop.set()
+        self._thread.join()
+        return [f"{stack} {count}" for stack, count in self._samples.most_common(limit)]
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            threads = None if self.threads is None else self.threads()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (threads is not None and thread_id not in threads):
+                    continue
+                stack = self._collapse(frame)
+                if stack is not None:
+                    self._samples[stack] += 1
+
+    def _collapse(self, frame: Any) -> str | None:
+        names: list[str] = []
+        relevant = False
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "?")
+            relevant = relevant or module.startswith(self.module_prefix)
+            names.append(f"{module}:{frame.f_code.co_name}")
+            frame = frame.f_back
+        if not relevant:
+            return None
+        return ";".join(reversed(names))
+
+
+class TraceStore:
+    def __init__(self, capacity: int = 200) -> None:
+        self._traces: deque[TraceRecord] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def add(self, record: TraceRecord) -> None:
+        with self._lock:
+            self._traces.append(record)
+
+    def list(self, limit: int = 50) -> list[TraceRecord]:
+        with self._lock:
+            return list(reversed(self._traces))[:limit]
+
+    def get(self, trace_id: UUID) -> TraceRecord | None:
+        with self._lock:
+            return next((trace for trace in self._traces if trace.id == trace_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+
+def _chance(rate: float) -> bool:
+    return rate > 0 and random.random() < rate
+
+
+class TracingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        traces: TraceStore,
+        sample_rate: float | None = None,
+        profile_rate: float | None = None,
+        allow_profile_header: bool | None = None,
+    ) -> None:
+        self.app = app
+        self.traces = traces
+        if sample_rate is None:
+            sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+        if profile_rate is None:
+            profile_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        if allow_profile_header is None:
+            allow_profile_header = os.getenv("PROFILE_HEADER_ENABLED", "").lower() in {
+                "1",
+                "true",
+                "yes",
+            }
+        self.sample_rate = sample_rate
+        self.profile_rate = profile_rate
+        self.allow_profile_header = allow_profile_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        requested = self.allow_profile_header and headers.get(PROFILE_HEADER) == b"1"
+        profile = requested or _chance(self.profile_rate)
+        sampled = profile or headers.get(TRACE_HEADER) == b"1" or _chance(self.sample_rate)
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = uuid4()
+        trace = _ActiveTrace()
+        started_at = datetime.now(UTC)
+        profiler = SamplingProfiler(threads=trace.active_threads) if profile else None
+        status = 500
+
+        async def send_with_trace_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (TRACE_ID_HEADER, str(trace_id).encode()),
+                ]
+            await send(message)
+
+        token = _current_trace.set(trace)
+        if profiler is not None:
+            profiler.start()
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            _current_trace.reset(token)
+            self.traces.add(
+                TraceRecord(
+                    id=trace_id,
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status,
+                    started_at=started_at,
+                    duration_ms=(time.perf_counter() - trace.started) * 1000,
+                    spans=trace.to_spans(),
+                    profile=profiler.stop() if profiler is not None else None,
+                )
+            )
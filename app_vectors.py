@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import base64
+import os
+from collections.abc import Iterable, Sequence
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SIMILARITY_BATCH_SIZE = 4096
+
+
+class EmbeddingPrecision(StrEnum):
+    float32 = "float32"
+    float16 = "float16"
+    int8 = "int8"
+
+    @property
+    def dtype(self) -> str:
+        return _DTYPES[self]
+
+    @property
+    def itemsize(self) -> int:
+        return _ITEMSIZES[self]
+
+    @classmethod
+    def from_env(cls) -> EmbeddingPrecision:
+        return cls(os.getenv("EMBEDDING_PRECISION", cls.float32.value).lower())
+
+
+_DTYPES = {
+    EmbeddingPrecision.float32: "<f4",
+    EmbeddingPrecision.float16: "<f2",
+    EmbeddingPrecision.int8: "i1",
+}
+_ITEMSIZES = {
+    EmbeddingPrecision.float32: 4,
+    EmbeddingPrecision.float16: 2,
+    EmbeddingPrecision.int8: 1,
+}
+
+
+def rerank_depth_from_env() -> int:
+    return int(os.getenv("EMBEDDING_RERANK_DEPTH", "0"))
+
+
+class QuantizedVector:
+    __slots__ = ("precision", "data", "scale", "norm")
+
+    def __init__(
+        self,
+        precision: EmbeddingPrecision,
+        data: bytes,
+        scale: float,
+        norm: float,
+    ) -> None:
+        self.precision = precision
+        self.data = data
+        self.scale = scale
+        self.norm = norm
+
+    @classmethod
+    def quantize(
+        cls,
+        values: Iterable[float],
+        precision: EmbeddingPrecision = EmbeddingPrecision.float32,
+    ) -> QuantizedVector:
+        import numpy as np
+
+        vector = np.fromiter(values, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        scale = 1.0
+        if precision is EmbeddingPrecision.int8:
+            peak = float(np.abs(vector).max()) if vector.size else 0.0
+            scale = peak / 127 if peak else 1.0
+            codes = np.rint(vector / scale)
+        else:
+            codes = vector
+        return cls(precision, codes.astype(precision.dtype).tobytes(), scale, norm)
+
+    def __len__(self) -> int:
+        return len(self.data) // self.precision.itemsize
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data)
+
+    def dequantize(self) -> np.ndarray:
+        import numpy as np
+
+        codes = np.frombuffer(self.data, dtype=self.precision.dtype)
+        vector = codes.astype(np.float32)
+        if self.scale != 1.0:
+            vector *= np.float32(self.scale)
+        return vector
+
+    def tobytes(self) -> bytes:
+        if self.precision is EmbeddingPrecision.float32:
+            return self.data
+        return self.dequantize().astype("<f4").tobytes()
+
+    def tolist(self) -> list[float]:
+        return self.dequantize().tolist()
+
+    def to_snapshot(self) -> dict[str, Any]:
+        return {
+            "precision": self.precision.value,
+            "data": base64.b64encode(self.data).decode("ascii"),
+            "scale": self.scale,
+            "norm": self.norm,
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: dict[str, Any]) -> QuantizedVector:
+        return cls(
+            EmbeddingPrecision(data["precision"]),
+            base64.b64decode(data["data"]),
+            data["scale"],
+            data["norm"],
+        )
+
+
+def cosine_top_k(
+    query: Iterable[float],
+    vectors: Sequence[QuantizedVector],
+    k: int,
+    rerank: int = 0,
+    batch_size: int = SIMILARITY_BATCH_SIZE,
+) -> list[tuple[int, float]]:
+    import numpy as np
+
+    query32 = np.fromiter(query, dtype=np.float32)
+    query_norm = float(np.linalg.norm(query32))
+    if not query_norm or not vectors or k <= 0:
+        return []
+    dimensions = query32.size
+    groups: dict[EmbeddingPrecision, list[int]] = {}
+    for index, vector in enumerate(vectors):
+        if vector.norm and len(vector) == dimensions:
+            groups.setdefault(vector.precision, []).append(index)
+
+    scores = np.full(len(vectors), -np.inf, dtype=np.float32)
+    for precision, indices in groups.items():
+        probe, probe_scale = _probe(query32, precision)
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start : start + batch_size]
+            matrix = np.frombuffer(
+                b"".join(vectors[index].data for index in batch),
+                dtype=precision.dtype,
+            ).reshape(len(batch), dimensions)
+            factors = np.fromiter(
+                (vectors[index].scale / vectors[index].norm for index in batch),
+                dtype=np.float32,
+                count=len(batch),
+            )
+            scores[batch] = (matrix @ probe) * factors * np.float32(probe_scale / query_norm)
+
+    top = _top_indices(scores, max(k, rerank))
+    exact = [index for index in top if vectors[index].precision is not EmbeddingPrecision.float32]
+    if rerank and exact:
+        matrix = np.stack([vectors[index].dequantize() for index in exact])
+        norms = np.fromiter((vectors[index].norm for index in exact), dtype=np.float32)
+        scores[exact] = (matrix @ query32) / (norms * np.float32(query_norm))
+        top = sorted(top, key=lambda index: scores[index], reverse=True)
+    return [(int(index), float(scores[index])) for index in top[:k] if scores[index] > 0]
+
+
+def _probe(query: np.ndarray, precision: EmbeddingPrecision) -> tuple[np.ndarray, float]:
+    import numpy as np
+
+    if precision is not EmbeddingPrecision.int8:
+        return query, 1.0
+    peak = float(np.abs(query).max())
+    scale = peak / 127 if peak else 1.0
+    return np.rint(query / scale).astype(np.float32), scale
+
+
+def _top_indices(scores: np.ndarray, count: int) -> list[int]:
+    import numpy as np
+
+    count = min(count, int(np.count_nonzero(scores > 0)))
+    if count <= 0:
+        return []
+    if count < scores.size:
+        partition = np.argpartition(scores, -count)[-count:]
+    else:
+        partition = np.arange(scores.size)
+    return partition[np.argsort(scores[partition])[::-1]].tolist()
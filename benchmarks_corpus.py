@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from collections.abc import Iterator
+
+from app.models import ItemType, MemoryItemCreate
+
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+TOPICS = [
+    "running",
+    "the side project",
+    "Spanish lessons",
+    "the quarterly report",
+    "meal prep",
+    "the novel draft",
+    "saving for a house",
+    "learning Rust",
+    "the garden",
+    "inbox zero",
+    "the podcast",
+    "calling my parents",
+    "strength training",
+    "the launch checklist",
+    "reading before bed",
+    "the job search",
+]
+TAGS = [
+    "health",
+    "career",
+    "family",
+    "focus",
+    "learning",
+    "money",
+    "side-project",
+    "weekly",
+    "q3",
+    "habit",
+]
+GOAL_TEMPLATES = [
+    "Commit to {topic} every day this month",
+    "Finish {topic} before the end of the quarter",
+    "Get serious about {topic} and track progress weekly",
+    "I won't give up on {topic} this time",
+    "Make {topic} a non-negotiable part of the week",
+]
+NOTE_TEMPLATES = [
+    "Skipped {topic} again because work ran late",
+    "Felt great after an hour on {topic}",
+    "Thinking about whether {topic} still matters to me",
+    "I might quit {topic} if nothing changes",
+    "Do not start anything new until {topic} is done",
+    "Realized I keep postponing {topic} on Fridays",
+]
+PLAN_TEMPLATES = [
+    "Block two mornings a week for {topic}",
+    "Break {topic} into three small milestones",
+    "Ask a friend to check in on {topic} every Sunday",
+    "Abandon {topic} if it is not moving by next month",
+    "Schedule a review of {topic} after the launch",
+]
+TEMPLATES = {
+    ItemType.goal: GOAL_TEMPLATES,
+    ItemType.note: NOTE_TEMPLATES,
+    ItemType.plan: PLAN_TEMPLATES,
+}
+TYPE_WEIGHTS = {ItemType.goal: 2, ItemType.note: 5, ItemType.plan: 3}
+
+
+def parse_size(value: str) -> int:
+    normalized = value.strip().lower().replace("_", "")
+    multiplier = SIZE_SUFFIXES.get(normalized[-1:], 1)
+    if multiplier != 1:
+        normalized = normalized[:-1]
+    return int(normalized) * multiplier
+
+
+def iter_corpus(size: int, seed: int = 7) -> Iterator[MemoryItemCreate]:
+    rng = random.Random(seed)
+    types = list(TYPE_WEIGHTS)
+    weights = list(TYPE_WEIGHTS.values())
+    for index in range(size):
+        item_type = rng.choices(types, weights)[0]
+        content = rng.choice(TEMPLATES[item_type]).format(topic=rng.choice(TOPICS))
+        if rng.random() < 0.3:
+            content = f"{content} (entry {index})"
+        yield MemoryItemCreate.model_construct(
+            type=item_type,
+            content=content,
+            importance=rng.choices([1, 2, 3, 4, 5], [1, 3, 4, 2, 1])[0],
+            tags=rng.sample(TAGS, rng.choice([0, 1, 1, 2, 3])),
+        )
+
+
+def generate_corpus(size: int, seed: int = 7) -> list[MemoryItemCreate]:
+    return list(iter_corpus(size, seed))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic corpus as NDJSON.")
+    parser.add_argument("--size", default="1k", help="1k, 10k, 100k, 1m or an integer")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    for item in iter_corpus(parse_size(args.size), args.seed):
+        sys.stdout.write(item.model_dump_json() + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Benchmarks for the Second Brain That Fights You."""
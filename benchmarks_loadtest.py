@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks.corpus import TOPICS, generate_corpus, parse_size
+from benchmarks.openai_stub import OpenAIStubServer
+
+DEFAULT_MIX = (
+    "read=30,list=10,search=20,create=10,update=8,delete=2,embed=8,contradictions=7,flow=5"
+)
+SEARCH_TERMS = ["quit", "won't", "plan", *TOPICS]
+
+
+@dataclass
+class LoadConfig:
+    name: str
+    env: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Workload:
+    client: httpx.AsyncClient
+    rng: random.Random
+    item_ids: list[str]
+    payloads: list[dict[str, Any]]
+
+    def item_id(self) -> str:
+        return self.item_ids[self.rng.randrange(len(self.item_ids))]
+
+    def payload(self) -> dict[str, Any]:
+        return self.payloads[self.rng.randrange(len(self.payloads))]
+
+
+async def _read(workload: Workload) -> tuple[str, httpx.Response]:
+    return "GET /items/{id}", await workload.client.get(f"/items/{workload.item_id()}")
+
+
+async def _list(workload: Workload) -> tuple[str, httpx.Response]:
+    return "GET /items?limit", await workload.client.get("/items", params={"limit": 50})
+
+
+async def _search(workload: Workload) -> tuple[str, httpx.Response]:
+    term = workload.rng.choice(SEARCH_TERMS)
+    return "GET /items?query", await workload.client.get(
+        "/items", params={"query": term, "limit": 50}
+    )
+
+
+async def _create(workload: Workload) -> tuple[str, httpx.Response]:
+    response = await workload.client.post("/items", json=workload.payload())
+    if response.status_code == 201:
+        workload.item_ids.append(response.json()["id"])
+    return "POST /items", response
+
+
+async def _update(workload: Workload) -> tuple[str, httpx.Response]:
+    return "PUT /items/{id}", await workload.client.put(
+        f"/items/{workload.item_id()}", json=workload.payload()
+    )
+
+
+async def _delete(workload: Workload) -> tuple[str, httpx.Response]:
+    if len(workload.item_ids) <= 1:
+        return await _create(workload)
+    item_id = workload.item_ids.pop(workload.rng.randrange(len(workload.item_ids)))
+    return "DELETE /items/{id}", await workload.client.delete(f"/items/{item_id}")
+
+
+async def _embed(workload: Workload) -> tuple[str, httpx.Response]:
+    return "POST /items/{id}/embed", await workload.client.post(
+        f"/items/{workload.item_id()}/embed"
+    )
+
+
+async def _contradictions(workload: Workload) -> tuple[str, httpx.Response]:
+    return "GET /contradictions", await workload.client.get("/contradictions")
+
+
+async def _flow(workload: Workload) -> tuple[str, httpx.Response]:
+    return "POST /flows/run", await workload.client.post("/flows/run")
+
+
+OPERATIONS: dict[str, Callable[[Workload], Awaitable[tuple[str, httpx.Response]]]] = {
+    "read": _read,
+    "list": _list,
+    "search": _search,
+    "create": _create,
+    "update": _update,
+    "delete": _delete,
+    "embed": _embed,
+    "contradictions": _contradictions,
+    "flow": _flow,
+}
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix: dict[str, float] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation in mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_config(value: str) -> LoadConfig:
+    name, _, assignments = value.partition(":")
+    env: dict[str, str] = {}
+    for assignment in filter(None, assignments.split(",")):
+        key, _, env_value = assignment.partition("=")
+        env[key.strip()] = env_value.strip()
+    return LoadConfig(name=name or "default", env=env)
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(config: LoadConfig, port: int, workers: int) -> subprocess.Popen[bytes]:
+    env = {**os.environ, **config.env}
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "app.main:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        "warning",
+    ]
+    return subprocess.Popen(command, env=env)
+
+
+async def wait_until_ready(base_url: str, process: subprocess.Popen[bytes]) -> None:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(200):
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.05)
+    raise RuntimeError("Server did not become ready in time")
+
+
+async def drive(
+    base_url: str,
+    rate: float,
+    duration: float,
+    mix: dict[str, float],
+    seed_items: int,
+    max_in_flight: int,
+    seed: int,
+) -> dict[str, Any]:
+    rng = random.Random(seed)
+    corpus = [item.model_dump(mode="json") for item in generate_corpus(max(seed_items, 100), seed)]
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        seeded = await client.post("/items/bulk", json=corpus[:seed_items])
+        seeded.raise_for_status()
+        workload = Workload(client, rng, list(seeded.json()["item_ids"]), corpus)
+
+        names = list(mix)
+        weights = list(mix.values())
+        latencies: dict[str, list[float]] = {}
+        errors: dict[str, int] = {}
+        dropped = 0
+        semaphore = asyncio.Semaphore(max_in_flight)
+        tasks: list[asyncio.Task[None]] = []
+
+        async def issue(operation: str, scheduled: float) -> None:
+            try:
+                name, response = await OPERATIONS[operation](workload)
+                failed = response.status_code >= 400
+            except Exception:
+                name, failed = operation, True
+            finally:
+                semaphore.release()
+            latencies.setdefault(name, []).append(time.perf_counter() - scheduled)
+            if failed:
+                errors[name] = errors.get(name, 0) + 1
+
+        started = time.perf_counter()
+        total = int(rate * duration)
+        for index in range(total):
+            scheduled = started + index / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if semaphore.locked():
+                dropped += 1
+                continue
+            await semaphore.acquire()
+            operation = rng.choices(names, weights)[0]
+            tasks.append(asyncio.create_task(issue(operation, scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": errors.get(name, 0),
+            "error_rate": errors.get(name, 0) / len(values),
+            "throughput_rps": len(values) / elapsed,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+        }
+    completed = sum(len(values) for values in latencies.values())
+    every = sorted(value for values in latencies.values() for value in values)
+    return {
+        "target_rps": rate,
+        "duration_s": elapsed,
+        "requests": completed,
+        "dropped": dropped,
+        "throughput_rps": completed / elapsed,
+        "error_rate": sum(errors.values()) / completed if completed else 0.0,
+        "p50_ms": percentile(every, 0.50) * 1000,
+        "p95_ms": percentile(every, 0.95) * 1000,
+        "p99_ms": percentile(every, 0.99) * 1000,
+        "endpoints": endpoints,
+    }
+
+
+def run_config(config: LoadConfig, args: argparse.Namespace) -> dict[str, Any]:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = start_server(config, port, args.workers)
+    try:
+        asyncio.run(wait_until_ready(base_url, process))
+        return asyncio.run(
+            drive(
+                base_url,
+                rate=args.rate,
+                duration=args.duration,
+                mix=args.mix,
+                seed_items=args.seed_items,
+                max_in_flight=args.max_in_flight,
+                seed=args.seed,
+            )
+        )
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def print_report(name: str, report: dict[str, Any]) -> None:
+    print(
+        f"\n[{name}] {report['requests']} requests in {report['duration_s']:.1f}s "
+        f"({report['throughput_rps']:.1f} rps of {report['target_rps']:.0f} target, "
+        f"{report['dropped']} dropped, {report['error_rate']:.2%} errors) "
+        f"p50={report['p50_ms']:.1f}ms p95={report['p95_ms']:.1f}ms p99={report['p99_ms']:.1f}ms"
+    )
+    print(f"{'endpoint':<28}{'reqs':>7}{'rps':>8}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:<28}{stats['requests']:>7}{stats['throughput_rps']:>8.1f}"
+            f"{stats['error_rate'] * 100:>7.1f}{stats['p50_ms']:>9.1f}"
+            f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+        )
+
+
+def print_comparison(reports: dict[str, dict[str, Any]]) -> None:
+    first, second = list(reports)[:2]
+    before, after = reports[first]["endpoints"], reports[second]["endpoints"]
+    print(f"\n{first} -> {second} (p99 ms)")
+    for endpoint in sorted(set(before) | set(after)):
+        old = before.get(endpoint, {}).get("p99_ms")
+        new = after.get(endpoint, {}).get("p99_ms")
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        print(f"{endpoint:<28}{old:>9.1f}{new:>9.1f}{change:>+9.1%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Drive a local uvicorn app with mixed traffic.")
+    parser.add_argument("--rate", type=float, default=50.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--seed-items", type=parse_size, default=1_000)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--config",
+        type=parse_config,
+        action="append",
+        help="NAME:ENV=VALUE,ENV=VALUE; pass twice to compare two configurations",
+    )
+    parser.add_argument(
+        "--openai-stub",
+        action="store_true",
+        help="Serve a local /v1/embeddings stub and point OPENAI_BASE_URL at it",
+    )
+    parser.add_argument(
+        "--openai-stub-latency",
+        type=float,
+        default=0.0,
+        help="Seconds the stub waits before answering each request",
+    )
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+    if args.workers > 1:
+        parser.error(
+            "--workers must be 1: the store is in memory, so items seeded through one "
+            "worker are missing from the others"
+        )
+
+    configs = args.config or [LoadConfig(name="default")]
+    reports: dict[str, dict[str, Any]] = {}
+    with ExitStack() as stack:
+        if args.openai_stub:
+            stub = stack.enter_context(OpenAIStubServer(latency=args.openai_stub_latency))
+            for config in configs:
+                config.env.setdefault("OPENAI_BASE_URL", stub.base_url)
+                config.env.setdefault("OPENAI_API_KEY", "stub")
+        for config in configs:
+            reports[config.name] = run_config(config, args)
+            print_report(config.name, reports[config.name])
+    if len(reports) >= 2:
+        print_comparison(reports)
+    if args.output:
+        Path(args.output).write_text(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
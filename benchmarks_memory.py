@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+from collections.abc import Callable
+from datetime import UTC, datetime
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel, Field
+
+from app.models import EmbeddingStatus, ItemType, MemoryItemRecord
+from benchmarks.corpus import iter_corpus, parse_size
+
+
+class LegacyMemoryItemRecord(BaseModel):
+    id: UUID = Field(default_factory=uuid4)
+    type: ItemType
+    content: str
+    importance: int
+    tags: list[str]
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    embedding_status: EmbeddingStatus = EmbeddingStatus.pending
+    embedding: list[float] | None = None
+
+
+def _rows(count: int, seed: int) -> list[tuple[ItemType, str, int, list[str]]]:
+    return [
+        (item.type, item.content, item.importance, item.tags)
+        for item in iter_corpus(count, seed)
+    ]
+
+
+def measure(factory: Callable[..., object], rows: list, embedding_dim: int) -> float:
+    embedding = [0.0] * embedding_dim if embedding_dim else None
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    records = [
+        factory(
+            type=item_type,
+            content=content,
+            importance=importance,
+            tags=tags,
+            embedding=embedding,
+        )
+        for item_type, content, importance, tags in rows
+    ]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return (current - baseline) / len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report bytes per stored memory item.")
+    parser.add_argument("--items", type=parse_size, default=1_000_000)
+    parser.add_argument("--embedding-dim", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rows = _rows(args.items, args.seed)
+    before = measure(LegacyMemoryItemRecord, rows, args.embedding_dim)
+    after = measure(MemoryItemRecord, rows, args.embedding_dim)
+    print(f"items={args.items} embedding_dim={args.embedding_dim}")
+    print(f"pydantic record: {before:,.0f} bytes/item")
+    print(f"slotted record:  {after:,.0f} bytes/item")
+    print(f"saved:           {1 - after / before:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_embedding(text: str, dimensions: int) -> list[float]:
+    seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+    rng = random.Random(seed)
+    return [rng.uniform(-1.0, 1.0) for _ in range(dimensions)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: OpenAIStubServer
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/v1/embeddings":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("content-length", "0"))
+        payload = json.loads(self.rfile.read(length))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        inputs = payload["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        body = json.dumps(
+            {
+                "object": "list",
+                "model": payload.get("model"),
+                "data": [
+                    {
+                        "object": "embedding",
+                        "index": index,
+                        "embedding": stub_embedding(text, self.server.dimensions),
+                    }
+                    for index, text in enumerate(inputs)
+                ],
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        return None
+
+
+class OpenAIStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        dimensions: int = 1536,
+        latency: float = 0.0,
+    ) -> None:
+        super().__init__((host, port), _Handler)
+        self.dimensions = dimensions
+        self.latency = latency
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self) -> OpenAIStubServer:
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for /v1/embeddings.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per response")
+    args = parser.parse_args()
+    server = OpenAIStubServer(args.host, args.port, args.dimensions, args.latency)
+    print(f"OpenAI stub listening on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
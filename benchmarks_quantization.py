@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+
+import numpy as np
+
+from app.vectors import EmbeddingPrecision, QuantizedVector, cosine_top_k
+from benchmarks.corpus import parse_size
+
+
+def synthetic_embeddings(
+    count: int,
+    dimensions: int,
+    clusters: int,
+    seed: int,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dimensions))
+    members = rng.integers(0, clusters, size=count)
+    return centroids[members] + 0.6 * rng.standard_normal((count, dimensions))
+
+
+def bytes_per_vector(factory: Callable[[np.ndarray], object], matrix: np.ndarray) -> float:
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    stored = [factory(row) for row in matrix]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del stored
+    return (current - baseline) / len(matrix)
+
+
+def exact_top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> set[int]:
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    scores = (matrix @ query) / norms
+    return set(np.argsort(scores)[::-1][:k].tolist())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare memory and recall of quantized embedding storage."
+    )
+    parser.add_argument("--items", type=parse_size, default=20_000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    matrix = synthetic_embeddings(args.items, args.dimensions, args.clusters, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.integers(0, args.items, size=args.queries)
+    queries = matrix[picks] + 0.3 * rng.standard_normal((args.queries, args.dimensions))
+    truth = [exact_top_k(matrix, query, args.k) for query in queries]
+
+    baseline = bytes_per_vector(np.ndarray.tolist, matrix)
+    print(f"items={args.items} dimensions={args.dimensions} k={args.k} rerank={args.rerank}")
+    print(f"{'storage':<20}{'bytes/vector':>14}{'saved':>9}{'recall':>9}{'p50 ms':>9}")
+    print(f"{'list[float]':<20}{baseline:>14,.0f}{'':>9}{1.0:>9.3f}{'':>9}")
+    for precision in EmbeddingPrecision:
+        size = bytes_per_vector(lambda row, p=precision: QuantizedVector.quantize(row, p), matrix)
+        vectors = [QuantizedVector.quantize(row, precision) for row in matrix]
+        reranks = (0,) if precision is EmbeddingPrecision.float32 else (0, args.rerank)
+        for rerank in reranks:
+            recalls: list[float] = []
+            timings: list[float] = []
+            for query, expected in zip(queries, truth, strict=True):
+                started = time.perf_counter()
+                ranked = cosine_top_k(query.tolist(), vectors, args.k, rerank=rerank)
+                timings.append(time.perf_counter() - started)
+                recalls.append(len(expected & {index for index, _ in ranked}) / args.k)
+            label = precision.value + (f"+rerank{rerank}" if rerank else "")
+            print(
+                f"{label:<20}{size:>14,.0f}{1 - size / baseline:>9.1%}"
+                f"{statistics.mean(recalls):>9.3f}{statistics.median(timings) * 1000:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable
+
+from pydantic import TypeAdapter
+
+from app.models import MemoryItem, MemoryItemRecord
+from app.serialization import json_array
+from app.storage import MemoryStore
+from benchmarks.corpus import generate_corpus, parse_size
+
+_response_adapter = TypeAdapter(list[MemoryItem])
+
+
+def _records(count: int, seed: int) -> list[MemoryItemRecord]:
+    return MemoryStore().add_many(generate_corpus(count, seed))
+
+
+def legacy_path(records: list[MemoryItemRecord]) -> bytes:
+    items = [
+        MemoryItem(
+            id=record.id,
+            type=record.type,
+            content=record.content,
+            importance=record.importance,
+            tags=list(record.tags),
+            created_at=record.created_at,
+            embedding_status=record.embedding_status,
+        )
+        for record in records
+    ]
+    return _response_adapter.dump_json(_response_adapter.validate_python(items))
+
+
+def cold_path(records: list[MemoryItemRecord]) -> bytes:
+    for record in records:
+        record.invalidate()
+    return json_array(record.to_json() for record in records)
+
+
+def warm_path(records: list[MemoryItemRecord]) -> bytes:
+    return json_array(record.to_json() for record in records)
+
+
+def per_item_us(
+    path: Callable[[list[MemoryItemRecord]], bytes],
+    records: list[MemoryItemRecord],
+    repeat: int,
+) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        path(records)
+        best = min(best, time.perf_counter() - start)
+    return best / len(records) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare list endpoint serialization paths.")
+    parser.add_argument("--items", type=parse_size, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    records = _records(args.items, args.seed)
+    assert legacy_path(records) == warm_path(records)
+    legacy = per_item_us(legacy_path, records, args.repeat)
+    cold = per_item_us(cold_path, records, args.repeat)
+    warm_path(records)
+    warm = per_item_us(warm_path, records, args.repeat)
+    print(f"items={args.items}")
+    print(f"pydantic rebuild + validate: {legacy:.2f} us/item")
+    print(f"direct encode (cold cache):  {cold:.2f} us/item ({legacy / cold:.1f}x)")
+    print(f"direct encode (warm cache):  {warm:.2f} us/item ({legacy / warm:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
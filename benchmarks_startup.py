@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.loadtest import LoadConfig, free_port, start_server, wait_until_ready
+
+HEAVY_MODULES = ("sklearn", "scipy", "numpy", "httpx")
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def measure_import(runs: int, env: dict[str, str]) -> dict[str, object]:
+    timings: list[float] = []
+    loaded: list[str] = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE % (HEAVY_MODULES,)],
+            capture_output=True,
+            check=True,
+            env={**os.environ, **env},
+            text=True,
+        ).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        timings.append(probe["seconds"])
+        loaded = probe["loaded"]
+    return {"median_s": statistics.median(timings), "min_s": min(timings), "loaded": loaded}
+
+
+def top_imports(limit: int) -> list[tuple[int, str]]:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stderr
+    entries: list[tuple[int, str]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        entries.append((int(cumulative), name.rstrip()))
+    return sorted(entries, reverse=True)[:limit]
+
+
+async def _first_embed(base_url: str) -> float:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+        created = await client.post(
+            "/items",
+            json={"type": "note", "content": "Time the first embedding", "importance": 2},
+        )
+        started = time.perf_counter()
+        response = await client.post(f"/items/{created.json()['id']}/embed")
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+
+def measure_cold_start(config: LoadConfig) -> dict[str, float]:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = start_server(config, port, workers=1)
+    try:
+        asyncio.run(wait_until_ready(base_url, process))
+        ready = time.perf_counter() - started
+        first_embed = asyncio.run(_first_embed(base_url))
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return {"ready_s": ready, "first_embed_s": first_embed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure import time and cold start.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--serve", action="store_true", help="Also time uvicorn cold starts")
+    args = parser.parse_args()
+
+    result = measure_import(args.runs, {})
+    print(
+        f"import app.main: median {result['median_s'] * 1000:.0f}ms "
+        f"min {result['min_s'] * 1000:.0f}ms, heavy modules loaded: {result['loaded'] or 'none'}"
+    )
+    print("\nslowest imports (cumulative us):")
+    for cumulative, name in top_imports(args.top):
+        print(f"{cumulative:>10} {name}")
+
+    if args.serve:
+        print()
+        for name, env in (("lazy", {}), ("warm-up", {"EMBEDDING_WARMUP": "1"})):
+            timings = measure_cold_start(LoadConfig(name=name, env=env))
+            print(
+                f"{name:<8} ready in {timings['ready_s'] * 1000:.0f}ms, "
+                f"first embed {timings['first_embed_s'] * 1000:.0f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,517 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+import httpx
+
+from app import main as app_main
+from app.contradictions import detect_contradictions
+from app.embeddings import OpenAIEmbeddingProvider, TfidfEmbeddingProvider
+from app.interrogation import InterrogationFrequency, generate_interrogation
+from app.models import MemoryItem, MemoryItemCreate, MemoryItemRecord
+from app.storage import MemoryStore, item_key
+from benchmarks.corpus import generate_corpus, parse_size
+from benchmarks.openai_stub import OpenAIStubServer
+
+DEFAULT_OUTPUT = "benchmark-results.json"
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+
+@dataclass
+class Context:
+    size: int
+    corpus: list[MemoryItemCreate]
+    store: MemoryStore
+    records: list[MemoryItemRecord]
+    public: list[MemoryItem]
+    contents: list[str]
+    openai: OpenAIEmbeddingProvider
+    rng: random.Random = field(default_factory=lambda: random.Random(11))
+
+    def pick(self) -> MemoryItemRecord:
+        return self.records[self.rng.randrange(len(self.records))]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    run: Callable[[Context], Any]
+    max_size: int = 1_000_000
+    repeat: int = 5
+
+
+@dataclass
+class EndpointBenchmark:
+    name: str
+    request: Callable[[httpx.AsyncClient, Context], Awaitable[httpx.Response]]
+    max_size: int = 1_000_000
+    repeat: int = 5
+
+
+def _store_update(context: Context) -> None:
+    record = context.pick()
+    context.store.update(record.id, context.corpus[context.rng.randrange(context.size)])
+
+
+def _store_add_delete(context: Context) -> None:
+    record = context.store.add(context.corpus[0])
+    context.store.delete(record.id)
+
+
+def _store_page(context: Context) -> None:
+    after = item_key(context.records[context.size // 2])
+    context.store.page(after=after, limit=100)
+
+
+def _store_iter(context: Context) -> None:
+    for _ in context.store.iter():
+        pass
+
+
+def _bulk_add(context: Context) -> None:
+    MemoryStore().add_many(context.corpus)
+
+
+STORE_BENCHMARKS = [
+    Benchmark("store.add_many", _bulk_add, repeat=3),
+    Benchmark("store.add_delete", _store_add_delete),
+    Benchmark("store.get", lambda context: context.store.get(context.pick().id)),
+    Benchmark("store.update", _store_update),
+    Benchmark("store.list", lambda context: context.store.list()),
+    Benchmark("store.list_query", lambda context: context.store.list(query="quit")),
+    Benchmark("store.page", _store_page),
+    Benchmark("store.iter", _store_iter, repeat=3),
+]
+
+PROVIDER_BENCHMARKS = [
+    Benchmark(
+        "tfidf.embed_text",
+        lambda context: TfidfEmbeddingProvider().embed_text(context.contents[0], context.contents),
+        max_size=100_000,
+        repeat=3,
+    ),
+    Benchmark(
+        "tfidf.embed_texts_100",
+        lambda context: TfidfEmbeddingProvider().embed_texts(
+            context.contents[:100], context.contents
+        ),
+        max_size=100_000,
+        repeat=3,
+    ),
+    Benchmark(
+        "openai_stub.embed_text",
+        lambda context: context.openai.embed_text(context.contents[0], []),
+    ),
+    Benchmark(
+        "openai_stub.embed_texts_100",
+        lambda context: context.openai.embed_texts(context.contents[:100], []),
+    ),
+]
+
+ANALYSIS_BENCHMARKS = [
+    Benchmark("detect_contradictions", lambda context: detect_contradictions(context.public)),
+    Benchmark(
+        "generate_interrogation.daily",
+        lambda context: generate_interrogation(context.public, InterrogationFrequency.daily),
+    ),
+    Benchmark(
+        "generate_interrogation.weekly",
+        lambda context: generate_interrogation(context.public, InterrogationFrequency.weekly),
+    ),
+]
+
+
+def _item_payload(context: Context) -> dict[str, Any]:
+    return context.corpus[context.rng.randrange(context.size)].model_dump(mode="json")
+
+
+async def _create_and_delete(client: httpx.AsyncClient, context: Context) -> httpx.Response:
+    created = await client.post("/items", json=_item_payload(context))
+    return await client.delete(f"/items/{created.json()['id']}")
+
+
+async def _submit_response(client: httpx.AsyncClient, context: Context) -> httpx.Response:
+    session = app_main.interrogation_store.list_sessions()[-1]
+    payload = {
+        "answers": [{"question": session.questions[0], "response": "Stop stalling."}],
+        "forced_choice": "Ship it",
+        "finish_or_delete": "Delete the stale plan",
+    }
+    return await client.post(f"/interrogations/{session.id}/responses", json=payload)
+
+
+async def _list_responses(client: httpx.AsyncClient, context: Context) -> httpx.Response:
+    session = app_main.interrogation_store.list_sessions()[-1]
+    return await client.get(f"/interrogations/{session.id}/responses")
+
+
+async def _get_trace(client: httpx.AsyncClient, context: Context) -> httpx.Response:
+    trace = app_main.trace_store.list(limit=1)[0]
+    return await client.get(f"/debug/traces/{trace.id}")
+
+
+async def _open_feed(client: httpx.AsyncClient, context: Context) -> httpx.Response:
+    connected = asyncio.Event()
+    status = 500
+
+    async def receive() -> dict[str, Any]:
+        await connected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            connected.set()
+
+    path = "/contradictions/feed"
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("bench", 0),
+        "server": ("bench", 80),
+    }
+    await app_main.app(scope, receive, send)
+    return httpx.Response(status, request=httpx.Request("GET", f"http://bench{path}"))
+
+
+async def _bulk_import(client: httpx.AsyncClient, context: Context) -> httpx.Response:
+    payload = [item.model_dump(mode="json") for item in context.corpus[:1000]]
+    response = await client.post("/items/bulk", json=payload)
+    for item_id in response.json()["item_ids"]:
+        app_main.store.delete(UUID(item_id))
+    return response
+
+
+ENDPOINT_BENCHMARKS = [
+    EndpointBenchmark("GET /", lambda client, context: client.get("/")),
+    EndpointBenchmark("GET /health", lambda client, context: client.get("/health")),
+    EndpointBenchmark("GET /items", lambda client, context: client.get("/items"), 100_000),
+    EndpointBenchmark(
+        "GET /items?limit=100",
+        lambda client, context: client.get("/items", params={"limit": 100}),
+    ),
+    EndpointBenchmark(
+        "GET /items?query",
+        lambda client, context: client.get("/items", params={"query": "quit"}),
+        100_000,
+    ),
+    EndpointBenchmark(
+        "GET /items?tags",
+        lambda client, context: client.get(
+            "/items", params={"tags": "health OR NOT career", "limit": 100}
+        ),
+    ),
+    EndpointBenchmark(
+        "GET /items/{id}",
+        lambda client, context: client.get(f"/items/{context.pick().id}"),
+    ),
+    EndpointBenchmark(
+        "POST /items",
+        lambda client, context: client.post("/items", json=_item_payload(context)),
+    ),
+    EndpointBenchmark(
+        "PUT /items/{id}",
+        lambda client, context: client.put(
+            f"/items/{context.pick().id}", json=_item_payload(context)
+        ),
+    ),
+    EndpointBenchmark("DELETE /items/{id}", _create_and_delete),
+    EndpointBenchmark("POST /items/bulk", _bulk_import, repeat=3),
+    EndpointBenchmark(
+        "GET /items/export",
+        lambda client, context: client.get("/items/export"),
+        100_000,
+        repeat=3,
+    ),
+    EndpointBenchmark(
+        "GET /items/export/embeddings",
+        lambda client, context: client.get("/items/export/embeddings"),
+        100_000,
+        repeat=3,
+    ),
+    EndpointBenchmark(
+        "GET /items/duplicates",
+        lambda client, context: client.get("/items/duplicates"),
+        100_000,
+        repeat=3,
+    ),
+    EndpointBenchmark("GET /tags", lambda client, context: client.get("/tags")),
+    EndpointBenchmark(
+        "GET /tags?tags",
+        lambda client, context: client.get("/tags", params={"tags": "NOT career"}),
+    ),
+    EndpointBenchmark(
+        "POST /items/{id}/embedding",
+        lambda client, context: client.post(f"/items/{context.pick().id}/embedding"),
+    ),
+    EndpointBenchmark(
+        "POST /items/{id}/embed",
+        lambda client, context: client.post(f"/items/{context.pick().id}/embed"),
+        100_000,
+        repeat=3,
+    ),
+    EndpointBenchmark(
+        "POST /items/embeddings/refresh",
+        lambda client, context: client.post("/items/embeddings/refresh"),
+        1_000,
+        repeat=1,
+    ),
+    EndpointBenchmark(
+        "GET /contradictions",
+        lambda client, context: client.get("/contradictions"),
+        100_000,
+        repeat=3,
+    ),
+    EndpointBenchmark("GET /contradictions/feed", _open_feed),
+    EndpointBenchmark(
+        "POST /contradictions/run",
+        lambda client, context: client.post("/contradictions/run"),
+        100_000,
+        repeat=3,
+    ),
+    EndpointBenchmark(
+        "GET /contradictions/history",
+        lambda client, context: client.get("/contradictions/history"),
+        100_000,
+        repeat=3,
+    ),
+    EndpointBenchmark(
+        "GET /search",
+        lambda client, context: client.get("/search", params={"q": "quit"}),
+        100_000,
+        repeat=3,
+    ),
+    EndpointBenchmark(
+        "POST /interrogations",
+        lambda client, context: client.post("/interrogations"),
+        repeat=3,
+    ),
+    EndpointBenchmark(
+        "GET /interrogations/history",
+        lambda client, context: client.get("/interrogations/history"),
+    ),
+    EndpointBenchmark("POST /interrogations/{id}/responses", _submit_response),
+    EndpointBenchmark("GET /interrogations/{id}/responses", _list_responses),
+    EndpointBenchmark(
+        "POST /flows/run",
+        lambda client, context: client.post("/flows/run"),
+        100_000,
+        repeat=3,
+    ),
+    EndpointBenchmark(
+        "GET /analytics/summary", lambda client, context: client.get("/analytics/summary")
+    ),
+    EndpointBenchmark(
+        "GET /analytics/timeseries",
+        lambda client, context: client.get(
+            "/analytics/timeseries", params={"metric": "items_created", "window": "24h"}
+        ),
+    ),
+    EndpointBenchmark("GET /tenant", lambda client, context: client.get("/tenant")),
+    EndpointBenchmark("GET /metrics", lambda client, context: client.get("/metrics")),
+    EndpointBenchmark("GET /debug/traces", lambda client, context: client.get("/debug/traces")),
+    EndpointBenchmark("GET /debug/traces/{id}", _get_trace),
+]
+
+
+def _result(name: str, size: int, durations: list[float]) -> dict[str, Any]:
+    return {
+        "name": name,
+        "size": size,
+        "repeat": len(durations),
+        "min_s": min(durations),
+        "median_s": statistics.median(durations),
+        "mean_s": statistics.fmean(durations),
+    }
+
+
+def _time(func: Callable[[], Any], repeat: int) -> list[float]:
+    durations: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+async def _time_async(
+    func: Callable[[], Awaitable[httpx.Response]],
+    repeat: int,
+) -> list[float]:
+    durations: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await func()
+        durations.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{response.request.url} returned {response.status_code}")
+    return durations
+
+
+def _build_context(size: int, openai: OpenAIEmbeddingProvider, seed: int) -> Context:
+    corpus = generate_corpus(size, seed)
+    store = MemoryStore()
+    records = store.add_many(corpus)
+    return Context(
+        size=size,
+        corpus=corpus,
+        store=store,
+        records=records,
+        public=[record.to_public() for record in records],
+        contents=[item.content for item in corpus],
+        openai=openai,
+    )
+
+
+def _reset_app(context: Context) -> None:
+    app_main.store.clear()
+    app_main.contradiction_store.clear()
+    app_main.interrogation_store.clear()
+    app_main.analytics_store.clear()
+    app_main.trace_store.clear()
+    context.records = app_main.store.add_many(context.corpus)
+
+
+async def _run_endpoints(
+    context: Context,
+    selected: Callable[[str], bool],
+) -> list[dict[str, Any]]:
+    _reset_app(context)
+    results: list[dict[str, Any]] = []
+    transport = httpx.ASGITransport(app=app_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/interrogations")
+        await client.get("/health", headers={"X-Trace": "1"})
+        for benchmark in ENDPOINT_BENCHMARKS:
+            if benchmark.max_size < context.size or not selected(benchmark.name):
+                continue
+            durations = await _time_async(
+                lambda benchmark=benchmark: benchmark.request(client, context),
+                benchmark.repeat,
+            )
+            results.append(_result(f"endpoint {benchmark.name}", context.size, durations))
+            _print_result(results[-1])
+    return results
+
+
+def run_suite(
+    sizes: list[int],
+    seed: int = 7,
+    selected: Callable[[str], bool] = lambda name: True,
+) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+    with OpenAIStubServer() as stub:
+        openai = OpenAIEmbeddingProvider(api_key="stub", base_url=stub.base_url)
+        for size in sizes:
+            context = _build_context(size, openai, seed)
+            for benchmark in STORE_BENCHMARKS + PROVIDER_BENCHMARKS + ANALYSIS_BENCHMARKS:
+                if benchmark.max_size < size or not selected(benchmark.name):
+                    continue
+                durations = _time(
+                    lambda benchmark=benchmark, context=context: benchmark.run(context),
+                    benchmark.repeat,
+                )
+                results.append(_result(benchmark.name, size, durations))
+                _print_result(results[-1])
+            results.extend(asyncio.run(_run_endpoints(context, selected)))
+    return results
+
+
+def compare(
+    results: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    threshold: float,
+) -> list[dict[str, Any]]:
+    previous = {(entry["name"], entry["size"]): entry for entry in baseline}
+    regressions: list[dict[str, Any]] = []
+    for entry in results:
+        before = previous.get((entry["name"], entry["size"]))
+        if before is None or before["median_s"] <= 0:
+            continue
+        ratio = entry["median_s"] / before["median_s"]
+        if ratio > 1 + threshold:
+            regressions.append({**entry, "baseline_median_s": before["median_s"], "ratio": ratio})
+    return regressions
+
+
+def _print_result(entry: dict[str, Any]) -> None:
+    print(
+        f"{entry['name']:<45} size={entry['size']:>9,} "
+        f"median={entry['median_s'] * 1000:>10.3f}ms min={entry['min_s'] * 1000:>10.3f}ms",
+        flush=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("--sizes", default="1k,10k", help="Comma separated: 1k,10k,100k,1m")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--filter", default="", help="Only run benchmarks containing this text")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size]
+    results = run_suite(sizes, args.seed, lambda name: args.filter in name)
+    report = {
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Saved baseline to {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; skipping regression check.")
+        return
+    baseline = json.loads(baseline_path.read_text())["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for entry in regressions:
+        print(
+            f"REGRESSION {entry['name']} size={entry['size']:,}: "
+            f"{entry['baseline_median_s'] * 1000:.3f}ms -> {entry['median_s'] * 1000:.3f}ms "
+            f"({entry['ratio']:.2f}x)"
+        )
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%} of baseline.")
+
+
+if __name__ == "__main__":
+    main()
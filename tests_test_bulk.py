@@ -0,0 +1,65 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import analytics_store, app, store
+
+
+def test_bulk_import_reports_row_errors() -> None:
+    store.clear()
+    analytics_store.clear()
+    client = TestClient(app)
+
+    payload = [
+        {"type": "goal", "content": "Run a marathon", "importance": 5, "tags": ["health"]},
+        {"type": "note", "content": "", "importance": 2, "tags": []},
+        {"type": "plan", "content": "Train three times a week", "importance": 9, "tags": []},
+        {"type": "plan", "content": "Buy running shoes", "importance": 3, "tags": []},
+    ]
+    response = client.post("/items/bulk", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["embedding_queued"] is False
+    assert [error["index"] for error in data["errors"]] == [1, 2]
+    assert "importance" in data["errors"][1]["errors"][0]
+
+    list_response = client.get("/items")
+    assert [item["content"] for item in list_response.json()] == [
+        "Run a marathon",
+        "Buy running shoes",
+    ]
+    assert analytics_store.summary().items_created == 2
+
+
+def test_bulk_import_ndjson_with_embedding() -> None:
+    store.clear()
+    analytics_store.clear()
+    client = TestClient(app)
+
+    lines = [
+        json.dumps({"type": "note", "content": "Import old journal", "importance": 2}),
+        "{not json",
+        json.dumps({"type": "goal", "content": "Write every morning", "importance": 4}),
+    ]
+    response = client.post(
+        "/items/bulk",
+        params={"embed": "true"},
+        content="\n".join(lines),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["embedding_queued"] is True
+    assert data["errors"] == [{"index": 1, "errors": ["Line is not valid JSON."]}]
+
+    statuses = {item["embedding_status"] for item in client.get("/items").json()}
+    assert statuses == {"completed"}
+    assert analytics_store.summary().embeddings_created == 2
+
+
+def test_bulk_import_rejects_non_array_body() -> None:
+    client = TestClient(app)
+    response = client.post("/items/bulk", json={"type": "goal"})
+    assert response.status_code == 400
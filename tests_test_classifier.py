@@ -0,0 +1,103 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.classifier import (
+    ContradictionClassifier,
+    ContradictionModelError,
+    LocalContradictionModel,
+)
+from app.contradiction_store import ContradictionStore
+from app.contradiction_watch import ContradictionWatcher
+from app.main import app, contradiction_store, get_classifier, store
+from app.models import MemoryItemCreate
+from app.storage import MemoryStore
+
+NEGATED = "Not run every morning"
+PLAN = "Run every morning with the club"
+OTHER = "Book the dentist appointment"
+
+
+def test_local_model_is_deterministic() -> None:
+    model = LocalContradictionModel()
+
+    first, second = model.classify([(NEGATED, PLAN), (NEGATED, OTHER)])
+
+    assert first.contradicts and first.confidence == 0.675
+    assert not second.contradicts
+    assert model.classify([(NEGATED, PLAN)]) == [first]
+
+
+def test_pairs_share_one_model_call_and_cache_by_version() -> None:
+    model = LocalContradictionModel()
+    classifier = ContradictionClassifier(model)
+    pairs = [(NEGATED, f"{PLAN} {index}") for index in range(5)]
+
+    assert all(classifier.verdicts(pairs, budget=2))
+    assert classifier.verdicts([(pair[1], pair[0]) for pair in pairs], budget=2)
+    assert model.calls == 1
+
+    model.version = "local-2"
+    classifier.verdicts(pairs[:1], budget=2)
+    assert model.calls == 2
+    classifier.close()
+
+
+def test_budget_falls_back_to_rule_confidence() -> None:
+    classifier = ContradictionClassifier(LocalContradictionModel(delay=0.2))
+
+    assert classifier.verdicts([(NEGATED, PLAN)], budget=0.01) == [None]
+
+    deadline = time.monotonic() + 2
+    while classifier.cached(NEGATED, PLAN) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert classifier.cached(NEGATED, PLAN).contradicts
+    classifier.close()
+
+
+def test_contradiction_run_uses_classifier(monkeypatch: pytest.MonkeyPatch) -> None:
+    store.clear()
+    contradiction_store.clear()
+    classifier = ContradictionClassifier(LocalContradictionModel(), budget=2)
+    monkeypatch.setattr("app.main.get_classifier", lambda: classifier)
+    client = TestClient(app)
+    for content in (NEGATED, PLAN):
+        client.post("/items", json={"type": "plan", "content": content, "importance": 3})
+
+    records = client.post("/contradictions/run").json()
+
+    assert [(record["type"], record["confidence"]) for record in records] == [
+        ("content_conflict", 0.675)
+    ]
+    classifier.close()
+
+
+def test_watcher_results_pass_through_the_classifier() -> None:
+    memory = MemoryStore()
+    classifier = ContradictionClassifier(LocalContradictionModel(), budget=2)
+    watcher = ContradictionWatcher(
+        memory,
+        ContradictionStore(),
+        delay=60,
+        refine=classifier.refine,
+    )
+    negated = memory.add(MemoryItemCreate(type="plan", content=NEGATED, importance=3))
+    for content in (PLAN, "Run every morning, then cycle, swim, lift weights and stretch"):
+        memory.add(MemoryItemCreate(type="plan", content=content, importance=3))
+
+    watcher.schedule(negated.id)
+    found = watcher.flush()
+
+    assert [(record.type, record.confidence) for record in found] == [("content_conflict", 0.675)]
+    assert watcher.contradictions.list() == found
+    classifier.close()
+
+
+def test_unknown_model_fails_at_startup(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("CONTRADICTION_MODEL", "remote")
+    get_classifier.cache_clear()
+
+    with pytest.raises(ContradictionModelError), TestClient(app):
+        pass
+    get_classifier.cache_clear()
@@ -0,0 +1,74 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.coalescing import SingleFlight
+from app.main import analytics_store, app, store
+from app.models import MemoryItemCreate
+
+
+def test_concurrent_calls_share_one_flight() -> None:
+    flights: SingleFlight[int] = SingleFlight()
+    calls = 0
+
+    async def compute() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    async def run() -> list[int]:
+        return list(await asyncio.gather(*(flights.run("item", 1, compute) for _ in range(5))))
+
+    assert asyncio.run(run()) == [42] * 5
+    assert calls == 1
+
+
+def test_newer_version_supersedes_stale_flight() -> None:
+    flights: SingleFlight[str] = SingleFlight()
+    started: list[int] = []
+
+    def compute(version: int) -> asyncio.Future[str]:
+        async def work() -> str:
+            started.append(version)
+            await asyncio.sleep(0.05)
+            return f"v{version}"
+
+        return asyncio.ensure_future(work())
+
+    async def run() -> list[str]:
+        stale = asyncio.ensure_future(flights.run("item", 1, lambda: compute(1)))
+        await asyncio.sleep(0)
+        fresh = flights.run("item", 2, lambda: compute(2))
+        return list(await asyncio.gather(stale, fresh))
+
+    assert asyncio.run(run()) == ["v2", "v2"]
+    assert started == [1, 2]
+
+
+def test_stale_embedding_write_is_rejected() -> None:
+    store.clear()
+    record = store.add(MemoryItemCreate(type="note", content="Draft", importance=2, tags=[]))
+    version = record.version
+
+    store.update(record.id, MemoryItemCreate(type="note", content="Final", importance=2, tags=[]))
+
+    assert store.update_embedding(record.id, [1.0], version=version) is None
+    assert store.update_embedding(record.id, [1.0], version=record.version) is record
+
+
+def test_refresh_after_embed_returns_current_items() -> None:
+    store.clear()
+    analytics_store.clear()
+    client = TestClient(app)
+    item_id = client.post(
+        "/items",
+        json={"type": "goal", "content": "Embed once", "importance": 3, "tags": []},
+    ).json()["id"]
+
+    assert client.post(f"/items/{item_id}/embed").status_code == 200
+    refreshed = client.post("/items/embeddings/refresh")
+
+    assert refreshed.status_code == 200
+    assert [item["id"] for item in refreshed.json()] == [item_id]
+    assert analytics_store.summary().embeddings_created == 2
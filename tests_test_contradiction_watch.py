@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app.contradiction_store import ContradictionStore
+from app.contradiction_watch import ContradictionWatcher
+from app.main import app, contradiction_store, contradiction_watcher, store
+from app.models import MemoryItemCreate
+from app.storage import MemoryStore
+
+
+def _payload(content: str, item_type: str = "plan") -> dict:
+    return {"type": item_type, "content": content, "importance": 3, "tags": []}
+
+
+def test_writes_trigger_incremental_checks() -> None:
+    store.clear()
+    contradiction_store.clear()
+    client = TestClient(app)
+    goal = client.post("/items", json=_payload("I will not skip leg day", "goal")).json()
+    plan = client.post("/items", json=_payload("Run every morning")).json()
+
+    found = contradiction_watcher.flush()
+
+    assert [(record.type, list(map(str, record.item_ids))) for record in found] == [
+        ("goal_vs_action", [goal["id"]])
+    ]
+    client.put(f"/items/{plan['id']}", json=_payload("Not run every morning"))
+    client.post("/items", json=_payload("Run every morning with the club"))
+    conflicts = contradiction_watcher.flush()
+
+    assert [record.type for record in conflicts] == ["content_conflict"]
+    assert str(conflicts[0].item_ids[0]) == plan["id"]
+    client.put(f"/items/{plan['id']}", json=_payload("Not run every morning"))
+    assert contradiction_watcher.flush() == []
+    assert len(client.get("/contradictions/history").json()) == 2
+
+
+def test_watcher_debounces_repeated_writes() -> None:
+    memory = MemoryStore()
+    watcher = ContradictionWatcher(memory, ContradictionStore(), delay=0.05)
+    record = memory.add(MemoryItemCreate(type="note", content="Quit the book club", importance=2))
+    checks: list[int] = []
+    check = watcher.check
+    watcher.check = lambda item_ids: checks.append(len(item_ids)) or check(item_ids)
+
+    for _ in range(3):
+        watcher.schedule(record.id)
+    deadline = time.monotonic() + 2
+    while not checks and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert checks == [1]
+    assert [record.type for record in watcher.contradictions.list()] == ["repeated_abandonment"]
+
+
+def test_feed_pushes_new_contradictions_to_subscribers() -> None:
+    memory = MemoryStore()
+    watcher = ContradictionWatcher(memory, ContradictionStore(), delay=0.01)
+
+    async def listen() -> str:
+        with watcher.feed.subscribe() as queue:
+            item = MemoryItemCreate(type="plan", content="Abandon the diet", importance=2)
+            record = memory.add(item)
+            watcher.schedule(record.id)
+            received = await asyncio.wait_for(queue.get(), timeout=2)
+        assert watcher.feed.subscribers == 0
+        return received.type
+
+    assert asyncio.run(listen()) == "repeated_abandonment"
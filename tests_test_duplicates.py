@@ -0,0 +1,88 @@
+from fastapi.testclient import TestClient
+
+from app.dedup import DuplicateIndex
+from app.main import app, store
+
+NOTE = "Skipped running again because work ran late on Thursday"
+EDITED_NOTE = "Skipped running again because work ran late on Thursday!!"
+OTHER_NOTE = "Booked a dentist appointment for next month"
+
+
+def _payload(content: str, importance: int = 2, tags: list[str] | None = None) -> dict:
+    return {"type": "note", "content": content, "importance": importance, "tags": tags or []}
+
+
+def test_duplicate_index_finds_edited_text_only() -> None:
+    index = DuplicateIndex()
+    index.add(1, index.signature(NOTE))
+    index.add(2, index.signature(OTHER_NOTE))
+
+    matches = index.query(index.signature(EDITED_NOTE))
+
+    assert [doc_id for doc_id, _ in matches] == [1]
+    index.remove(1)
+    assert index.query(index.signature(EDITED_NOTE)) == []
+
+
+def test_create_item_flags_and_merges_duplicates() -> None:
+    store.clear()
+    client = TestClient(app)
+    original = client.post("/items", json=_payload(NOTE, tags=["health"])).json()
+
+    flagged = client.post("/items", json=_payload(EDITED_NOTE))
+    assert flagged.status_code == 201
+    assert flagged.headers["X-Duplicate-Of"] == original["id"]
+
+    merged = client.post(
+        "/items",
+        params={"merge_duplicates": "true"},
+        json=_payload(EDITED_NOTE, importance=4, tags=["habit"]),
+    )
+    assert merged.status_code == 200
+    assert merged.json()["importance"] == 4
+    assert merged.json()["id"] in {original["id"], flagged.json()["id"]}
+    assert len(client.get("/items").json()) == 2
+
+
+def test_merge_only_folds_items_of_the_same_type() -> None:
+    store.clear()
+    client = TestClient(app)
+    note = client.post("/items", json=_payload(NOTE)).json()
+
+    goal = client.post(
+        "/items",
+        params={"merge_duplicates": "true"},
+        json={**_payload(EDITED_NOTE), "type": "goal"},
+    )
+    assert goal.status_code == 201
+    assert goal.json()["type"] == "goal"
+    assert goal.json()["id"] != note["id"]
+
+    merged = client.post(
+        "/items",
+        params={"merge_duplicates": "true"},
+        json={**_payload(NOTE, tags=["habit"]), "type": "goal"},
+    )
+    assert merged.status_code == 200
+    assert merged.json()["id"] == goal.json()["id"]
+    assert sorted(item["type"] for item in client.get("/items").json()) == ["goal", "note"]
+
+
+def test_bulk_merge_and_duplicates_report() -> None:
+    store.clear()
+    client = TestClient(app)
+
+    response = client.post(
+        "/items/bulk",
+        params={"merge_duplicates": "true"},
+        json=[_payload(NOTE), _payload(EDITED_NOTE, tags=["habit"]), _payload(OTHER_NOTE)],
+    )
+    assert response.json()["created"] == 2
+    assert response.json()["merged"] == 1
+
+    client.post("/items", json=_payload(EDITED_NOTE))
+    groups = client.get("/items/duplicates").json()
+
+    assert len(groups) == 1
+    assert {item["content"] for item in groups[0]["items"]} == {NOTE, EDITED_NOTE}
+    assert groups[0]["items"][0]["tags"] == ["habit"]
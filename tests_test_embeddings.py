@@ -1,6 +1,17 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
 from fastapi.testclient import TestClient
 
-from app.main import analytics_store, app, store
+from app.embeddings import (
+    AsyncOpenAIEmbeddingProvider,
+    AsyncTfidfEmbeddingProvider,
+    TfidfEmbeddingProvider,
+)
+from app.main import analytics_store, app, get_provider, store
 
 
 def test_embed_item_creates_embedding() -> None:
@@ -53,3 +64,53 @@ def test_refresh_embeddings_updates_all_items() -> None:
     data = refresh_response.json()
     assert len(data) == 2
     assert analytics_store.summary().embeddings_created == 2
+
+
+def test_import_does_not_load_embedding_backends() -> None:
+    probe = "import sys, app.main; print(sorted({'sklearn', 'httpx'} & set(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).resolve().parent.parent,
+        text=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_lifespan_warm_up_builds_provider(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("EMBEDDING_WARMUP", "1")
+    get_provider.cache_clear()
+
+    with TestClient(app) as client:
+        assert get_provider.cache_info().currsize == 1
+        assert client.get("/health").status_code == 200
+
+
+def test_async_tfidf_provider_matches_sync_provider() -> None:
+    corpus = ["Run every morning", "Stop running in the morning", "Read before bed"]
+    provider = AsyncTfidfEmbeddingProvider(max_workers=2)
+
+    async def embed_concurrently() -> list[list[float]]:
+        try:
+            return list(await asyncio.gather(*(provider.embed_text(t, corpus) for t in corpus)))
+        finally:
+            await provider.aclose()
+
+    expected = [TfidfEmbeddingProvider().embed_text(text, corpus) for text in corpus]
+    assert asyncio.run(embed_concurrently()) == expected
+
+
+def test_async_openai_provider_closes_client_from_previous_loop() -> None:
+    provider = AsyncOpenAIEmbeddingProvider(api_key="test")
+
+    async def client() -> object:
+        await provider.warm_up()
+        return provider._client
+
+    first = asyncio.run(client())
+    second = asyncio.run(client())
+    asyncio.run(provider.aclose())
+
+    assert first is not second
+    assert first.is_closed and second.is_closed
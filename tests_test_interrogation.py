@@ -1,6 +1,10 @@
+import time
+
+import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app, contradiction_store, interrogation_store, store
+from app.models import MemoryItemCreate
 
 
 def test_interrogation_prompt_includes_context_and_schedule() -> None:
@@ -68,3 +72,30 @@ def test_interrogation_submission_flow() -> None:
     responses = list_response.json()
     assert len(responses) == 1
     assert responses[0]["forced_choice"] == submission_payload["forced_choice"]
+
+
+def test_interrogation_uses_recent_window_and_important_carry_overs(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    store.clear()
+    interrogation_store.clear()
+    client = TestClient(app)
+    two_weeks_ago = time.time_ns() - 14 * 24 * 3600 * 10**9
+    with monkeypatch.context() as patch:
+        patch.setattr(time, "time_ns", lambda: two_weeks_ago)
+        stale = store.add(
+            MemoryItemCreate(type="note", content="Old low priority note", importance=2, tags=[])
+        )
+        carried = store.add(
+            MemoryItemCreate(type="goal", content="Old critical goal", importance=5, tags=[])
+        )
+    recent = client.post(
+        "/items",
+        json={"type": "plan", "content": "Plan from today", "importance": 3, "tags": []},
+    ).json()
+
+    prompt = client.post("/interrogations", params={"frequency": "weekly"}).json()
+
+    context_ids = {item["id"] for item in prompt["context_items"]}
+    assert context_ids == {recent["id"], str(carried.id)}
+    assert str(stale.id) not in context_ids
@@ -0,0 +1,92 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.analytics import AnalyticsStore
+from app.main import analytics_store, app, store
+
+
+def test_metrics_exposes_counters_and_latency_histograms() -> None:
+    store.clear()
+    analytics_store.clear()
+    client = TestClient(app)
+
+    payload = {"type": "goal", "content": "I won't skip standup", "importance": 3, "tags": []}
+    assert client.post("/items", json=payload).status_code == 201
+    assert client.post("/flows/run").status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert "secondbrain_items_created_total 1" in text
+    assert "secondbrain_flows_run_total 1" in text
+    assert (
+        'secondbrain_http_request_duration_seconds_count{endpoint="POST /items",status="201"} 1'
+        in text
+    )
+    stage_bucket = (
+        'secondbrain_flow_stage_duration_seconds_bucket{stage="contradictions",le="+Inf"}'
+    )
+    assert f"{stage_bucket} 1" in text
+
+
+def test_sharded_counters_merge_across_threads() -> None:
+    analytics = AnalyticsStore()
+
+    def record() -> None:
+        for _ in range(1000):
+            analytics.record_item_created()
+            analytics.observe("work_seconds", 0.002)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert analytics.summary().items_created == 8000
+    assert "secondbrain_work_seconds_count 8000" in analytics.render_prometheus()
+
+
+def test_timeseries_reports_windowed_counts() -> None:
+    now = [1_800_000_000.0]
+    analytics = AnalyticsStore(clock=lambda: now[0])
+
+    analytics.record_contradiction_run(2)
+    now[0] += 120
+    analytics.record_contradiction_run(3)
+    now[0] += 7200
+    analytics.record_contradiction_run(1)
+
+    recent = analytics.timeseries("contradictions_detected", "15m")
+    assert recent.resolution_seconds == 60
+    assert len(recent.buckets) == 15
+    assert recent.total == 1
+
+    daily = analytics.timeseries("contradictions_detected", "24h")
+    assert daily.resolution_seconds == 3600
+    assert daily.total == 6
+    assert analytics.summary().contradictions_detected == 6
+
+
+def test_timeseries_endpoint_validates_window() -> None:
+    analytics_store.clear()
+    client = TestClient(app)
+    analytics_store.record_item_created(3)
+
+    response = client.get(
+        "/analytics/timeseries",
+        params={"metric": "items_created", "window": "1h"},
+    )
+    assert response.status_code == 200
+    assert response.json()["total"] == 3
+
+    assert client.get(
+        "/analytics/timeseries",
+        params={"metric": "items_created", "window": "90d"},
+    ).status_code == 400
+    assert client.get(
+        "/analytics/timeseries",
+        params={"metric": "unknown", "window": "1h"},
+    ).status_code == 400
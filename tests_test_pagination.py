@@ -0,0 +1,84 @@
+import json
+import struct
+from uuid import UUID
+
+from fastapi.testclient import TestClient
+
+from app.main import app, store
+
+
+def _seed(client: TestClient, count: int) -> list[str]:
+    payload = [
+        {"type": "note", "content": f"Journal entry {index}", "importance": 2, "tags": []}
+        for index in range(count)
+    ]
+    response = client.post("/items/bulk", json=payload)
+    assert response.status_code == 200
+    return response.json()["item_ids"]
+
+
+def test_cursor_pagination_walks_all_items() -> None:
+    store.clear()
+    client = TestClient(app)
+    item_ids = _seed(client, 7)
+
+    seen: list[str] = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/items", params=params)
+        assert response.status_code == 200
+        seen.extend(item["id"] for item in response.json())
+        pages += 1
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert seen == item_ids
+
+
+def test_invalid_cursor_is_rejected() -> None:
+    client = TestClient(app)
+    response = client.get("/items", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_export_streams_ndjson_and_embedding_sidecar() -> None:
+    store.clear()
+    client = TestClient(app)
+    item_ids = _seed(client, 3)
+    embed_response = client.post(f"/items/{item_ids[1]}/embed")
+    assert embed_response.status_code == 200
+
+    export_response = client.get("/items/export")
+    assert export_response.status_code == 200
+    assert export_response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in export_response.text.splitlines()]
+    assert [line["id"] for line in lines] == item_ids
+
+    sidecar_response = client.get("/items/export/embeddings")
+    assert sidecar_response.status_code == 200
+    body = sidecar_response.content
+    assert body[:4] == b"SBE1"
+    raw_id, dim = struct.unpack_from("<16sI", body, 4)
+    assert str(UUID(bytes=raw_id)) == item_ids[1]
+    assert len(body) == 4 + 20 + dim * 4
+
+
+def test_list_items_filters_by_created_at_range() -> None:
+    store.clear()
+    client = TestClient(app)
+    item_ids = _seed(client, 5)
+    created = {item["id"]: item["created_at"] for item in client.get("/items").json()}
+
+    window = {"since": created[item_ids[1]], "until": created[item_ids[4]]}
+    listed = client.get("/items", params=window).json()
+    paged = client.get("/items", params={**window, "limit": 2})
+
+    assert [item["id"] for item in listed] == item_ids[1:4]
+    assert [item["id"] for item in paged.json()] == item_ids[1:3]
+    assert "x-next-cursor" in paged.headers
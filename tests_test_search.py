@@ -0,0 +1,121 @@
+from uuid import UUID
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app, default_tenant, interrogation_store, store
+from app.text_index import KeywordIndex
+from app.vectors import EmbeddingPrecision, QuantizedVector, cosine_top_k
+
+
+def _seed(client: TestClient) -> dict[str, str]:
+    payloads = {
+        "run": {"type": "goal", "content": "Run a marathon in spring", "importance": 5},
+        "plan": {"type": "plan", "content": "Run three mornings a week", "importance": 3},
+        "book": {"type": "note", "content": "Finish the novel draft", "importance": 4},
+    }
+    ids = {}
+    for name, payload in payloads.items():
+        response = client.post("/items", json={**payload, "tags": ["health"] * (name != "book")})
+        ids[name] = response.json()["id"]
+    return ids
+
+
+def test_keyword_index_prefers_rare_terms() -> None:
+    index = KeywordIndex()
+    index.add(1, "run every day")
+    index.add(2, "run the marathon")
+    index.add(3, "read every day")
+
+    scores = index.score("marathon run")
+    assert max(scores, key=scores.__getitem__) == 2
+    assert 3 not in scores
+
+    index.remove(2, "run the marathon")
+    assert 2 not in index.score("marathon")
+
+
+def test_search_fuses_keyword_and_vector_rankings() -> None:
+    store.clear()
+    client = TestClient(app)
+    ids = _seed(client)
+    assert client.post("/items/embeddings/refresh").status_code == 200
+
+    response = client.get("/search", params={"q": "marathon run", "k": 2})
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["item"]["id"] for result in results][0] == ids["run"]
+    assert results[0]["keyword_rank"] == 1
+    assert results[0]["vector_rank"] == 1
+
+
+def test_search_ignores_vectors_from_an_older_tfidf_fit(monkeypatch: pytest.MonkeyPatch) -> None:
+    store.clear()
+    client = TestClient(app)
+    ids = _seed(client)
+    assert client.post("/items/embeddings/refresh").status_code == 200
+    assert client.get("/search", params={"q": "marathon run"}).json()[0]["vector_rank"] == 1
+
+    client.post("/items", json={"type": "note", "content": "Marathon shoes", "importance": 2})
+    results = client.get("/search", params={"q": "marathon run"}).json()
+
+    assert store.get(UUID(ids["run"])).embedding_space == f"tfidf@{store.corpus_version - 1}"
+    assert [result["vector_rank"] for result in results] == [None] * len(results)
+    assert client.post("/items/embeddings/refresh").status_code == 200
+    monkeypatch.setattr(default_tenant.retriever, "max_vector_candidates", 2)
+    truncated = client.get("/search", params={"q": "marathon run"})
+    assert truncated.headers["X-Vector-Candidates-Truncated"] == "true"
+    assert [result["vector_rank"] for result in truncated.json()].count(None) >= 2
+
+
+@pytest.mark.parametrize("precision", list(EmbeddingPrecision))
+def test_quantized_vectors_keep_cosine_ranking(precision: EmbeddingPrecision) -> None:
+    rows = [[1.0, 0.0, 0.5, 0.0], [0.9, 0.1, 0.4, 0.0], [0.0, 1.0, 0.0, 0.2], [-1.0, 0.0, 0.0, 0.0]]
+    vectors = [QuantizedVector.quantize(row, precision) for row in rows]
+
+    ranked = cosine_top_k([1.0, 0.0, 0.45, 0.0], vectors, k=3, rerank=4)
+
+    assert [index for index, _ in ranked] == [0, 1]
+    assert ranked[0][1] == pytest.approx(0.9995, abs=0.01)
+    assert vectors[0].nbytes == 4 * precision.itemsize
+    assert vectors[1].tolist() == pytest.approx(rows[1], abs=0.01)
+
+
+def test_search_ranks_int8_embeddings(monkeypatch: pytest.MonkeyPatch) -> None:
+    store.clear()
+    monkeypatch.setattr(store, "precision", EmbeddingPrecision.int8)
+    client = TestClient(app)
+    ids = _seed(client)
+    assert client.post("/items/embeddings/refresh").status_code == 200
+
+    results = client.get("/search", params={"q": "marathon run", "k": 2}).json()
+
+    assert store.get(UUID(ids["run"])).embedding.precision is EmbeddingPrecision.int8
+    assert results[0]["item"]["id"] == ids["run"]
+    assert results[0]["vector_rank"] == 1
+
+
+def test_search_applies_filters_before_scoring() -> None:
+    store.clear()
+    client = TestClient(app)
+    ids = _seed(client)
+
+    response = client.get(
+        "/search",
+        params={"q": "run", "item_type": "plan", "tags": "health", "min_importance": 2},
+    )
+
+    assert [result["item"]["id"] for result in response.json()] == [ids["plan"]]
+    assert client.get("/search", params={"q": "run", "tags": "career"}).json() == []
+
+
+def test_interrogation_focus_uses_search() -> None:
+    store.clear()
+    interrogation_store.clear()
+    client = TestClient(app)
+    ids = _seed(client)
+
+    prompt = client.post("/interrogations", params={"focus": "novel"}).json()
+
+    assert [item["id"] for item in prompt["context_items"]] == [ids["book"]]
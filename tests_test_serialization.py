@@ -0,0 +1,63 @@
+from uuid import UUID
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic_core import PydanticSerializationError
+
+from app.contradictions import ContradictionRecord, ContradictionType
+from app.main import app, store
+from app.models import ItemType, MemoryItemCreate, MemoryItemRecord
+
+TRICKY = 'quote " slash \\ nul \x00 del \x7f sep   accent é emoji 😀 </script>'
+
+
+def test_record_json_matches_pydantic() -> None:
+    record = MemoryItemRecord(type=ItemType.note, content=TRICKY, importance=2, tags=[TRICKY, "x"])
+
+    assert record.to_json() == record.to_public().model_dump_json().encode()
+
+
+def test_record_json_rejects_lone_surrogates_like_pydantic() -> None:
+    record = MemoryItemRecord(type=ItemType.note, content="broken \ud800", importance=2)
+
+    with pytest.raises(PydanticSerializationError):
+        record.to_public().model_dump_json()
+    with pytest.raises(PydanticSerializationError):
+        record.to_json()
+
+
+def test_record_json_is_invalidated_after_update_and_merge() -> None:
+    store.clear()
+    client = TestClient(app)
+    payload = {"type": "note", "content": "Plan the week", "importance": 2, "tags": []}
+    created = client.post("/items", json=payload).json()
+    record = store.get(UUID(created["id"]))
+    assert record is not None
+    record.to_json()
+
+    store.update(record.id, MemoryItemCreate(**{**payload, "importance": 4}))
+    assert record.to_json() == record.to_public().model_dump_json().encode()
+    assert client.get("/items").json()[0]["importance"] == 4
+
+    client.post(
+        "/items",
+        params={"merge_duplicates": True},
+        json={**payload, "tags": ["weekly"]},
+    )
+    assert record.to_json() == record.to_public().model_dump_json().encode()
+    assert client.get("/items").json()[0]["tags"] == ["weekly"]
+
+
+def test_contradiction_copy_drops_cached_json() -> None:
+    record = ContradictionRecord(
+        type=ContradictionType.content_conflict,
+        description="Conflicting goals",
+        item_ids=[],
+        confidence=0.5,
+    )
+    record.to_json()
+
+    copy = record.model_copy(update={"confidence": 0.9})
+
+    assert copy.to_json() == copy.model_dump_json().encode()
+    assert record.to_json() == record.model_dump_json().encode()
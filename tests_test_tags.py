@@ -0,0 +1,110 @@
+import random
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.bitmap import Bitmap
+from app.main import app, store
+from app.tags import TagQueryError, parse_tag_query
+
+
+def _payload(content: str, tags: list[str], item_type: str = "note") -> dict:
+    return {"type": item_type, "content": content, "importance": 3, "tags": tags}
+
+
+def test_bitmap_operations_match_set_semantics() -> None:
+    generator = random.Random(7)
+    left = set(generator.sample(range(300_000), 20_000)) | set(range(70_000, 75_000))
+    right = set(generator.sample(range(300_000), 3_000)) | set(range(72_000, 80_000))
+    first, second = Bitmap.from_ordinals(sorted(left)), Bitmap()
+    for ordinal in right:
+        second.add(ordinal)
+
+    assert list(first & second) == sorted(left & right)
+    assert list(first | second) == sorted(left | right)
+    assert list(first - second) == sorted(left - right)
+    for ordinal in range(70_000, 74_000):
+        first.remove(ordinal)
+    assert len(first) == len(left - set(range(70_000, 74_000)))
+    assert 74_500 in first and 71_000 not in first
+    probes = np.array([74_500, 71_000, 300_001, *sorted(right)[:50]], dtype=np.int64)
+    assert first.contains(probes).tolist() == [ordinal in first for ordinal in probes.tolist()]
+
+
+def test_items_filter_by_boolean_tag_expressions() -> None:
+    store.clear()
+    client = TestClient(app)
+    client.post("/items", json=_payload("Morning run", ["health", "running"]))
+    client.post("/items", json=_payload("Swim laps", ["health", "swimming"], "plan"))
+    client.post("/items", json=_payload("Sprained ankle", ["health", "running", "injury"]))
+    client.post("/items", json=_payload("Tax return", ["finance"]))
+
+    def contents(tags: str, **params: object) -> list[str]:
+        response = client.get("/items", params={"tags": tags, **params})
+        return [item["content"] for item in response.json()]
+
+    assert contents("health AND (running OR swimming) AND NOT injury") == [
+        "Morning run",
+        "Swim laps",
+    ]
+    assert contents("finance OR injury") == ["Sprained ankle", "Tax return"]
+    assert contents("NOT health") == ["Tax return"]
+    assert contents("health", item_type="plan") == ["Swim laps"]
+    assert contents("health running", limit=1) == ["Morning run"]
+    assert client.get("/items", params={"tags": "health AND (running"}).status_code == 400
+    nested = client.get("/items", params={"tags": "(" * 330 + "health" + ")" * 330})
+    assert nested.status_code == 400
+    assert "nests deeper" in nested.json()["detail"]
+
+
+def test_tag_index_tracks_updates_merges_and_deletes() -> None:
+    store.clear()
+    client = TestClient(app)
+    item = client.post("/items", json=_payload("Read a book", ["reading"])).json()
+    client.put(f"/items/{item['id']}", json=_payload("Read a book", ["learning"]))
+    other = client.post("/items", json=_payload("Write notes", ["learning"])).json()
+    client.post(
+        "/items",
+        params={"merge_duplicates": True},
+        json=_payload("Write notes", ["writing"]),
+    )
+
+    facets = client.get("/tags").json()
+    assert facets == [{"tag": "learning", "count": 2}, {"tag": "writing", "count": 1}]
+    assert client.get("/tags").json() == facets
+    client.delete(f"/items/{other['id']}")
+    assert client.get("/tags").json() == [{"tag": "learning", "count": 1}]
+    assert [entry["content"] for entry in client.get("/items?tags=reading").json()] == []
+
+
+def test_tag_facets_combine_with_type_time_and_expression_filters() -> None:
+    store.clear()
+    client = TestClient(app)
+    client.post("/items", json=_payload("Budget review", ["finance", "weekly"], "plan"))
+    client.post("/items", json=_payload("Stretch", ["health", "weekly"]))
+    now = datetime.now(UTC)
+
+    assert client.get("/tags", params={"item_type": "plan"}).json() == [
+        {"tag": "finance", "count": 1},
+        {"tag": "weekly", "count": 1},
+    ]
+    assert client.get("/tags", params={"tags": "NOT finance", "limit": 1}).json() == [
+        {"tag": "health", "count": 1}
+    ]
+    since = (now + timedelta(minutes=1)).isoformat()
+    assert client.get("/tags", params={"since": since}).json() == []
+    assert client.get("/tags", params={"until": since}).json()[0] == {
+        "tag": "weekly",
+        "count": 2,
+    }
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "AND health", "health OR", "(health", 'x "y', "a)", "NOT " * 17 + "a"],
+)
+def test_invalid_tag_queries_are_rejected(text: str) -> None:
+    with pytest.raises(TagQueryError):
+        parse_tag_query(text)
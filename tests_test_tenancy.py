@@ -0,0 +1,218 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app, default_tenant, store
+from app.models import MemoryItemCreate
+from app.tenancy import TenantQuota, TenantRegistry, TenantState, TokenBucket
+
+ALICE = {"X-Tenant-ID": "alice"}
+BOB = {"X-Tenant-ID": "bob"}
+
+
+def _payload(content: str) -> dict:
+    return {"type": "note", "content": content, "importance": 3, "tags": ["tenant"]}
+
+
+def _registry(tmp_path: Path, **kwargs: object) -> TenantRegistry:
+    return TenantRegistry(default_tenant, data_dir=tmp_path, **kwargs)
+
+
+def test_tenants_are_isolated_by_header(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    store.clear()
+    monkeypatch.setattr("app.main.tenants", _registry(tmp_path))
+    client = TestClient(app)
+
+    alice = client.post("/items", json=_payload("Alice ships on Friday"), headers=ALICE)
+    client.post("/items", json=_payload("Bob plans a trip"), headers=BOB)
+
+    alice_items = client.get("/items", headers=ALICE).json()
+    assert [item["content"] for item in alice_items] == ["Alice ships on Friday"]
+    assert client.get(f"/items/{alice.json()['id']}", headers=BOB).status_code == 404
+    assert client.get("/items").json() == []
+    assert client.get("/items", headers={"X-Tenant-ID": "../etc"}).status_code == 400
+
+
+def test_idle_tenants_are_evicted_and_rehydrated(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    registry = _registry(tmp_path, max_resident=1)
+    monkeypatch.setattr("app.main.tenants", registry)
+    client = TestClient(app)
+
+    created = client.post("/items", json=_payload("Alice ships on Friday"), headers=ALICE).json()
+    prompt = client.post("/interrogations", headers=ALICE).json()
+    client.post("/items", json=_payload("Bob plans a trip"), headers=BOB)
+
+    assert registry.resident() == ["bob"]
+    assert (tmp_path / "alice.ndjson").exists()
+
+    restored = client.get(f"/items/{created['id']}", headers=ALICE)
+    assert restored.json() == created
+    history = client.get("/interrogations/history", headers=ALICE).json()
+    assert [session["id"] for session in history] == [prompt["id"]]
+    assert registry.resident() == ["alice"]
+
+
+def test_reloaded_tenant_ignores_vectors_from_before_eviction(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    registry = _registry(tmp_path, max_resident=1)
+    monkeypatch.setattr("app.main.tenants", registry)
+    client = TestClient(app)
+    ids = [
+        client.post("/items", json=_payload(content), headers=ALICE).json()["id"]
+        for content in ("elder fig", "apple banana", "cherry date")
+    ]
+    assert client.post("/items/embeddings/refresh", headers=ALICE).status_code == 200
+    client.get("/items", headers=BOB)
+    assert registry.resident() == ["bob"]
+
+    client.delete(f"/items/{ids[1]}", headers=ALICE)
+    client.post("/items", json=_payload("grape honeydew"), headers=ALICE)
+    hits = client.get("/search", params={"q": "grape"}, headers=ALICE).json()
+
+    assert [hit["item"]["content"] for hit in hits] == ["grape honeydew"]
+    assert all(hit["vector_rank"] is None for hit in hits)
+
+
+def test_evicting_entry_outlives_overlapping_dumps(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    registry = _registry(tmp_path, max_resident=1)
+    entered, resume = threading.Event(), threading.Event()
+    dump = TenantState.dump
+
+    def slow_first_dump(state: TenantState, path: Path) -> bool:
+        if not entered.is_set():
+            entered.set()
+            resume.wait(5)
+        return dump(state, path)
+
+    monkeypatch.setattr(TenantState, "dump", slow_first_dump)
+    with registry.use("alice") as alice:
+        alice.store.add(MemoryItemCreate(**_payload("Before eviction")))
+    evicting = threading.Thread(target=registry.checkout, args=("bob",))
+    evicting.start()
+    assert entered.wait(5)
+
+    with registry.use("alice") as reclaimed:
+        assert reclaimed is alice
+        alice.store.add(MemoryItemCreate(**_payload("After reclaim")))
+    assert registry._evicting == {"alice": alice}
+
+    resume.set()
+    evicting.join()
+    assert registry._evicting == {}
+    reloaded = registry.checkout("alice")
+    assert sorted(record.content for record in reloaded.store.list()) == [
+        "After reclaim",
+        "Before eviction",
+    ]
+    assert [path.name for path in tmp_path.iterdir()] == ["alice.ndjson"]
+
+
+def test_item_quota_rejects_new_items(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    registry = _registry(tmp_path, quota=TenantQuota(max_items=2))
+    monkeypatch.setattr("app.main.tenants", registry)
+    client = TestClient(app)
+
+    for content in ("First note", "Second note"):
+        assert client.post("/items", json=_payload(content), headers=ALICE).status_code == 201
+
+    assert client.post("/items", json=_payload("Third note"), headers=ALICE).status_code == 403
+    bulk = client.post("/items/bulk", json=[_payload("Fourth note")], headers=ALICE)
+    assert bulk.status_code == 403
+    assert client.get("/tenant", headers=ALICE).json()["items"] == 2
+
+
+def test_embedding_rate_limit_returns_retry_after(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    registry = _registry(tmp_path, quota=TenantQuota(embeddings_per_minute=1))
+    monkeypatch.setattr("app.main.tenants", registry)
+    client = TestClient(app)
+    item = client.post("/items", json=_payload("Embed me once"), headers=ALICE).json()
+
+    assert client.post(f"/items/{item['id']}/embed", headers=ALICE).status_code == 200
+    limited = client.post(f"/items/{item['id']}/embed", headers=ALICE)
+
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+    search = client.get("/search", params={"q": "embed"}, headers=ALICE)
+    assert [hit["item"]["id"] for hit in search.json()] == [item["id"]]
+
+
+def test_token_bucket_refills_over_time() -> None:
+    now = 0.0
+    bucket = TokenBucket(per_minute=60, clock=lambda: now)
+
+    assert bucket.acquire(60) == 0.0
+    assert bucket.acquire() == pytest.approx(1.0)
+    now = 2.0
+    assert bucket.acquire(2) == 0.0
+    with pytest.raises(ValueError):
+        bucket.acquire(61)
+
+
+def test_readonly_tenants_leave_no_snapshot_or_lock(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    registry = _registry(tmp_path, max_resident=1)
+    monkeypatch.setattr("app.main.tenants", registry)
+    client = TestClient(app)
+
+    for tenant_id in ("probe-1", "probe-2", "probe-3"):
+        assert client.get("/items", headers={"X-Tenant-ID": tenant_id}).json() == []
+
+    assert registry.resident() == ["probe-3"]
+    assert list(tmp_path.iterdir()) == []
+    assert registry._loading == {}
+
+
+def test_oversized_embedding_refresh_is_rejected_without_draining_bucket(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    registry = _registry(tmp_path, quota=TenantQuota(embeddings_per_minute=2))
+    monkeypatch.setattr("app.main.tenants", registry)
+    client = TestClient(app)
+    for content in ("First note", "Second note", "Third note"):
+        item = client.post("/items", json=_payload(content), headers=ALICE).json()
+
+    assert client.post("/items/embeddings/refresh", headers=ALICE).status_code == 403
+    assert client.post(f"/items/{item['id']}/embed", headers=ALICE).status_code == 200
+
+
+def test_joined_embed_requests_are_charged_once(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    registry = _registry(tmp_path, quota=TenantQuota(embeddings_per_minute=1))
+    monkeypatch.setattr("app.main.tenants", registry)
+    item = TestClient(app).post("/items", json=_payload("Shared"), headers=ALICE).json()
+    url = f"/items/{item['id']}/embed"
+
+    async def embed_concurrently() -> list[int]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.post(url, headers=ALICE) for _ in range(3)))
+            return [response.status_code for response in responses]
+
+    assert asyncio.run(embed_concurrently()) == [200, 200, 200]
+    assert TestClient(app).post(url, headers=ALICE).status_code == 429
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app, contradiction_store, interrogation_store, store, trace_store
+from app.tracing import SamplingProfiler, TracingMiddleware
+
+
+def test_traced_request_records_nested_spans() -> None:
+    store.clear()
+    contradiction_store.clear()
+    interrogation_store.clear()
+    trace_store.clear()
+    client = TestClient(app)
+
+    payload = {"type": "goal", "content": "I won't miss the deadline", "importance": 4, "tags": []}
+    assert client.post("/items", json=payload).status_code == 201
+    assert trace_store.list() == []
+
+    flow_response = client.post("/flows/run", headers={"X-Trace": "1"})
+    assert flow_response.status_code == 200
+    trace_id = flow_response.headers["x-trace-id"]
+
+    trace_response = client.get(f"/debug/traces/{trace_id}")
+    assert trace_response.status_code == 200
+    trace = trace_response.json()
+    assert trace["path"] == "/flows/run"
+    assert trace["status"] == 200
+    assert trace["profile"] is None
+    names = [span["name"] for span in trace["spans"]]
+    assert "store.list" in names
+    assert "detect_contradictions" in names
+    assert "generate_interrogation" in names
+    assert "serialize.json_object" in names
+    store_list = trace["spans"][names.index("store.list")]
+    assert store_list["parent"] is None
+    assert store_list["duration_ms"] >= 0
+
+
+def test_profile_header_requires_debug_flag() -> None:
+    trace_store.clear()
+    client = TestClient(app)
+
+    assert client.post("/flows/run", headers={"X-Profile": "1"}).status_code == 200
+    assert trace_store.list() == []
+
+    debug_client = TestClient(TracingMiddleware(app, trace_store, allow_profile_header=True))
+    response = debug_client.post("/flows/run", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+
+    traces = trace_store.list()
+    assert len(traces) == 1
+    assert traces[0].profile is not None
+
+
+def _spin_traced(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(100))
+
+
+def _spin_other(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_profiler_samples_only_request_threads() -> None:
+    stop = threading.Event()
+    workers = [
+        threading.Thread(target=_spin_traced, args=(stop,)),
+        threading.Thread(target=_spin_other, args=(stop,)),
+    ]
+    for worker in workers:
+        worker.start()
+    profiler = SamplingProfiler(
+        interval=0.001,
+        module_prefix=__name__,
+        threads=lambda: {workers[0].ident},
+    )
+    profiler.start()
+    time.sleep(0.05)
+    stacks = profiler.stop()
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    assert stacks
+    assert all("_spin_traced" in stack for stack in stacks)
+    assert not any("_spin_other" in stack for stack in stacks)